@@ -0,0 +1,381 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# Headless benchmarks of the editor, console and explorer hot paths, driving
+# the real widgets under Qt's offscreen platform:
+#
+#   python benchmark.py [--quick] [--only editor,console] [--output results.json]
+#   python benchmark.py --baseline old.json          # run, then compare
+#   python benchmark.py --results new.json --baseline old.json   # compare only
+#
+# Every metric records whether lower or higher is better; a comparison flags
+# changes in the bad direction beyond --threshold and exits with status 1.
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PySide6.QtCore import QEvent, QProcess, Qt
+from PySide6.QtGui import QKeyEvent, QTextCursor
+from PySide6.QtWidgets import QApplication
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+THEME = os.path.join(BASE_DIR, 'default.json')
+
+SOURCE_TEMPLATE = '''class Widget{n}(Base):
+	"""Generated class {n}."""
+	limit = {n} * 2  # tuning constant
+
+	def compute_{n}(self, alpha, beta=0.5):
+		total = 0
+		for i in range(self.limit):
+			if i % 3 == 0 and alpha:
+				total += alpha * i - beta
+			else:
+				total -= len(str(i))
+		return {{'name': 'w{n}', 'total': total, 'ratio': 1e-3}}
+
+'''
+
+
+def python_source(lines):
+	chunk = SOURCE_TEMPLATE.count('\n')
+	return ''.join(SOURCE_TEMPLATE.format(n=n) for n in range(lines // chunk + 1))
+
+
+def pump(app, until, timeout):
+	# Process events until `until()` is true; False on timeout
+	deadline = time.perf_counter() + timeout
+	while not until():
+		if time.perf_counter() > deadline:
+			return False
+		app.processEvents()
+		time.sleep(0.001)
+	return True
+
+
+def metric(value, unit, better='lower', **extra):
+	return dict(value=round(value, 3), unit=unit, better=better, **extra)
+
+
+def percentiles(samples):
+	samples = sorted(samples)
+	return samples[len(samples) // 2], samples[min(len(samples) - 1, int(len(samples) * 0.95))], samples[-1]
+
+
+def key_event(char):
+	if char == '\n':
+		return QKeyEvent(QEvent.KeyPress, Qt.Key_Return, Qt.NoModifier, '\r')
+	return QKeyEvent(QEvent.KeyPress, Qt.Key_unknown if not char.isalnum() else ord(char.upper()), Qt.NoModifier, char)
+
+
+class Bench:
+	def __init__(self, app, workdir, args):
+		self.app = app
+		self.workdir = workdir
+		self.args = args
+
+	def source_file(self, lines):
+		path = os.path.join(self.workdir, f'source_{lines}.py')
+		if not os.path.exists(path):
+			with open(path, 'w', encoding='utf-8') as f:
+				f.write(python_source(lines))
+		return path
+
+	def editor(self, path):
+		from texteditor import CodeEditor
+		editor = CodeEditor(THEME)
+		editor.resize(1000, 800)
+		editor.load_from_file(path)
+		return editor
+
+	def close(self, widget):
+		widget.close()
+		widget.deleteLater()
+		self.app.processEvents()
+
+	# ---------- Editor ----------
+
+	def editor_open(self):
+		results = {}
+		sizes = (1000, 10000) if self.args.quick else (1000, 10000, 100000)
+		for lines in sizes:
+			path = self.source_file(lines)
+			from texteditor import CodeEditor
+			start = time.perf_counter()
+			editor = CodeEditor(THEME)
+			editor.resize(1000, 800)
+			editor.load_from_file(path)  # highlighting runs synchronously on load
+			opened = time.perf_counter()
+			editor.show()
+			editor.repaint()
+			painted = time.perf_counter()
+			label = f'{lines // 1000}k'
+			results[f'open_highlight_{label}'] = metric((opened - start) * 1000, 'ms')
+			results[f'first_paint_{label}'] = metric((painted - opened) * 1000, 'ms')
+			self.close(editor)
+		return results
+
+	def editor_typing(self):
+		editor = self.editor(self.source_file(10000))
+		editor.show()
+		cursor = editor.textCursor()
+		cursor.setPosition(editor.document().findBlockByNumber(5000).position())
+		editor.setTextCursor(cursor)
+		text = 'value = compute(alpha, beta) + 1\n' * (3 if self.args.quick else 10)
+		latencies = []
+		for char in text:
+			event = key_event(char)
+			start = time.perf_counter()
+			self.app.sendEvent(editor, event)
+			editor.repaint()
+			latencies.append((time.perf_counter() - start) * 1000)
+		p50, p95, worst = percentiles(latencies)
+		editor.document().setModified(False)
+		self.close(editor)
+		return {
+			'keystroke_p50': metric(p50, 'ms'),
+			'keystroke_p95': metric(p95, 'ms'),
+			'keystroke_max': metric(worst, 'ms'),
+		}
+
+	def completion_popup(self):
+		editor = self.editor(self.source_file(1000))
+		editor.show()
+		cursor = editor.textCursor()
+		cursor.movePosition(QTextCursor.End)
+		editor.setTextCursor(cursor)
+		latencies = []
+		for _ in range(10 if self.args.quick else 30):
+			self.app.sendEvent(editor, key_event('\n'))
+			start = time.perf_counter()
+			# Prefix of the generated compute_<n> methods (and compile, complex)
+			for char in 'comp':
+				self.app.sendEvent(editor, key_event(char))
+			shown = editor.completer.popup().isVisible()
+			latencies.append((time.perf_counter() - start) * 1000)
+			editor.completer.popup().hide()
+			if not shown:
+				break
+		editor.document().setModified(False)
+		self.close(editor)
+		if not shown:
+			# Keystrokes without a popup are not popup latency; leave the metric out
+			print('  completion popup did not open; no popup metrics recorded', flush=True)
+			return {}
+		p50, _p95, worst = percentiles(latencies)
+		return {
+			'popup_p50': metric(p50, 'ms'),
+			'popup_max': metric(worst, 'ms'),
+		}
+
+	# ---------- Console ----------
+
+	def console_throughput(self):
+		from console import ConsoleWidget
+		megabytes = self.args.console_mb or (16 if self.args.quick else 500)
+		console = ConsoleWidget(cwd=self.workdir)
+		console.show()
+		pump(self.app, lambda: console.proc and console.proc.state() == QProcess.Running, 10)
+		pump(self.app, lambda: False, 0.5)  # shell prompt and rc output
+		doc = console.terminal.document()
+		base = doc.characterCount()
+		python = shutil.which('python') or sys.executable
+		script = f"import sys; b=('x'*1023+'\\\\n')*1024; [sys.stdout.write(b) for _ in range({megabytes})]; print('BENCH_DONE')"
+
+		def done():
+			block = doc.lastBlock()
+			for _ in range(3):
+				if block.text().startswith('BENCH_DONE'):
+					return True
+				block = block.previous()
+			return False
+
+		start = time.perf_counter()
+		console.execute_line(f'"{python}" -c "{script}"')
+		finished = pump(self.app, done, self.args.timeout)
+		elapsed = time.perf_counter() - start
+		received = (doc.characterCount() - base) / (1024 * 1024)
+		console.stop()
+		self.close(console)
+		return {
+			'throughput': metric(received / elapsed, 'MB/s', 'higher', megabytes=megabytes, timed_out=not finished),
+		}
+
+	# ---------- Explorer ----------
+
+	def file_tree(self, directories, files_per_dir):
+		root = os.path.join(self.workdir, f'tree_{directories}x{files_per_dir}')
+		if not os.path.isdir(root):
+			for d in range(directories):
+				directory = os.path.join(root, f'dir_{d:03d}')
+				os.makedirs(directory)
+				for n in range(files_per_dir):
+					open(os.path.join(directory, f'file_{n:05d}.{"py" if n % 3 else "txt"}'), 'w').close()
+		return root
+
+	def explorer_expand(self):
+		from project_explorer import FileExplorerTree
+		directories = 10 if self.args.quick else 100
+		root = self.file_tree(directories, 1000)
+		start = time.perf_counter()
+		tree = FileExplorerTree(root)
+		tree.resize(300, 900)
+		tree.show()
+		model = tree.fs_model
+		root_index = model.index(root)
+		pump(self.app, lambda: model.rowCount(root_index) >= directories, self.args.timeout)
+		opened = time.perf_counter()
+		loaded = set()
+		model.directoryLoaded.connect(loaded.add)
+		for d in range(directories):
+			source = model.index(os.path.join(root, f'dir_{d:03d}'))
+			tree.expand(tree.view_index(source))
+		finished = pump(self.app, lambda: len(loaded) >= directories, self.args.timeout)
+		# Let the proxy filter and the view lay out what arrived
+		pump(self.app, lambda: False, 0.05)
+		expanded = time.perf_counter()
+		self.close(tree)
+		return {
+			'open_root': metric((opened - start) * 1000, 'ms'),
+			'expand_all': metric((expanded - opened) * 1000, 'ms', files=directories * 1000, timed_out=not finished),
+		}
+
+	# ---------- Startup ----------
+
+	def startup(self):
+		import theme_to_stylesheet
+		from main import SnyIDE
+		theme_to_stylesheet._templates.clear()
+		theme_to_stylesheet._stylesheets.clear()
+		theme_to_stylesheet._themes.clear()
+		start = time.perf_counter()
+		theme_to_stylesheet.get_stylesheet(THEME)
+		cold = time.perf_counter() - start
+		warm = []
+		for _ in range(20):
+			start = time.perf_counter()
+			theme_to_stylesheet.get_stylesheet(THEME)
+			warm.append(time.perf_counter() - start)
+		project = os.path.join(self.workdir, 'project')
+		os.makedirs(project, exist_ok=True)
+		start = time.perf_counter()
+		window = SnyIDE(project)
+		self.app.processEvents()
+		shown = time.perf_counter() - start
+		self.close(window)
+		return {
+			'stylesheet_cold': metric(cold * 1000, 'ms'),
+			'stylesheet_warm': metric(statistics.median(warm) * 1000, 'ms'),
+			'window_startup': metric(shown * 1000, 'ms'),
+		}
+
+
+SUITES = {
+	'editor': ('editor_open', 'editor_typing', 'completion_popup'),
+	'console': ('console_throughput',),
+	'explorer': ('explorer_expand',),
+	'startup': ('startup',),
+}
+
+
+def run(args):
+	app = QApplication.instance() or QApplication(sys.argv[:1])
+	workdir = args.workdir or tempfile.mkdtemp(prefix='snyide-bench-')
+	os.makedirs(workdir, exist_ok=True)
+	bench = Bench(app, workdir, args)
+	selected = args.only.split(',') if args.only else list(SUITES)
+	results = {}
+	try:
+		for suite in selected:
+			for name in SUITES[suite]:
+				print(f'{suite}.{name} ...', flush=True)
+				for key, value in getattr(bench, name)().items():
+					results[f'{suite}.{name}.{key}'] = value
+	finally:
+		if not args.workdir and not args.keep:
+			shutil.rmtree(workdir, ignore_errors=True)
+	from PySide6 import __version__ as pyside_version
+	return {
+		'meta': {
+			'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+			'python': platform.python_version(),
+			'pyside': pyside_version,
+			'platform': platform.platform(),
+			'qpa': os.environ.get('QT_QPA_PLATFORM'),
+			'quick': args.quick,
+			'suites': selected,
+		},
+		'results': results,
+	}
+
+
+def compare(current, baseline, threshold):
+	# Lines of the comparison table and the number of regressions
+	lines = [f'{"metric":<52} {"baseline":>12} {"current":>12} {"change":>8}']
+	regressions = 0
+	suites = current.get('meta', {}).get('suites', list(SUITES))
+	same_mode = current.get('meta', {}).get('quick') == baseline.get('meta', {}).get('quick')
+	measured = {key.rsplit('.', 1)[0] for key in current['results']}
+	for key in sorted(set(baseline.get('results', {})) - set(current['results'])):
+		# A metric the run could not measure any more. Suites left out with
+		# --only are not expected; across --quick and full runs the input sizes
+		# differ, so there only a benchmark that measured nothing at all counts.
+		if key.split('.', 1)[0] not in suites or (not same_mode and key.rsplit('.', 1)[0] in measured):
+			continue
+		lines.append(f'{key:<52} {baseline["results"][key]["value"]:>12.3f} {"-":>12} {"missing":>8}  REGRESSION')
+		regressions += 1
+	for key, now in sorted(current['results'].items()):
+		before = baseline.get('results', {}).get(key)
+		if before is None or not before['value']:
+			lines.append(f'{key:<52} {"-":>12} {now["value"]:>12.3f} {"new":>8}')
+			continue
+		change = (now['value'] - before['value']) / before['value']
+		worse = change > threshold if now.get('better', 'lower') == 'lower' else change < -threshold
+		regressions += worse
+		flag = '  REGRESSION' if worse else ''
+		lines.append(f'{key:<52} {before["value"]:>12.3f} {now["value"]:>12.3f} {change:>+8.1%}{flag}')
+	return lines, regressions
+
+
+def main(argv):
+	parser = argparse.ArgumentParser(description='SnyIDE headless benchmarks')
+	parser.add_argument('--quick', action='store_true', help='smaller inputs for a fast check')
+	parser.add_argument('--only', help='comma-separated suites: ' + ', '.join(SUITES))
+	parser.add_argument('--output', default='benchmark_results.json')
+	parser.add_argument('--baseline', help='saved results to compare against')
+	parser.add_argument('--results', help='compare these saved results instead of running')
+	parser.add_argument('--threshold', type=float, default=0.15, help='relative change counted as a regression')
+	parser.add_argument('--timeout', type=float, default=300, help='seconds before a single benchmark gives up')
+	parser.add_argument('--console-mb', type=int, default=0, help='console output volume (default 500, 16 with --quick)')
+	parser.add_argument('--workdir', help='where generated files go (kept between runs)')
+	parser.add_argument('--keep', action='store_true', help='keep the temporary work directory')
+	args = parser.parse_args(argv)
+
+	if args.results:
+		with open(args.results, 'r', encoding='utf-8') as f:
+			current = json.load(f)
+	else:
+		current = run(args)
+		with open(args.output, 'w', encoding='utf-8') as f:
+			json.dump(current, f, indent=2)
+		print(f'wrote {args.output}')
+	if not args.baseline:
+		for key, value in sorted(current['results'].items()):
+			print(f'{key:<52} {value["value"]:>12.3f} {value["unit"]}')
+		return 0
+	with open(args.baseline, 'r', encoding='utf-8') as f:
+		baseline = json.load(f)
+	lines, regressions = compare(current, baseline, args.threshold)
+	print('\n'.join(lines))
+	print(f'{regressions} regression(s) beyond {args.threshold:.0%}')
+	return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,154 @@
+import re
+
+from PySide6.QtGui import QTextBlockUserData
+
+OPEN_TO_CLOSE = {'(': ')', '[': ']', '{': '}'}
+CLOSE_TO_OPEN = {v: k for k, v in OPEN_TO_CLOSE.items()}
+
+# Strings and comments are matched (and skipped) before single brackets
+TOKEN_RE = re.compile(r'#.*|"""|\'\'\'|"(?:\\.|[^"\\])*"?|\'(?:\\.|[^\'\\])*\'?|[()\[\]{}]')
+
+# Block state values carried between blocks by the highlighter
+STATE_NONE = 0
+STATE_TRIPLE_DOUBLE = 1
+STATE_TRIPLE_SINGLE = 2
+_STATE_QUOTES = {STATE_TRIPLE_DOUBLE: '"""', STATE_TRIPLE_SINGLE: "'''"}
+_QUOTE_STATES = {v: k for k, v in _STATE_QUOTES.items()}
+
+
+class BlockData(QTextBlockUserData):
+	# Per-block structure cache filled by the highlighter. `brackets` lists
+	# (column, char) outside strings and comments; `stats` holds, per opening
+	# bracket type, (delta, forward_min, backward_min) so a partner search can
+	# step over whole blocks that cannot contain the match. `indent` is the
+	# leading whitespace width in columns (tab = 4) and `blank` marks
+	# whitespace-only blocks; painting and folding reuse both. `spans` lists
+	# the highlighter's (start, length, rgba) token colors for the minimap.
+	# `long_line` marks a block over the highlighter's length limit, of which
+	# only the head was processed.
+	def __init__(self, brackets, indent=0, blank=False):
+		super().__init__()
+		self.brackets = brackets
+		self.indent = indent
+		self.blank = blank
+		self.spans = []
+		self.long_line = False
+		self.stats = {}
+		for opener, closer in OPEN_TO_CLOSE.items():
+			running = 0
+			forward_min = 0
+			for _col, ch in brackets:
+				if ch == opener:
+					running += 1
+				elif ch == closer:
+					running -= 1
+				else:
+					continue
+				forward_min = min(forward_min, running)
+			back = 0
+			backward_min = 0
+			for _col, ch in reversed(brackets):
+				if ch == closer:
+					back += 1
+				elif ch == opener:
+					back -= 1
+				else:
+					continue
+				backward_min = min(backward_min, back)
+			if running or forward_min or backward_min:
+				self.stats[opener] = (running, forward_min, backward_min)
+
+
+def scan_brackets(text, state=STATE_NONE):
+	# Returns (brackets, end_state) for one block, skipping strings and comments
+	brackets = []
+	quote = _STATE_QUOTES.get(state)
+	pos = 0
+	n = len(text)
+	while pos < n:
+		if quote:
+			end = text.find(quote, pos)
+			if end < 0:
+				return brackets, _QUOTE_STATES[quote]
+			pos = end + 3
+			quote = None
+			continue
+		m = TOKEN_RE.search(text, pos)
+		if m is None:
+			break
+		token = m.group()
+		if token in _QUOTE_STATES:
+			quote = token
+		elif token in OPEN_TO_CLOSE or token in CLOSE_TO_OPEN:
+			brackets.append((m.start(), token))
+		pos = m.end()
+	return brackets, (_QUOTE_STATES[quote] if quote else STATE_NONE)
+
+
+def measure_indent(text):
+	# (indent in columns, is_blank) for one line
+	stripped = text.lstrip(' \t')
+	lead = text[:len(text) - len(stripped)]
+	return lead.count(' ') + 4 * lead.count('\t'), not stripped
+
+
+def block_data(block):
+	# Cached data for a block, computed on demand if the highlighter skipped it
+	data = block.userData()
+	if isinstance(data, BlockData):
+		return data
+	prev = block.previous()
+	state = prev.userState() if prev.isValid() else STATE_NONE
+	text = block.text()
+	brackets, _state = scan_brackets(text, max(state, STATE_NONE) & 3)
+	return BlockData(brackets, *measure_indent(text))
+
+
+def find_matching_bracket(block, col):
+	# (block, column) of the partner of the bracket at `col`, or None. Cost is
+	# proportional to the distance between the pair, not the document size.
+	data = block_data(block)
+	ch = None
+	for c, b in data.brackets:
+		if c == col:
+			ch = b
+			break
+	if ch is None:
+		return None
+	if ch in OPEN_TO_CLOSE:
+		opener, closer, step = ch, OPEN_TO_CLOSE[ch], 1
+	else:
+		opener, closer, step = CLOSE_TO_OPEN[ch], ch, -1
+	own = ch
+	depth = 0
+
+	def scan(brackets):
+		nonlocal depth
+		for c, b in brackets:
+			if b == own:
+				depth += 1
+			elif b == opener or b == closer:
+				depth -= 1
+				if depth == 0:
+					return c
+		return None
+
+	if step == 1:
+		found = scan([item for item in data.brackets if item[0] >= col])
+	else:
+		found = scan([item for item in reversed(data.brackets) if item[0] <= col])
+	if found is not None:
+		return block, found
+	blk = block.next() if step == 1 else block.previous()
+	while blk.isValid():
+		d = block_data(blk)
+		stats = d.stats.get(opener)
+		if stats is not None:
+			delta, forward_min, backward_min = stats
+			reach = forward_min if step == 1 else backward_min
+			if depth + reach <= 0:
+				# The running depth hits zero inside this block
+				return blk, scan(d.brackets if step == 1 else list(reversed(d.brackets)))
+			depth += delta if step == 1 else -delta
+		blk = blk.next() if step == 1 else blk.previous()
+	return None
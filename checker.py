@@ -0,0 +1,119 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+import lint
+
+_pool = None
+
+
+def _executor():
+	# One shared worker process for every document; 'spawn' keeps Qt state out of it
+	global _pool
+	if _pool is None:
+		_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+	return _pool
+
+
+def shutdown():
+	global _pool
+	if _pool is not None:
+		_pool.shutdown(wait=False, cancel_futures=True)
+		_pool = None
+
+
+class DocumentChecker(QObject):
+	# Runs lint.check_source on a snapshot of the document once typing pauses.
+	# At most one job per document is in flight; edits made meanwhile are
+	# coalesced into a single follow-up job and results from older snapshots
+	# are dropped. The GUI thread only ever takes the snapshot.
+	diagnosticsChanged = Signal()
+	_result = Signal(int, object)  # generation, future (emitted from the pool's thread)
+
+	PYTHON_SUFFIXES = ('.py', '.pyw')
+
+	def __init__(self, document, delay_ms=500, parent=None):
+		super().__init__(parent)
+		self.document = None
+		self.filename = None
+		self.enabled = True
+		self.diagnostics = {}  # block number -> [(col, end_col, severity, message)]
+		self.generation = 0
+		self._future = None
+		self._queued = False
+		self._timer = QTimer(self)
+		self._timer.setSingleShot(True)
+		self._timer.setInterval(delay_ms)
+		self._timer.timeout.connect(self._submit)
+		self._result.connect(self._on_result)
+		self.attach(document)
+
+	def attach(self, document):
+		if self.document is not None:
+			try:
+				self.document.contentsChanged.disconnect(self.schedule)
+			except (RuntimeError, TypeError):
+				pass
+		self.document = document
+		self._timer.stop()
+		self.generation += 1  # anything in flight belongs to the old document
+		if self.diagnostics:
+			self.diagnostics = {}
+			self.diagnosticsChanged.emit()
+		if document is not None:
+			document.contentsChanged.connect(self.schedule)
+			self.schedule()
+
+	def set_filename(self, path):
+		self.filename = path
+		self.enabled = path is None or path.lower().endswith(self.PYTHON_SUFFIXES)
+		if not self.enabled and self.diagnostics:
+			self.diagnostics = {}
+			self.diagnosticsChanged.emit()
+		self.schedule()
+
+	def set_delay(self, delay_ms):
+		self._timer.setInterval(delay_ms)
+
+	def schedule(self):
+		if self.enabled and self.document is not None:
+			self.generation += 1
+			self._timer.start()
+
+	def _submit(self):
+		if self.document is None or not self.enabled:
+			return
+		if self._future is not None:
+			# Let the running job finish; its result is stale and a fresh
+			# snapshot is submitted when it returns
+			self._queued = True
+			return
+		self._queued = False
+		generation = self.generation
+		source = self.document.toPlainText()
+		name = os.path.basename(self.filename) if self.filename else '<untitled>'
+		try:
+			self._future = _executor().submit(lint.check_source, source, name)
+		except RuntimeError:
+			self._future = None  # pool shut down (application closing)
+			return
+		self._future.add_done_callback(lambda f, g=generation: self._result.emit(g, f))
+
+	def _on_result(self, generation, future):
+		if future is self._future:
+			self._future = None
+		if self._queued:
+			self._submit()
+		if generation != self.generation or future.cancelled():
+			return
+		try:
+			results = future.result()
+		except Exception:
+			return  # worker died; the next edit retries
+		diagnostics = {}
+		for line, col, end_col, severity, message in results:
+			diagnostics.setdefault(line - 1, []).append((col, end_col, severity, message))
+		self.diagnostics = diagnostics
+		self.diagnosticsChanged.emit()
@@ -1,17 +1,305 @@
+import codecs
 import os
+import re
 import shutil
-from PySide6.QtCore import QProcess, QByteArray, Qt, Slot, QEvent
-from PySide6.QtGui import QTextCursor
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit
+import signal
+import subprocess
+import sys
+from PySide6.QtCore import QObject, QProcess, QByteArray, Qt, Slot, QEvent, QTimer, QSocketNotifier, Signal
+from PySide6.QtGui import QTextCursor, QKeySequence, QGuiApplication
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QPlainTextEdit, QTabWidget, QToolButton
+
+if sys.platform.startswith('linux'):
+    import fcntl
+    import pty
+    import struct
+    import termios
+
+
+def detect_shell():
+    if os.name == 'nt':
+        for exe in ("pwsh.exe", "powershell.exe", "cmd.exe"):
+            path = shutil.which(exe)
+            if path:
+                return path
+        return "cmd.exe"
+    # Unix-like fallback
+    for exe in ("bash", "zsh", "fish", "sh"):
+        path = shutil.which(exe)
+        if path:
+            return path
+    return "sh"
+
+
+def shell_command():
+    shell = detect_shell()
+    if os.name == 'nt':
+        if shell.lower().endswith(('pwsh.exe', 'powershell.exe')):
+            return shell, ['-NoLogo']
+        return shell, ['/K']  # keep cmd.exe open
+    return shell, ['-i']  # interactive
+
+
+def pty_available():
+    return sys.platform.startswith('linux')
+
+
+# Runs in the new session before the shell replaces it: makes the terminal
+# the session's controlling TTY (job control, Ctrl+C). A separate program
+# rather than a preexec_fn, which is not safe in a process with threads.
+TTY_EXEC = 'import fcntl, os, sys, termios; fcntl.ioctl(0, termios.TIOCSCTTY, 0); os.execvp(sys.argv[1], sys.argv[1:])'
+
+
+class PtyProcess(QObject):
+    # A shell on a pseudo-terminal instead of pipes, with the part of the
+    # QProcess interface the console and the pool use. Programs see a TTY,
+    # so they line-buffer (or don't buffer) their output, and the kernel's
+    # line discipline handles echo and signals such as Ctrl+C.
+    readyReadStandardOutput = Signal()
+    started = Signal()
+    finished = Signal(int, QProcess.ExitStatus)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.popen = None
+        self.master = None
+        self._buffer = bytearray()
+        self._pending = bytearray()
+        self._read_notifier = None
+        self._write_notifier = None
+        self._reaper = QTimer(self)
+        self._reaper.setInterval(50)
+        self._reaper.timeout.connect(self._poll_exit)
+        self._workdir = None
+
+    def setWorkingDirectory(self, cwd):
+        self._workdir = cwd
+
+    def setProcessChannelMode(self, _mode):
+        pass  # a terminal has one output stream
+
+    def start(self, program, args):
+        master, slave = pty.openpty()
+        env = dict(os.environ, TERM='dumb')
+        try:
+            self.popen = subprocess.Popen(
+                [sys.executable, '-I', '-S', '-c', TTY_EXEC, program] + list(args), cwd=self._workdir, env=env,
+                stdin=slave, stdout=slave, stderr=slave, start_new_session=True)
+        except OSError:
+            os.close(master)
+            return
+        finally:
+            os.close(slave)
+        self.master = master
+        os.set_blocking(master, False)
+        self._read_notifier = QSocketNotifier(master, QSocketNotifier.Read, self)
+        self._read_notifier.activated.connect(self._on_readable)
+        self._write_notifier = QSocketNotifier(master, QSocketNotifier.Write, self)
+        self._write_notifier.setEnabled(False)
+        self._write_notifier.activated.connect(self._flush_pending)
+        QTimer.singleShot(0, self.started.emit)
+
+    def state(self):
+        if self.popen is None or self.popen.returncode is not None:
+            return QProcess.NotRunning
+        return QProcess.Running
+
+    def processId(self):
+        return self.popen.pid if self.popen is not None else 0
+
+    def readAllStandardOutput(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def write(self, data):
+        if self.master is None:
+            return -1
+        self._pending += bytes(data)
+        self._flush_pending()
+        return len(data)
+
+    def waitForBytesWritten(self, _msecs=0):
+        return True
+
+    def set_window_size(self, rows, cols):
+        if self.master is not None:
+            try:
+                fcntl.ioctl(self.master, termios.TIOCSWINSZ, struct.pack('HHHH', rows, cols, 0, 0))
+            except OSError:
+                pass
+
+    def kill(self):
+        if self.state() == QProcess.Running:
+            try:
+                os.killpg(self.popen.pid, signal.SIGKILL)
+            except OSError:
+                pass
+            self._reaper.start()
+
+    def waitForFinished(self, msecs=30000):
+        if self.popen is None:
+            return True
+        try:
+            self.popen.wait(msecs / 1000)
+        except subprocess.TimeoutExpired:
+            return False
+        self._poll_exit()
+        return True
+
+    def _flush_pending(self, *_):
+        while self._pending:
+            try:
+                written = os.write(self.master, self._pending)
+            except BlockingIOError:
+                break
+            except OSError:
+                self._pending.clear()
+                break
+            del self._pending[:written]
+        # Wait for room in the terminal's input queue rather than blocking
+        self._write_notifier.setEnabled(bool(self._pending))
+
+    def _on_readable(self, *_):
+        try:
+            while True:
+                chunk = os.read(self.master, 65536)
+                if not chunk:
+                    break
+                self._buffer += chunk
+        except BlockingIOError:
+            pass
+        except OSError:
+            # EIO: every process holding the terminal has gone
+            self._read_notifier.setEnabled(False)
+            self._reaper.start()
+        if self._buffer:
+            self.readyReadStandardOutput.emit()
+
+    def _poll_exit(self):
+        if self.popen is None or self.popen.poll() is None:
+            return
+        self._reaper.stop()
+        if self.master is not None:
+            self._read_notifier.setEnabled(False)
+            self._write_notifier.setEnabled(False)
+            os.close(self.master)
+            self.master = None
+            code = self.popen.returncode
+            status = QProcess.CrashExit if code < 0 else QProcess.NormalExit
+            self.finished.emit(code, status)
+
+
+class ShellPool(QObject):
+    # Interactive shells started ahead of time, so a console (re)start takes
+    # one that has already read its rc files. Retired shells are killed
+    # without waiting; they are deleted once they have actually exited.
+    def __init__(self, cwd, size=1, parent=None, use_pty=None):
+        super().__init__(parent)
+        self.cwd = os.path.abspath(cwd)
+        self.size = size
+        self.use_pty = pty_available() if use_pty is None else use_pty and pty_available()
+        self._spares = []      # (cwd, QProcess)
+        self._retiring = set()
+        self._refill_timer = QTimer(self)
+        self._refill_timer.setSingleShot(True)
+        self._refill_timer.timeout.connect(self._refill)
+        self._refill_timer.start(0)
+
+    def set_cwd(self, cwd):
+        self.cwd = os.path.abspath(cwd)
+        for spare in [spare for spare in self._spares if spare[0] != self.cwd]:
+            self._spares.remove(spare)
+            self.reap(spare[1])
+        self._refill_timer.start(0)
+
+    def acquire(self, cwd):
+        cwd = os.path.abspath(cwd)
+        proc = None
+        for spare in self._spares:
+            if spare[0] == cwd and spare[1].state() != QProcess.NotRunning:
+                self._spares.remove(spare)
+                proc = spare[1]
+                break
+        if proc is None:
+            proc = self._spawn(cwd)
+        # Replace it once the caller is done with this event
+        self._refill_timer.start(0)
+        return proc
+
+    def reap(self, proc):
+        proc.setParent(self)
+        if proc.state() == QProcess.NotRunning:
+            proc.deleteLater()
+            return
+        self._retiring.add(proc)
+        proc.finished.connect(lambda *_: self._retired(proc))
+        proc.kill()
+
+    def shutdown(self):
+        # Application exit: killed shells go quickly, so waiting is cheap here
+        self._refill_timer.stop()
+        while self._spares:
+            self.reap(self._spares.pop()[1])
+        for proc in list(self._retiring):
+            proc.waitForFinished(500)
+
+    def _retired(self, proc):
+        self._retiring.discard(proc)
+        proc.deleteLater()
+
+    def set_use_pty(self, use_pty):
+        # Applies to shells started from now on
+        use_pty = bool(use_pty) and pty_available()
+        if use_pty != self.use_pty:
+            self.use_pty = use_pty
+            while self._spares:
+                self.reap(self._spares.pop()[1])
+            self._refill_timer.start(0)
+
+    def _spawn(self, cwd):
+        proc = PtyProcess(self) if self.use_pty else QProcess(self)
+        proc.setWorkingDirectory(cwd)
+        proc.setProcessChannelMode(QProcess.MergedChannels)
+        program, args = shell_command()
+        proc.start(program, args)
+        return proc
+
+    def _refill(self):
+        self._spares = [spare for spare in self._spares if spare[1].state() != QProcess.NotRunning]
+        while len(self._spares) < self.size:
+            self._spares.append((self.cwd, self._spawn(self.cwd)))
+
+
+# Complete escape sequences: CSI, OSC (BEL or ST terminated), charset
+# selection, and any other two-character escape
+ESCAPE_RE = re.compile(r'\x1b\[([0-9;?]*)[ -/]*([@-~])|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[()][0-9A-Za-z]|\x1b[^\[\]()]')
+TERMINAL_RE = re.compile(ESCAPE_RE.pattern + r'|\r\n|[\r\n\b\x07]|[^\x1b\r\n\b\x07]+')
+
+# Keys a terminal sends as escape sequences
+PTY_KEYS = {
+    Qt.Key_Return: b'\r', Qt.Key_Enter: b'\r', Qt.Key_Backspace: b'\x7f', Qt.Key_Tab: b'\t',
+    Qt.Key_Escape: b'\x1b', Qt.Key_Up: b'\x1b[A', Qt.Key_Down: b'\x1b[B', Qt.Key_Right: b'\x1b[C',
+    Qt.Key_Left: b'\x1b[D', Qt.Key_Home: b'\x1b[H', Qt.Key_End: b'\x1b[F', Qt.Key_Delete: b'\x1b[3~',
+}
+
 
 class ConsoleWidget(QWidget):
-    def __init__(self, cwd=None, parent=None):
+    def __init__(self, cwd=None, parent=None, pool=None):
         super().__init__(parent)
         self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.pool = pool if pool is not None else ShellPool(self.cwd, parent=self)
         self.proc = None
         self.history = []
         self.history_index = -1
         self.input_start_pos = 0
+        # While set, entered lines go to this callable instead of the shell
+        self.input_sink = None
+        # Terminal state for PTY output: the last line and the cursor column in it
+        self._line = ''
+        self._col = 0
+        self._escape_tail = ''
+        self._decoder = None
 
         self.terminal = QPlainTextEdit(self)
         self.terminal.setObjectName("console")
@@ -27,54 +315,40 @@ class ConsoleWidget(QWidget):
         self.input_start_pos = self._doc_length()
 
     def detect_shell(self):
-        if os.name == 'nt':
-            for exe in ("pwsh.exe", "powershell.exe", "cmd.exe"):
-                path = shutil.which(exe)
-                if path:
-                    return path
-            return "cmd.exe"
-        # Unix-like fallback
-        for exe in ("bash", "zsh", "fish", "sh"):
-            path = shutil.which(exe)
-            if path:
-                return path
-        return "sh"
+        return detect_shell()
 
     def start(self):
+        # Takes an already running shell from the pool; nothing here waits
         self.stop()
-        self.proc = QProcess(self)
-        self.proc.setWorkingDirectory(self.cwd)
-        self.proc.setProcessChannelMode(QProcess.MergedChannels)
+        self.proc = self.pool.acquire(self.cwd)
+        self.proc.setParent(self)
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._escape_tail = ''
+        self._update_window_size()
         self.proc.readyReadStandardOutput.connect(self._on_ready_read)
-        self.proc.readyReadStandardError.connect(self._on_ready_read)
-        self.proc.started.connect(lambda: self._append_text(f"[shell started in {self.cwd}]\n"))
-        self.proc.finished.connect(lambda code, status: self._append_text(f"\n[shell exited {code}]\n"))
-
-        shell = self.detect_shell()
-        if os.name == 'nt':
-            if shell.lower().endswith('pwsh.exe'):
-                program = shell
-                args = ['-NoLogo']
-            elif shell.lower().endswith('powershell.exe'):
-                program = shell
-                args = ['-NoLogo']
-            else:
-                program = shell
-                args = ['/K']  # keep cmd.exe open
-        else:
-            program = shell
-            args = ['-i']  # interactive
-
-        self.proc.start(program, args)
+        self.proc.finished.connect(self._on_finished)
+        self.proc.started.connect(self._on_started)
+        if self.proc.state() == QProcess.Running:
+            self._on_started()
+        # Whatever the shell printed while it waited in the pool
+        self._on_ready_read()
 
     def stop(self):
         if self.proc is not None:
-            try:
-                self.proc.kill()
-                self.proc.waitForFinished(1000)
-            except Exception:
-                pass
-            self.proc = None
+            proc, self.proc = self.proc, None
+            for notifier, slot in ((proc.readyReadStandardOutput, self._on_ready_read),
+                                   (proc.finished, self._on_finished), (proc.started, self._on_started)):
+                try:
+                    notifier.disconnect(slot)
+                except (RuntimeError, TypeError):
+                    pass
+            self.pool.reap(proc)
+
+    def _on_started(self):
+        self._append_text(f"[shell started in {self.cwd}]\n")
+
+    def _on_finished(self, code, _status):
+        self._append_text(f"\n[shell exited {code}]\n")
 
     def restart(self):
         self.start()
@@ -82,12 +356,30 @@ class ConsoleWidget(QWidget):
     def clear(self):
         self.terminal.clear()
         self.input_start_pos = 0
+        self._line = ''
+        self._col = 0
+
+    def is_pty(self):
+        return isinstance(self.proc, PtyProcess)
+
+    def _update_window_size(self):
+        # Tell programs on the terminal how many rows/columns they can use
+        if not self.is_pty():
+            return
+        metrics = self.terminal.fontMetrics()
+        viewport = self.terminal.viewport()
+        cols = max(viewport.width() // max(metrics.horizontalAdvance('M'), 1), 20)
+        rows = max(viewport.height() // max(metrics.lineSpacing(), 1), 5)
+        self.proc.set_window_size(rows, cols)
 
     def set_working_directory(self, cwd):
         self.cwd = os.path.abspath(cwd)
         # Restart shell in new directory
         self.restart()
 
+    def write(self, text: str):
+        self._append_text(text)
+
     def _append_text(self, text: str):
         # Preserve current pending input by temporarily removing it
         pending = self._current_input_text()
@@ -100,13 +392,83 @@ class ConsoleWidget(QWidget):
         if pending:
             self.terminal.insertPlainText(pending)
         self._update_input_start()
+        # Terminal output continues on whatever line this left
+        self._line = self.terminal.document().lastBlock().text()
+        self._col = len(self._line)
+
+    def _feed_terminal(self, text: str):
+        # Minimal line-oriented terminal: carriage returns, backspaces and
+        # erase-in-line rewrite the last line (progress bars, readline
+        # redraws); colors and other escape sequences are dropped. Everything
+        # lands in the document with one edit.
+        text = self._escape_tail + text
+        self._escape_tail = ''
+        cut = text.rfind('\x1b')
+        if cut >= 0 and not ESCAPE_RE.match(text, cut):
+            # Sequence split across reads; give up on runaway ones
+            if len(text) - cut < 256:
+                self._escape_tail = text[cut:]
+            text = text[:cut]
+        line, col = self._line, self._col
+        committed = []
+        clear_screen = False
+        for m in TERMINAL_RE.finditer(text):
+            token = m.group(0)
+            if token[0] == '\x1b':
+                final = m.group(2)
+                if final is None:
+                    continue
+                params = m.group(1)
+                n = int(params) if params.isdigit() else 0
+                if final == 'K':
+                    line = line[:col] if n == 0 else (' ' * col + line[col:] if n == 1 else '')
+                elif final == 'C':
+                    col += max(n, 1)
+                elif final == 'D':
+                    col = max(col - max(n, 1), 0)
+                elif final == 'G':
+                    col = max(n - 1, 0)
+                elif final == 'P':
+                    line = line[:col] + line[col + max(n, 1):]
+                elif final == '@':
+                    line = line[:col] + ' ' * max(n, 1) + line[col:]
+                elif final == 'J' and n >= 2:
+                    clear_screen = True
+                    committed = []
+                    line, col = '', 0
+            elif token in ('\r\n', '\n'):
+                committed.append(line)
+                line, col = '', 0
+            elif token == '\r':
+                col = 0
+            elif token == '\b':
+                col = max(col - 1, 0)
+            elif token != '\x07':
+                if col > len(line):
+                    line += ' ' * (col - len(line))
+                line = line[:col] + token + line[col + len(token):]
+                col += len(token)
+        self._line, self._col = line, col
+        if clear_screen:
+            self.terminal.clear()
+        cursor = QTextCursor(self.terminal.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(''.join(l + '\n' for l in committed) + line)
+        cursor.movePosition(QTextCursor.StartOfBlock)
+        cursor.movePosition(QTextCursor.Right, n=min(col, len(line)))
+        self.terminal.setTextCursor(cursor)
+        self.terminal.ensureCursorVisible()
+        self._update_input_start()
 
     @Slot()
     def _on_ready_read(self):
         if not self.proc:
             return
         data = bytes(self.proc.readAllStandardOutput())
-        if data:
+        if data and self.is_pty():
+            self._feed_terminal(self._decoder.decode(data))
+        elif data:
             try:
                 s = data.decode('utf-8', errors='ignore')
             except Exception:
@@ -116,9 +478,13 @@ class ConsoleWidget(QWidget):
     def eventFilter(self, obj, event):
         if obj is self.terminal and event.type() == QEvent.KeyPress:
             return self._handle_key_press(event)
+        if obj is self.terminal and event.type() == QEvent.Resize:
+            self._update_window_size()
         return super().eventFilter(obj, event)
 
     def _handle_key_press(self, event):
+        if self.is_pty() and self.input_sink is None:
+            return self._send_key_to_pty(event)
         key = event.key()
         cursor = self.terminal.textCursor()
         # Prevent editing before input_start_pos
@@ -157,9 +523,33 @@ class ConsoleWidget(QWidget):
             self.terminal.setTextCursor(cursor)
         return False
 
+    def _send_key_to_pty(self, event):
+        # The terminal's line discipline (and the shell's readline) echo and
+        # edit the input, so keys go to it as a terminal would send them
+        key = event.key()
+        if event.matches(QKeySequence.Copy) and self.terminal.textCursor().hasSelection():
+            return False
+        if key in (Qt.Key_PageUp, Qt.Key_PageDown):
+            return False
+        if event.matches(QKeySequence.Paste):
+            text = QGuiApplication.clipboard().text().replace('\r\n', '\n').replace('\n', '\r')
+            data = text.encode('utf-8')
+        elif event.modifiers() & Qt.ControlModifier and Qt.Key_A <= key <= Qt.Key_Z:
+            data = bytes([key - Qt.Key_A + 1])
+        elif key in PTY_KEYS:
+            data = PTY_KEYS[key]
+        else:
+            data = event.text().encode('utf-8')
+        if data:
+            self.proc.write(data)
+        return True
+
     def _send_command(self, cmd: str):
         if cmd is None:
             cmd = ""
+        if self.input_sink is not None:
+            self.input_sink(cmd + "\n")
+            return
         if os.name == 'nt':
             data = (cmd + "\r\n").encode('utf-8', errors='ignore')
         else:
@@ -179,7 +569,8 @@ class ConsoleWidget(QWidget):
         self.terminal.setTextCursor(cursor)
 
     def _doc_length(self):
-        return len(self.terminal.toPlainText())
+        # Same as len(toPlainText()) without copying the whole scrollback
+        return self.terminal.document().characterCount() - 1
 
     def _current_input_text(self) -> str:
         text = self.terminal.toPlainText()
@@ -201,3 +592,57 @@ class ConsoleWidget(QWidget):
             self.stop()
         finally:
             super().closeEvent(event)
+
+
+class TerminalTabs(QTabWidget):
+    # Several consoles sharing one shell pool; new tabs start instantly
+    def __init__(self, cwd=None, parent=None):
+        super().__init__(parent)
+        self.setObjectName("terminalTabs")
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.pool = ShellPool(self.cwd, size=1, parent=self)
+        self.setTabsClosable(True)
+        self.setDocumentMode(True)
+        self.tabCloseRequested.connect(self.close_terminal)
+        add = QToolButton(self)
+        add.setText("+")
+        add.setToolTip("New Terminal")
+        add.clicked.connect(self.new_terminal)
+        self.setCornerWidget(add, Qt.TopRightCorner)
+        self._counter = 0
+        self.new_terminal()
+
+    def consoles(self):
+        return [self.widget(i) for i in range(self.count())]
+
+    def current_console(self):
+        return self.currentWidget()
+
+    def new_terminal(self):
+        self._counter += 1
+        console = ConsoleWidget(cwd=self.cwd, parent=self, pool=self.pool)
+        index = self.addTab(console, f"Terminal {self._counter}")
+        self.setCurrentIndex(index)
+        console.terminal.setFocus()
+        return console
+
+    def close_terminal(self, index):
+        console = self.widget(index)
+        if console is None:
+            return
+        self.removeTab(index)
+        console.stop()
+        console.deleteLater()
+        if not self.count():
+            self.new_terminal()
+
+    def set_working_directory(self, cwd):
+        self.cwd = os.path.abspath(cwd)
+        self.pool.set_cwd(self.cwd)
+        for console in self.consoles():
+            console.set_working_directory(self.cwd)
+
+    def shutdown(self):
+        for console in self.consoles():
+            console.stop()
+        self.pool.shutdown()
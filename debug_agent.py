@@ -0,0 +1,300 @@
+import json
+import os
+import queue
+import socket
+import sys
+import threading
+import traceback
+import types
+
+# Runs a script under the IDE's debugger: `python debug_agent.py --port N script.py [args]`.
+# Stdlib only, since it runs in whatever interpreter the project uses.
+# Messages are newline-delimited JSON over a socket to 127.0.0.1:N.
+#
+# On Python 3.12+ breakpoints use sys.monitoring. PY_START switches LINE
+# events on only for code objects that contain a breakpoint, and every
+# other line location is disabled after its first hit, so the script runs
+# at close to full speed until a breakpoint is reached. Older interpreters
+# fall back to sys.settrace, tracing only frames of files with breakpoints.
+
+AGENT_FILE = os.path.normcase(os.path.abspath(__file__))
+MAX_VARIABLES = 300
+MAX_REPR = 200
+
+
+def _canonical(path):
+	return os.path.normcase(os.path.abspath(path))
+
+
+def _safe_repr(value):
+	try:
+		text = repr(value)
+	except Exception as e:
+		text = f'<repr failed: {type(e).__name__}>'
+	return text if len(text) <= MAX_REPR else text[:MAX_REPR - 3] + '...'
+
+
+def _variables(frame):
+	names = []
+	for scope, mapping in (('local', frame.f_locals), ('global', frame.f_globals)):
+		if scope == 'global' and frame.f_globals is frame.f_locals:
+			continue
+		for name, value in list(mapping.items()):
+			if name.startswith('__') or isinstance(value, types.ModuleType):
+				continue
+			names.append({'name': name, 'scope': scope, 'type': type(value).__name__, 'value': _safe_repr(value)})
+			if len(names) >= MAX_VARIABLES:
+				return names
+	return names
+
+
+class Agent:
+	def __init__(self, port):
+		self.sock = socket.create_connection(('127.0.0.1', port))
+		self.reader = self.sock.makefile('r', encoding='utf-8')
+		self.write_lock = threading.Lock()
+		self.breakpoints = {}     # canonical path -> set of line numbers
+		self.commands = queue.Queue()
+		self.step = None          # None, or (mode, frame, depth) while stepping
+		self.main_thread = threading.get_ident()
+		self.use_monitoring = hasattr(sys, 'monitoring')
+		self.tool = None
+
+	def send(self, message):
+		data = (json.dumps(message) + '\n').encode('utf-8')
+		with self.write_lock:
+			try:
+				self.sock.sendall(data)
+			except OSError:
+				pass
+
+	# ---------- IDE messages ----------
+
+	def read_loop(self):
+		# Breakpoint changes apply while the script runs; control commands are
+		# queued for the paused main thread
+		for line in self.reader:
+			try:
+				message = json.loads(line)
+			except ValueError:
+				continue
+			cmd = message.get('cmd')
+			if cmd == 'set_breakpoints':
+				self.set_breakpoints(message['file'], message['lines'])
+			elif cmd == 'stop':
+				os._exit(1)
+			else:
+				self.commands.put(message)
+		# IDE went away: let the script finish undisturbed
+		self.breakpoints = {}
+		self.step = None
+		self.commands.put({'cmd': 'continue'})
+
+	def set_breakpoints(self, path, lines):
+		path = _canonical(path)
+		breakpoints = dict(self.breakpoints)
+		if lines:
+			breakpoints[path] = set(lines)
+		else:
+			breakpoints.pop(path, None)
+		self.breakpoints = breakpoints
+		if self.use_monitoring and self.tool is not None:
+			# Re-evaluate code objects that were switched off, including the
+			# ones already running
+			sys.monitoring.restart_events()
+			for frame in sys._current_frames().values():
+				while frame is not None:
+					self._watch_code(frame.f_code)
+					frame = frame.f_back
+
+	# ---------- Hooks ----------
+
+	def install(self):
+		if self.use_monitoring:
+			mon = sys.monitoring
+			self.tool = mon.DEBUGGER_ID
+			mon.use_tool_id(self.tool, 'snyide-debugger')
+			mon.register_callback(self.tool, mon.events.PY_START, self._on_py_start)
+			mon.register_callback(self.tool, mon.events.LINE, self._on_monitor_line)
+			mon.set_events(self.tool, mon.events.PY_START)
+		else:
+			sys.settrace(self._trace_call)
+
+	def uninstall(self):
+		if self.use_monitoring:
+			mon = sys.monitoring
+			mon.set_events(self.tool, 0)
+			mon.register_callback(self.tool, mon.events.PY_START, None)
+			mon.register_callback(self.tool, mon.events.LINE, None)
+			mon.free_tool_id(self.tool)
+		else:
+			sys.settrace(None)
+
+	def _code_has_breakpoint(self, code):
+		lines = self.breakpoints.get(_canonical(code.co_filename))
+		if not lines:
+			return False
+		return any(line in lines for _start, _end, line in code.co_lines())
+
+	def _watch_code(self, code):
+		if self._code_has_breakpoint(code):
+			sys.monitoring.set_local_events(self.tool, code, sys.monitoring.events.LINE)
+			return True
+		return False
+
+	def _on_py_start(self, code, _offset):
+		if self.step is not None or self._watch_code(code):
+			return None
+		return sys.monitoring.DISABLE
+
+	def _on_monitor_line(self, code, line):
+		if threading.get_ident() != self.main_thread:
+			return None
+		frame = sys._getframe(1)
+		if self._should_stop(frame, line):
+			self.pause(frame, 'step' if self.step is not None else 'breakpoint')
+			return None
+		if self.step is None:
+			lines = self.breakpoints.get(_canonical(code.co_filename))
+			if not lines or line not in lines:
+				return sys.monitoring.DISABLE
+		return None
+
+	def _trace_call(self, frame, event, _arg):
+		if self.step is not None or self.breakpoints.get(_canonical(frame.f_code.co_filename)):
+			return self._trace_line
+		return None
+
+	def _trace_line(self, frame, event, _arg):
+		if event == 'line' and self._should_stop(frame, frame.f_lineno):
+			self.pause(frame, 'step' if self.step is not None else 'breakpoint')
+		if self.step is None and not self.breakpoints.get(_canonical(frame.f_code.co_filename)):
+			# Stop tracing this frame (returning None alone keeps the old tracer)
+			frame.f_trace = None
+			return None
+		return self._trace_line
+
+	# ---------- Stopping ----------
+
+	def _is_user_frame(self, frame):
+		filename = frame.f_code.co_filename
+		return not filename.startswith('<') and _canonical(filename) != AGENT_FILE
+
+	def _should_stop(self, frame, line):
+		if not self._is_user_frame(frame):
+			return False
+		lines = self.breakpoints.get(_canonical(frame.f_code.co_filename))
+		if lines and line in lines:
+			return True
+		if self.step is None:
+			return False
+		mode, start_frame, start_depth = self.step
+		if mode == 'step_into':
+			return True
+		depth = self._depth(frame)
+		if mode == 'step_over':
+			return frame is start_frame or depth < start_depth
+		return depth < start_depth  # step_out
+
+	def _depth(self, frame):
+		depth = 0
+		while frame is not None:
+			depth += 1
+			frame = frame.f_back
+		return depth
+
+	def _stack(self, frame):
+		frames = []
+		while frame is not None:
+			if self._is_user_frame(frame):
+				frames.append(frame)
+			frame = frame.f_back
+		return frames
+
+	def pause(self, frame, reason):
+		self.step = None
+		if self.use_monitoring:
+			sys.monitoring.set_events(self.tool, sys.monitoring.events.PY_START)
+		frames = self._stack(frame)
+		# Output printed so far should be visible before the IDE shows the stop
+		for stream in (sys.stdout, sys.stderr):
+			try:
+				stream.flush()
+			except (AttributeError, OSError, ValueError):
+				pass
+		self.send({
+			'event': 'stopped',
+			'reason': reason,
+			'stack': [{'name': f.f_code.co_name, 'file': os.path.abspath(f.f_code.co_filename), 'line': f.f_lineno} for f in frames],
+			'variables': _variables(frame),
+		})
+		while True:
+			message = self.commands.get()
+			cmd = message.get('cmd')
+			if cmd == 'frame':
+				index = message.get('index', 0)
+				if 0 <= index < len(frames):
+					self.send({'event': 'variables', 'index': index, 'variables': _variables(frames[index])})
+			elif cmd in ('step_over', 'step_into', 'step_out'):
+				self.step = (cmd, frame, self._depth(frame))
+				if self.use_monitoring:
+					# Stepping needs every line again until the next stop
+					sys.monitoring.set_events(self.tool, sys.monitoring.events.PY_START | sys.monitoring.events.LINE)
+					sys.monitoring.restart_events()
+				else:
+					# Callers entered before stepping began have no line tracer yet
+					f = frame
+					while f is not None:
+						f.f_trace = self._trace_line
+						f = f.f_back
+				break
+			elif cmd == 'continue':
+				break
+		self.send({'event': 'running'})
+
+	# ---------- Running the script ----------
+
+	def run(self, path, args):
+		threading.Thread(target=self.read_loop, daemon=True).start()
+		self.send({'event': 'hello', 'pid': os.getpid(), 'monitoring': self.use_monitoring})
+		# Initial breakpoints arrive before the IDE says go
+		while True:
+			message = self.commands.get()
+			if message.get('cmd') in ('run', 'continue'):
+				break
+		path = os.path.abspath(path)
+		with open(path, 'rb') as f:
+			source = f.read()
+		code = compile(source, path, 'exec')
+		module = types.ModuleType('__main__')
+		module.__file__ = path
+		module.__builtins__ = __builtins__
+		sys.modules['__main__'] = module
+		sys.argv = [path] + list(args)
+		sys.path[0] = os.path.dirname(path)
+		self.install()
+		try:
+			exec(code, module.__dict__)
+		except SystemExit:
+			raise
+		except BaseException:
+			# Report like a plain run would, without the agent's own frame
+			etype, value, tb = sys.exc_info()
+			traceback.print_exception(etype, value, tb.tb_next)
+			return 1
+		finally:
+			self.uninstall()
+			self.send({'event': 'finished'})
+		return 0
+
+
+def main(argv):
+	if len(argv) < 3 or argv[0] != '--port':
+		print('usage: debug_agent.py --port N script.py [args...]', file=sys.stderr)
+		return 2
+	agent = Agent(int(argv[1]))
+	return agent.run(argv[2], argv[3:])
+
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,275 @@
+import json
+import os
+
+from PySide6.QtCore import QObject, Signal, Qt
+from PySide6.QtGui import QTextCursor
+from PySide6.QtNetwork import QHostAddress, QTcpServer
+from PySide6.QtWidgets import (
+	QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QSplitter, QListWidget, QListWidgetItem,
+	QTreeWidget, QTreeWidgetItem, QLabel
+)
+
+AGENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'debug_agent.py')
+
+
+class Breakpoints(QObject):
+	# Breakpoint lines of one document, shared by its split views like the
+	# fold state. QTextCursors keep each breakpoint on its line while the
+	# text above it is edited.
+	changed = Signal()
+
+	def __init__(self, document, parent=None):
+		super().__init__(parent)
+		self.document = None
+		self._cursors = []
+		self._detached = []  # line numbers kept while the document is unloaded
+		self.attach(document)
+
+	def attach(self, document):
+		# Lines survive a document swap (tab hibernation) as plain numbers
+		lines = self.lines()
+		self.document = document
+		self._cursors = []
+		self._detached = []
+		if document is None:
+			self._detached = lines
+			return
+		for line in lines:
+			block = document.findBlockByNumber(line - 1)
+			if block.isValid():
+				self._cursors.append(QTextCursor(block))
+
+	def lines(self):
+		# Sorted 1-based line numbers; breakpoints that merged onto one line count once
+		if self.document is None:
+			return list(self._detached)
+		return sorted({cursor.block().blockNumber() + 1 for cursor in self._cursors})
+
+	def has(self, block):
+		return any(cursor.block() == block for cursor in self._cursors)
+
+	def toggle(self, block):
+		kept = [cursor for cursor in self._cursors if cursor.block() != block]
+		if len(kept) == len(self._cursors):
+			kept.append(QTextCursor(block))
+		self._cursors = kept
+		self.changed.emit()
+
+
+class DebugSession(QObject):
+	# IDE end of the debug_agent.py protocol. Listens on a local port; the
+	# agent (started in the console so the script's output shows up there)
+	# connects back, receives the breakpoints and is told to run.
+	started = Signal()
+	stopped = Signal(dict)      # {'reason', 'stack': [...], 'variables': [...]}
+	variables = Signal(int, list)
+	running = Signal()
+	finished = Signal()
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.server = QTcpServer(self)
+		self.server.newConnection.connect(self._on_new_connection)
+		self.socket = None
+		self.paused = False
+		self._buffer = b''
+		self._breakpoints = {}
+
+	def is_active(self):
+		return self.socket is not None or self.server.isListening()
+
+	def command(self, path):
+		# Console command that starts the agent on `path`; listens as a side effect
+		self.stop()
+		if not self.server.listen(QHostAddress.LocalHost, 0):
+			return None
+		return f'python "{AGENT_PATH}" --port {self.server.serverPort()} "{path}"'
+
+	def set_breakpoints(self, path, lines):
+		path = os.path.abspath(path)
+		if lines:
+			self._breakpoints[path] = list(lines)
+		else:
+			self._breakpoints.pop(path, None)
+		self._send({'cmd': 'set_breakpoints', 'file': path, 'lines': list(lines)})
+
+	def replace_breakpoints(self, breakpoints):
+		# {path: [lines]} for every open document
+		for path in set(self._breakpoints) - set(breakpoints):
+			self.set_breakpoints(path, [])
+		for path, lines in breakpoints.items():
+			if self._breakpoints.get(path) != list(lines):
+				self.set_breakpoints(path, lines)
+
+	def resume(self):
+		self._control('continue')
+
+	def step_over(self):
+		self._control('step_over')
+
+	def step_into(self):
+		self._control('step_into')
+
+	def step_out(self):
+		self._control('step_out')
+
+	def select_frame(self, index):
+		if self.paused:
+			self._send({'cmd': 'frame', 'index': index})
+
+	def stop(self):
+		if self.socket is not None:
+			self._send({'cmd': 'stop'})
+			self.socket.flush()
+			self._close()
+		if self.server.isListening():
+			self.server.close()
+
+	def _control(self, cmd):
+		if self.paused:
+			self.paused = False
+			self._send({'cmd': cmd})
+
+	def _send(self, message):
+		if self.socket is not None:
+			self.socket.write((json.dumps(message) + '\n').encode('utf-8'))
+
+	def _on_new_connection(self):
+		socket = self.server.nextPendingConnection()
+		if self.socket is not None:
+			socket.abort()  # one debuggee per session
+			return
+		self.server.close()
+		self.socket = socket
+		socket.readyRead.connect(self._on_ready_read)
+		socket.disconnected.connect(self._close)
+
+	def _on_ready_read(self):
+		self._buffer += bytes(self.socket.readAll())
+		*lines, self._buffer = self._buffer.split(b'\n')
+		for line in lines:
+			try:
+				message = json.loads(line)
+			except ValueError:
+				continue
+			self._handle(message)
+
+	def _handle(self, message):
+		event = message.get('event')
+		if event == 'hello':
+			for path, lines in self._breakpoints.items():
+				self._send({'cmd': 'set_breakpoints', 'file': path, 'lines': lines})
+			self._send({'cmd': 'run'})
+			self.started.emit()
+		elif event == 'stopped':
+			self.paused = True
+			self.stopped.emit(message)
+		elif event == 'variables':
+			self.variables.emit(message.get('index', 0), message.get('variables', []))
+		elif event == 'running':
+			self.paused = False
+			self.running.emit()
+		elif event == 'finished':
+			self._close()
+
+	def _close(self):
+		socket, self.socket = self.socket, None
+		if socket is None:
+			return
+		self.paused = False
+		self._buffer = b''
+		socket.disconnected.disconnect(self._close)
+		socket.close()
+		socket.deleteLater()
+		self.finished.emit()
+
+
+class DebugPanel(QWidget):
+	# Stack and variables of the paused debuggee, plus the stepping buttons
+	frameSelected = Signal(int, str, int)  # index, path, line
+
+	def __init__(self, session, parent=None):
+		super().__init__(parent)
+		self.setObjectName('debugPanel')
+		self.session = session
+		self._stack = []
+
+		layout = QVBoxLayout(self)
+		layout.setContentsMargins(0, 0, 0, 0)
+		layout.setSpacing(2)
+		buttons = QHBoxLayout()
+		buttons.setContentsMargins(6, 3, 6, 3)
+		self.status = QLabel('Not debugging')
+		buttons.addWidget(self.status, 1)
+		self.buttons = []
+		for label, slot in (('Continue', session.resume), ('Step Over', session.step_over),
+							('Step Into', session.step_into), ('Step Out', session.step_out)):
+			button = QPushButton(label)
+			button.setObjectName('debugButton')
+			button.clicked.connect(slot)
+			buttons.addWidget(button)
+			self.buttons.append(button)
+		stop = QPushButton('Stop')
+		stop.setObjectName('debugButton')
+		stop.clicked.connect(session.stop)
+		buttons.addWidget(stop)
+		layout.addLayout(buttons)
+
+		splitter = QSplitter(Qt.Horizontal)
+		self.stack_list = QListWidget()
+		self.stack_list.currentRowChanged.connect(self._on_frame_selected)
+		self.variables_tree = QTreeWidget()
+		self.variables_tree.setHeaderLabels(['Name', 'Type', 'Value'])
+		self.variables_tree.setRootIsDecorated(False)
+		splitter.addWidget(self.stack_list)
+		splitter.addWidget(self.variables_tree)
+		splitter.setStretchFactor(1, 2)
+		layout.addWidget(splitter, 1)
+
+		session.started.connect(lambda: self._set_state('Running'))
+		session.running.connect(lambda: self._set_state('Running'))
+		session.stopped.connect(self._on_stopped)
+		session.variables.connect(self._on_variables)
+		session.finished.connect(lambda: self._set_state('Not debugging'))
+		self._set_state('Not debugging')
+
+	def _set_state(self, text):
+		self.status.setText(text)
+		paused = text == 'Paused'
+		for button in self.buttons:
+			button.setEnabled(paused)
+		if not paused:
+			self._stack = []
+			self.stack_list.clear()
+			self.variables_tree.clear()
+
+	def _on_stopped(self, message):
+		self._set_state('Paused')
+		self._stack = message.get('stack', [])
+		self.stack_list.blockSignals(True)
+		self.stack_list.clear()
+		for frame in self._stack:
+			item = QListWidgetItem(f"{frame['name']}  {os.path.basename(frame['file'])}:{frame['line']}")
+			item.setToolTip(frame['file'])
+			self.stack_list.addItem(item)
+		self.stack_list.setCurrentRow(0)
+		self.stack_list.blockSignals(False)
+		self._on_variables(0, message.get('variables', []))
+
+	def _on_frame_selected(self, index):
+		if 0 <= index < len(self._stack):
+			frame = self._stack[index]
+			self.session.select_frame(index)
+			self.frameSelected.emit(index, frame['file'], frame['line'])
+
+	def _on_variables(self, index, variables):
+		if index != max(self.stack_list.currentRow(), 0):
+			return
+		self.variables_tree.clear()
+		for var in variables:
+			item = QTreeWidgetItem([var['name'], var['type'], var['value']])
+			item.setToolTip(2, var['value'])
+			if var.get('scope') == 'global':
+				item.setForeground(0, self.palette().placeholderText())
+			self.variables_tree.addTopLevelItem(item)
+		self.variables_tree.resizeColumnToContents(0)
@@ -0,0 +1,65 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+_pool = None
+
+
+def _executor():
+	# One background thread counts, lists and filters large directories for
+	# the project explorer
+	global _pool
+	if _pool is None:
+		_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dir-listing')
+	return _pool
+
+
+def shutdown():
+	global _pool
+	if _pool is not None:
+		_pool.shutdown(wait=False, cancel_futures=True)
+		_pool = None
+
+
+def submit(fn, *args):
+	# Raises RuntimeError once shut down (application closing)
+	return _executor().submit(fn, *args)
+
+
+def count_entries(path, limit):
+	# Entries of `path` the explorer would show, counting no further than `limit`
+	count = 0
+	try:
+		with os.scandir(path) as it:
+			for entry in it:
+				if not entry.name.startswith('.'):
+					count += 1
+					if count >= limit:
+						break
+	except OSError:
+		pass
+	return count
+
+
+def list_entries(path):
+	# (name, is_dir) of every shown entry, directories first and then by name
+	# like the explorer; hidden entries are left out as QFileSystemModel does
+	entries = []
+	try:
+		with os.scandir(path) as it:
+			for entry in it:
+				if entry.name.startswith('.'):
+					continue
+				try:
+					is_dir = entry.is_dir()
+				except OSError:
+					is_dir = False
+				entries.append((entry.name, is_dir))
+	except OSError:
+		pass
+	entries.sort(key=lambda entry: (not entry[1], entry[0].casefold()))
+	return entries
+
+
+def filter_entries(entries, text):
+	needle = text.casefold()
+	return [entry for entry in entries if needle in entry[0].casefold()]
@@ -0,0 +1,460 @@
+import codecs
+import difflib
+import locale
+import os
+import queue
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal, QFileSystemWatcher
+
+
+def detect_text_format(raw, default_encoding='utf-8'):
+	# (encoding, newline) of a file's bytes so saving can write them back the same way
+	if raw.startswith(codecs.BOM_UTF8):
+		encoding = 'utf-8-sig'
+	elif raw.startswith(codecs.BOM_UTF16_LE) or raw.startswith(codecs.BOM_UTF16_BE):
+		encoding = 'utf-16'
+	else:
+		encoding = default_encoding
+	sample = raw[:65536]
+	if encoding == 'utf-16':
+		sample = sample.decode('utf-16', errors='ignore').encode('utf-8', errors='ignore')
+	if b'\r\n' in sample:
+		newline = '\r\n'
+	elif b'\r' in sample and b'\n' not in sample:
+		newline = '\r'
+	else:
+		newline = '\n'
+	return encoding, newline
+
+
+def read_text(path, default_encoding='utf-8'):
+	# Returns (text with '\n' line breaks, encoding, newline). Decoding is
+	# strict so that saving writes back the bytes that were read: a file
+	# without a BOM that is not utf-8 falls back to the encoding it was last
+	# read with, then the locale's, then latin-1, which maps any byte.
+	with open(path, 'rb') as f:
+		raw = f.read()
+	encoding, newline = detect_text_format(raw, default_encoding)
+	candidates = [encoding]
+	if encoding == default_encoding:
+		candidates = ['utf-8', default_encoding, locale.getpreferredencoding(False)]
+	for candidate in candidates + ['latin-1']:
+		try:
+			text = raw.decode(candidate)
+		except (UnicodeDecodeError, LookupError):
+			continue
+		encoding = candidate
+		break
+	if newline != '\n' or '\r' in text:
+		text = text.replace('\r\n', '\n').replace('\r', '\n')
+	return text, encoding, newline
+
+
+def file_stat(path):
+	try:
+		st = os.stat(path)
+	except OSError:
+		return None
+	return (st.st_size, st.st_mtime_ns)
+
+
+def diff_lines(old, new, exact_lines=2000, max_lines=20000):
+	# Non-equal difflib opcodes (tag, i1, i2, j1, j2) turning line list `old`
+	# into `new`. The common head and tail are matched directly, so only the
+	# changed middle goes through SequenceMatcher. Past `exact_lines` its
+	# popular-line heuristic keeps the match from going quadratic on repeated
+	# lines (coarser regions, same result); past `max_lines` the middle is
+	# replaced as one region.
+	limit = min(len(old), len(new))
+	head = 0
+	while head < limit and old[head] == new[head]:
+		head += 1
+	tail = 0
+	while tail < limit - head and old[-1 - tail] == new[-1 - tail]:
+		tail += 1
+	old_end, new_end = len(old) - tail, len(new) - tail
+	if head == old_end and head == new_end:
+		return []
+	if max(old_end, new_end) - head > max_lines:
+		return [('replace', head, old_end, head, new_end)]
+	matcher = difflib.SequenceMatcher(None, old[head:old_end], new[head:new_end],
+										 autojunk=max(old_end, new_end) - head > exact_lines)
+	return [(tag, i1 + head, i2 + head, j1 + head, j2 + head)
+			for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def map_line(line, opcodes):
+	# Where old line `line` ends up after applying `opcodes`; lines inside a
+	# changed region map into its replacement
+	shift = 0
+	for _tag, i1, i2, j1, j2 in opcodes:
+		if line < i1:
+			break
+		if line < i2:
+			return j1 + min(line - i1, max(j2 - j1 - 1, 0))
+		shift = j2 - i2
+	return line + shift
+
+
+class ExternalChangeWatcher(QObject):
+	# Reports open files changed on disk by something other than the editor
+	# (formatters, generators, git). The size and mtime the editor last
+	# loaded or saved are acknowledged here; events that still match them
+	# (our own saves) are dropped. Files replaced by rename, which stops the
+	# OS watch, are watched again.
+	changed = Signal(str)
+
+	def __init__(self, delay_ms=200, parent=None):
+		super().__init__(parent)
+		self.known = {}  # path -> (size, mtime ns) last seen by the editor
+		self._pending = set()
+		self.watcher = QFileSystemWatcher(self)
+		self.watcher.fileChanged.connect(self._on_file_changed)
+		self._timer = QTimer(self)
+		self._timer.setSingleShot(True)
+		self._timer.setInterval(delay_ms)
+		self._timer.timeout.connect(self._flush)
+
+	def watch(self, path):
+		self.acknowledge(path)
+		if path not in self.watcher.files() and os.path.exists(path):
+			self.watcher.addPath(path)
+
+	def unwatch(self, path):
+		self.known.pop(path, None)
+		if path in self.watcher.files():
+			self.watcher.removePath(path)
+
+	def acknowledge(self, path):
+		self.known[path] = file_stat(path)
+
+	def is_current(self, path):
+		return path not in self.known or file_stat(path) == self.known[path]
+
+	def _on_file_changed(self, path):
+		# Editors write in several steps; one check once the burst is over
+		self._pending.add(path)
+		self._timer.start()
+
+	def _flush(self):
+		pending, self._pending = self._pending, set()
+		for path in pending:
+			if path not in self.known:
+				continue
+			if path not in self.watcher.files() and os.path.exists(path):
+				self.watcher.addPath(path)
+			if file_stat(path) is not None and not self.is_current(path):
+				self.changed.emit(path)
+
+
+class LogFollower(QObject):
+	# Follows a file that keeps growing (a log). Each poll reads only the
+	# bytes appended since the last one, at most `batch_bytes` per event-loop
+	# turn so a fast writer cannot starve the UI, decodes them incrementally
+	# and emits the text. A backlog larger than the `lines` the viewer keeps
+	# is skipped rather than read (`skipped` reports how much). When the file
+	# is truncated or replaced (rotation) the rest of the old file is read,
+	# then the new one from its start.
+	appended = Signal(str)
+	skipped = Signal(int)  # bytes
+
+	def __init__(self, path, encoding='utf-8', interval_ms=100, batch_bytes=1 << 19, parent=None):
+		super().__init__(parent)
+		self.path = path
+		self.encoding = encoding
+		self.batch_bytes = batch_bytes
+		self.interval_ms = interval_ms
+		self.lines = 0
+		self.line_bytes = 80  # running estimate of bytes per line
+		self._file = None
+		self._identity = None
+		self._decoder = None
+		self._carriage_return = False
+		self._byte_lines = True
+		self._timer = QTimer(self)
+		self._timer.setSingleShot(True)
+		self._timer.timeout.connect(self._poll)
+
+	def start(self, lines, max_bytes=1 << 25):
+		# Opens the file and returns the text of its last `lines` lines (read
+		# from no more than `max_bytes` before the end); what is appended after
+		# that arrives through `appended`
+		self.lines = lines
+		self._open()
+		# Line breaks can be searched for in the bytes unless the encoding is a wide one
+		self._byte_lines = not codecs.lookup(self.encoding).name.startswith(('utf-16', 'utf-32'))
+		size = os.fstat(self._file.fileno()).st_size
+		if not self._byte_lines:
+			# Small files are read whole instead
+			raw = self._file.read() if size <= max_bytes else b''
+			self._file.seek(size)
+			text = '\n'.join(self._decode(raw).split('\n')[-(lines + 1):])
+		else:
+			start = size
+			chunks = []
+			newlines = 0
+			while start > 0 and newlines <= lines and size - start < max_bytes:
+				step = min(start, 1 << 20)
+				start -= step
+				self._file.seek(start)
+				chunk = self._file.read(step)
+				chunks.append(chunk)
+				newlines += chunk.count(b'\n')
+			raw = b''.join(reversed(chunks))
+			if start > 0:
+				raw = raw[raw.find(b'\n') + 1:]  # the first line is partial
+			cut = len(raw)
+			for _ in range(lines + 1):
+				cut = raw.rfind(b'\n', 0, cut)
+				if cut < 0:
+					break
+			raw = raw[cut + 1:]
+			self._measure(raw)
+			self._file.seek(size)
+			text = self._decode(raw)
+		self._timer.start(self.interval_ms)
+		return text
+
+	def stop(self):
+		self._timer.stop()
+		if self._file is not None:
+			self._file.close()
+			self._file = None
+
+	def _open(self):
+		if self._file is not None:
+			self._file.close()
+		self._file = open(self.path, 'rb')
+		st = os.fstat(self._file.fileno())
+		self._identity = (st.st_dev, st.st_ino)
+		self._reset_decoder()
+
+	def _reset_decoder(self):
+		self._decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+		self._carriage_return = False
+
+	def _measure(self, raw):
+		newlines = raw.count(b'\n')
+		if newlines:
+			self.line_bytes = max(1, (self.line_bytes + len(raw) // newlines) // 2)
+
+	def _decode(self, raw):
+		text = self._decoder.decode(raw)
+		if self._carriage_return:
+			text = '\r' + text
+		# A '\r' at the end may be the first half of a '\r\n' split across reads
+		self._carriage_return = text.endswith('\r')
+		if self._carriage_return:
+			text = text[:-1]
+		if '\r' in text:
+			text = text.replace('\r\n', '\n').replace('\r', '\n')
+		return text
+
+	def _skip_backlog(self):
+		# Lines the viewer would drop right after showing them are not read at all
+		position = self._file.tell()
+		size = os.fstat(self._file.fileno()).st_size
+		keep = self.lines * self.line_bytes
+		if not self._byte_lines or size - position <= keep + self.batch_bytes:
+			return
+		self._file.seek(size - keep)
+		self._file.readline()  # partial line
+		self._reset_decoder()
+		self.skipped.emit(self._file.tell() - position)
+
+	def _poll(self):
+		if self._file is None:
+			return
+		self._skip_backlog()
+		data = self._file.read(self.batch_bytes)
+		if not data:
+			try:
+				st = os.stat(self.path)
+			except OSError:
+				st = None  # rotated away and not recreated yet
+			if st is not None and (st.st_dev, st.st_ino) != self._identity:
+				self._open()
+				self._skip_backlog()
+				data = self._file.read(self.batch_bytes)
+			elif st is not None and st.st_size < self._file.tell():
+				self._file.seek(0)  # truncated in place
+				self._reset_decoder()
+				self._skip_backlog()
+				data = self._file.read(self.batch_bytes)
+		if data:
+			if self._byte_lines:
+				self._measure(data)
+			text = self._decode(data)
+			if text:
+				self.appended.emit(text)
+		# Still behind the writer: read on right after this turn's repaint
+		self._timer.start(0 if len(data) == self.batch_bytes else self.interval_ms)
+
+
+class _SaveJob:
+	def __init__(self, editor, path, chunk_chars):
+		self.editor = editor
+		self.path = path
+		self.encoding = getattr(editor, 'encoding', None) or 'utf-8'
+		self.newline = getattr(editor, 'newline', None) or '\n'
+		self.revision = editor.document().revision()
+		self.chunks = queue.Queue(maxsize=32)
+		self.pending = None  # chunk the producer could not queue yet
+		self.producer = self._serialize(editor.document(), chunk_chars)
+		self.produced = False
+		self.future = None
+
+	def _serialize(self, doc, chunk_chars):
+		# Walk the document block by block; never builds the whole text
+		parts = []
+		size = 0
+		block = doc.firstBlock()
+		while block.isValid():
+			text = block.text()
+			block = block.next()
+			if block.isValid():
+				text += self.newline
+			parts.append(text)
+			size += len(text)
+			if size >= chunk_chars:
+				yield ''.join(parts)
+				parts = []
+				size = 0
+		if parts:
+			yield ''.join(parts)
+
+	def write(self):
+		# Runs on a worker thread: encode, write to a temp file, fsync, rename
+		directory = os.path.dirname(os.path.abspath(self.path))
+		fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(self.path) + '.', suffix='.tmp', dir=directory)
+		try:
+			encoder = codecs.getincrementalencoder(self.encoding)('strict')
+			with os.fdopen(fd, 'wb') as f:
+				while True:
+					chunk = self.chunks.get()
+					if chunk is None:
+						break
+					f.write(encoder.encode(chunk))
+				f.write(encoder.encode('', final=True))
+				f.flush()
+				os.fsync(f.fileno())
+			if os.path.exists(self.path):
+				shutil.copymode(self.path, tmp)
+			os.replace(tmp, self.path)
+		except BaseException:
+			try:
+				os.remove(tmp)
+			except OSError:
+				pass
+			raise
+
+
+class SavePipeline(QObject):
+	# Saves editors without blocking the GUI. The GUI thread streams each
+	# document out in short time slices (the document is read-only meanwhile
+	# so the snapshot stays consistent) and worker threads encode and write
+	# the chunks with temp-file + fsync + rename. Several saves run in parallel.
+	# Editors hold keys typed during a save and replay them afterwards.
+	saved = Signal(object, str)          # editor, path
+	failed = Signal(object, str, str)    # editor, path, message
+	_finished = Signal(object, object)   # job, exception or None (from worker threads)
+
+	def __init__(self, max_workers=4, chunk_chars=1 << 16, slice_ms=8, parent=None):
+		super().__init__(parent)
+		self.chunk_chars = chunk_chars
+		self.slice_ms = slice_ms
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='save')
+		self._jobs = []
+		self._timer = QTimer(self)
+		self._timer.setInterval(0)
+		self._timer.timeout.connect(self._produce)
+		self._finished.connect(self._on_finished)
+
+	def is_saving(self, editor):
+		return any(job.editor.document() is editor.document() for job in self._jobs)
+
+	def save(self, editor, path=None):
+		path = path or editor.file_path
+		if not path or self.is_saving(editor):
+			return False
+		job = _SaveJob(editor, path, self.chunk_chars)
+		self._set_locked(job, True)
+		self._jobs.append(job)
+		job.future = self._executor.submit(job.write)
+		job.future.add_done_callback(lambda f, job=job: self._finished.emit(job, f.exception()))
+		self._timer.start()
+		return True
+
+	def save_all(self, editors):
+		# Writers run in parallel; documents shown in several views are saved once
+		started = []
+		seen = set()
+		for editor in editors:
+			doc = editor.document()
+			if doc in seen or not editor.file_path or not doc.isModified():
+				continue
+			seen.add(doc)
+			if self.save(editor):
+				started.append(editor)
+		return started
+
+	def _set_locked(self, job, locked):
+		views = job.editor.views() if hasattr(job.editor, 'views') else [job.editor]
+		for view in views:
+			if hasattr(view, 'set_save_locked'):
+				view.set_save_locked(locked)
+			else:
+				view.setReadOnly(locked)
+
+	def _produce(self):
+		deadline = time.monotonic() + self.slice_ms / 1000
+		for job in [job for job in self._jobs if not job.produced and not job.future.done()]:
+			while time.monotonic() < deadline:
+				if job.pending is None:
+					job.pending = next(job.producer, None)
+					if job.pending is None:
+						self._end_production(job)
+						break
+				try:
+					job.chunks.put_nowait(job.pending)
+				except queue.Full:
+					break  # writer is behind; try again next tick
+				job.pending = None
+		if all(job.produced for job in self._jobs):
+			self._timer.stop()
+
+	def _end_production(self, job):
+		job.produced = True
+		self._set_locked(job, False)
+		# The sentinel only waits for one free slot while the writer drains the
+		# queue; give up if the writer already failed
+		while not job.future.done():
+			try:
+				job.chunks.put(None, timeout=0.05)
+				break
+			except queue.Full:
+				continue
+
+	def _on_finished(self, job, error):
+		if job in self._jobs:
+			self._jobs.remove(job)
+		if not job.produced:
+			job.produced = True
+			self._set_locked(job, False)
+		if error is not None:
+			self.failed.emit(job.editor, job.path, str(error))
+			return
+		doc = job.editor.document()
+		if doc.revision() == job.revision:
+			doc.setModified(False)
+		self.saved.emit(job.editor, job.path)
+
+	def shutdown(self):
+		# Finish every running save synchronously (used when the window closes)
+		while any(not job.produced and not job.future.done() for job in self._jobs):
+			self._produce()
+		self._executor.shutdown(wait=True)
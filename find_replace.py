@@ -0,0 +1,309 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QTimer, Signal, Qt
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QLineEdit, QLabel, QPushButton, QToolButton
+
+_pool = None
+
+
+def _executor():
+	# One background thread counts matches for every find bar
+	global _pool
+	if _pool is None:
+		_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='find')
+	return _pool
+
+
+def shutdown():
+	global _pool
+	if _pool is not None:
+		_pool.shutdown(wait=False, cancel_futures=True)
+		_pool = None
+
+
+def build_pattern(text, regex=False, case=False, whole_word=False):
+	# Compiled pattern for the find options, or None for an empty/invalid query
+	if not text:
+		return None
+	source = text if regex else re.escape(text)
+	if whole_word:
+		source = r'\b(?:%s)\b' % source
+	try:
+		return re.compile(source, 0 if case else re.IGNORECASE)
+	except re.error:
+		return None
+
+
+def utf16_offset(text, index):
+	# QTextDocument positions count UTF-16 units; Python indexes count code points
+	if text.isascii():
+		return index
+	return len(text[:index].encode('utf-16-le')) // 2
+
+
+def count_matches(pattern, text):
+	# Line by line and non-empty only, like the highlights and find_in_document
+	return sum(1 for line in text.split('\n') for m in pattern.finditer(line) if m.end() > m.start())
+
+
+def find_in_document(document, pattern, position, backward=False):
+	# (start, end) document positions of the next non-empty match from
+	# `position`, wrapping around once; matches never span blocks
+	block = document.findBlock(position)
+	col = position - block.position()
+	for _ in range(document.blockCount() + 1):
+		text = block.text()
+		spans = [(utf16_offset(text, m.start()), utf16_offset(text, m.end()))
+				 for m in pattern.finditer(text) if m.end() > m.start()]
+		if backward:
+			spans = [span for span in spans if span[1] <= col]
+			found = spans[-1] if spans else None
+		else:
+			found = next((span for span in spans if span[0] >= col), None)
+		if found is not None:
+			return block.position() + found[0], block.position() + found[1]
+		block = block.previous() if backward else block.next()
+		if not block.isValid():
+			block = document.lastBlock() if backward else document.firstBlock()
+		col = block.length() if backward else 0
+	return None
+
+
+def replace_all(document, pattern, replacement, regex=False):
+	# Matched line by line, as the highlights and Find Next see the document
+	# (so ^ and $ anchor at every line and matches never span lines); only the
+	# lines from the first to the last change are written back, as a single
+	# undo step.
+	lines = document.toPlainText().split('\n')
+	first = last = None
+	count = 0
+
+	def substitute(m):
+		nonlocal count
+		if m.end() == m.start():
+			return ''
+		count += 1
+		return m.expand(replacement) if regex else replacement
+
+	try:
+		for number, line in enumerate(lines):
+			new_line = pattern.sub(substitute, line)
+			if new_line != line:
+				if first is None:
+					first = number
+				last = number
+				lines[number] = new_line
+	except (re.error, IndexError):
+		return -1  # bad group reference in the replacement
+	if first is None:
+		return count
+	first_block = document.findBlockByNumber(first)
+	last_block = document.findBlockByNumber(last)
+	cursor = QTextCursor(document)
+	cursor.beginEditBlock()
+	cursor.setPosition(first_block.position())
+	cursor.setPosition(last_block.position() + last_block.length() - 1, QTextCursor.KeepAnchor)
+	cursor.insertText('\n'.join(lines[first:last + 1]))
+	cursor.endEditBlock()
+	return count
+
+
+class MatchCounter(QObject):
+	# Counts matches over a snapshot of the document on the background thread.
+	# Like the document checker, stale results (older query or text) are dropped.
+	counted = Signal(int)
+	_result = Signal(int, object)
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.generation = 0
+		self._result.connect(self._on_result)
+
+	def start(self, document, pattern):
+		self.generation += 1
+		if document is None or pattern is None:
+			return
+		generation = self.generation
+		text = document.toPlainText()
+		try:
+			future = _executor().submit(count_matches, pattern, text)
+		except RuntimeError:
+			return  # pool shut down (application closing)
+		future.add_done_callback(lambda f, g=generation: self._result.emit(g, f))
+
+	def _on_result(self, generation, future):
+		if generation != self.generation or future.cancelled() or future.exception() is not None:
+			return
+		self.counted.emit(future.result())
+
+
+class FindBar(QFrame):
+	# Find/replace strip shown above the editor tabs; works on whichever
+	# editor is current (see set_editor).
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.setObjectName('findBar')
+		self.editor = None
+		self._bound = False
+		self.counter = MatchCounter(self)
+		self.counter.counted.connect(self._on_counted)
+		# Recount once edits pause instead of on every keystroke
+		self._recount = QTimer(self)
+		self._recount.setSingleShot(True)
+		self._recount.setInterval(300)
+		self._recount.timeout.connect(self._count)
+
+		layout = QHBoxLayout(self)
+		layout.setContentsMargins(6, 3, 6, 3)
+		layout.setSpacing(4)
+		self.find_edit = QLineEdit()
+		self.find_edit.setPlaceholderText('Find')
+		self.find_edit.textChanged.connect(self._on_query_changed)
+		self.find_edit.returnPressed.connect(self.find_next)
+		layout.addWidget(self.find_edit, 2)
+		self.case_button = self._option_button('Aa', 'Match case')
+		self.word_button = self._option_button('ab', 'Whole word')
+		self.regex_button = self._option_button('.*', 'Regular expression')
+		for button in (self.case_button, self.word_button, self.regex_button):
+			layout.addWidget(button)
+		self.count_label = QLabel()
+		self.count_label.setMinimumWidth(90)
+		layout.addWidget(self.count_label)
+		self.replace_edit = QLineEdit()
+		self.replace_edit.setPlaceholderText('Replace')
+		self.replace_edit.returnPressed.connect(self.replace_next)
+		layout.addWidget(self.replace_edit, 2)
+		for label, slot in (('Prev', self.find_previous), ('Next', self.find_next),
+							('Replace', self.replace_next), ('Replace All', self.replace_all), ('x', self.close_bar)):
+			button = QPushButton(label)
+			button.setObjectName('findBarButton')
+			button.clicked.connect(slot)
+			layout.addWidget(button)
+		self.hide()
+
+	def _option_button(self, text, tooltip):
+		button = QToolButton()
+		button.setText(text)
+		button.setToolTip(tooltip)
+		button.setCheckable(True)
+		button.toggled.connect(self._on_query_changed)
+		return button
+
+	def pattern(self):
+		return build_pattern(self.find_edit.text(), self.regex_button.isChecked(),
+							 self.case_button.isChecked(), self.word_button.isChecked())
+
+	def set_editor(self, editor):
+		# Follows the current tab
+		self._release()
+		self.editor = editor
+		if self.isVisible():
+			self._bind()
+
+	def _bind(self):
+		if self.editor is not None and not self._bound:
+			self.editor.textChanged.connect(self._recount.start)
+			self._bound = True
+			self._on_query_changed()
+
+	def _release(self):
+		if self.editor is None or not self._bound:
+			return
+		self._bound = False
+		try:
+			self.editor.textChanged.disconnect(self._recount.start)
+			self.editor.set_search_pattern(None)
+		except (RuntimeError, TypeError):
+			pass  # the editor is already gone
+
+	def open(self, replace=False):
+		if not self.isVisible():
+			self.show()
+			self._bind()
+		if self.editor is not None:
+			selected = self.editor.textCursor().selectedText()
+			if selected and '\u2029' not in selected:
+				self.find_edit.setText(selected)
+		target = self.replace_edit if replace and self.find_edit.text() else self.find_edit
+		target.setFocus()
+		target.selectAll()
+
+	def close_bar(self):
+		self._release()
+		self.hide()
+		if self.editor is not None:
+			self.editor.setFocus()
+
+	def keyPressEvent(self, event):
+		if event.key() == Qt.Key_Escape:
+			self.close_bar()
+			return
+		super().keyPressEvent(event)
+
+	def _on_query_changed(self, *_):
+		if self.editor is None or not self.isVisible():
+			return
+		pattern = self.pattern()
+		self.editor.set_search_pattern(pattern)
+		if pattern is None:
+			self.counter.start(None, None)
+			invalid = bool(self.find_edit.text()) and self.regex_button.isChecked()
+			self.count_label.setText('Invalid pattern' if invalid else '')
+			return
+		self._count()
+
+	def _count(self):
+		if self.editor is not None and self.isVisible():
+			self.counter.start(self.editor.document(), self.pattern())
+
+	def _on_counted(self, count):
+		self.count_label.setText('No results' if not count else f'{count} match' + ('es' if count != 1 else ''))
+
+	def find_next(self, backward=False):
+		pattern = self.pattern()
+		if self.editor is None or pattern is None:
+			return False
+		cursor = self.editor.textCursor()
+		position = cursor.selectionStart() if backward else cursor.selectionEnd()
+		found = find_in_document(self.editor.document(), pattern, position, backward)
+		if found is None:
+			return False
+		cursor.setPosition(found[0])
+		cursor.setPosition(found[1], QTextCursor.KeepAnchor)
+		self.editor.setTextCursor(cursor)
+		self.editor.centerCursor()
+		return True
+
+	def find_previous(self):
+		return self.find_next(backward=True)
+
+	def replace_next(self):
+		# Replace the selected match (if it is one), then move to the next
+		pattern = self.pattern()
+		if self.editor is None or pattern is None or self.editor.isReadOnly():
+			return
+		cursor = self.editor.textCursor()
+		selected = cursor.selectedText()
+		m = pattern.fullmatch(selected) if cursor.hasSelection() else None
+		if m is not None:
+			try:
+				text = m.expand(self.replace_edit.text()) if self.regex_button.isChecked() else self.replace_edit.text()
+			except (re.error, IndexError):
+				self.count_label.setText('Invalid replacement')
+				return
+			cursor.insertText(text)
+		self.find_next()
+
+	def replace_all(self):
+		pattern = self.pattern()
+		if self.editor is None or pattern is None or self.editor.isReadOnly():
+			return
+		with self.editor.bulk_edit():
+			count = replace_all(self.editor.document(), pattern, self.replace_edit.text(), self.regex_button.isChecked())
+		if count < 0:
+			self.count_label.setText('Invalid replacement')
+		else:
+			self.count_label.setText(f'Replaced {count}')
+
@@ -0,0 +1,204 @@
+import re
+
+from PySide6.QtCore import QObject, Signal
+from PySide6.QtGui import QTextCursor
+
+from brackets import block_data, STATE_NONE
+
+HEADER_RE = re.compile(r'\s*(?:async\s+)?(?:def|class|if|elif|else|for|while|with|try|except|finally|match|case)\b')
+DOCSTRING_RE = re.compile(r'\s*[rRbBuUfF]{0,2}("""|\'\'\')')
+
+
+def fold_kind(block):
+	# 'docstring', 'block' or None. Cheap enough to call for every painted line:
+	# it looks at most at the following non-blank line.
+	data = block_data(block)
+	if data.blank:
+		return None
+	prev = block.previous()
+	if prev.isValid() and prev.userState() > STATE_NONE:
+		return None  # starts inside a string
+	text = block.text()
+	if DOCSTRING_RE.match(text) and block.userState() > STATE_NONE:
+		return 'docstring'
+	if not HEADER_RE.match(text):
+		return None
+	blk = block.next()
+	while blk.isValid():
+		d = block_data(blk)
+		if not d.blank:
+			return 'block' if d.indent > data.indent else None
+		blk = blk.next()
+	return None
+
+
+def fold_region_end(block):
+	# Last block folded under `block`, or None if it does not start a region.
+	# Python blocks end at the next non-blank line that is not indented deeper;
+	# docstrings end where the highlighter's string state closes.
+	kind = fold_kind(block)
+	if kind is None:
+		return None
+	if kind == 'docstring':
+		end = block.next()
+		while end.isValid() and end.userState() > STATE_NONE:
+			end = end.next()
+		return end if end.isValid() else None
+	data = block_data(block)
+	end = None
+	blk = block.next()
+	while blk.isValid():
+		d = block_data(blk)
+		if not d.blank:
+			if d.indent <= data.indent:
+				break
+			end = blk
+		blk = blk.next()
+	return end
+
+
+class FoldState(QObject):
+	# Collapsed regions of one document (block visibility is per document, so
+	# split views share this like they share the Highlighter). Each fold keeps
+	# QTextCursors at its header and last block, which move with edits made
+	# elsewhere; an edit touching the header or the hidden lines unfolds it.
+	changed = Signal()
+
+	def __init__(self, document, parent=None):
+		super().__init__(parent)
+		self.document = None
+		self._folds = []  # (header cursor, end cursor)
+		# Header block number -> fold, for the painter's per-line lookups;
+		# rebuilt when an edit may have renumbered blocks
+		self._by_header = {}
+		self._by_header_revision = None
+		self.attach(document)
+
+	def attach(self, document):
+		if self.document is not None:
+			try:
+				self.document.contentsChange.disconnect(self._on_contents_change)
+			except (RuntimeError, TypeError):
+				pass
+		self.document = document
+		self._folds = []
+		self._by_header_revision = None
+		if document is not None:
+			document.contentsChange.connect(self._on_contents_change)
+
+	def fold_at(self, block):
+		# (header cursor, end cursor) of the fold headed by `block`, if folded
+		if not self._folds:
+			return None
+		revision = self.document.revision()
+		if self._by_header_revision != revision:
+			self._by_header = {header.blockNumber(): (header, tail) for header, tail in self._folds}
+			self._by_header_revision = revision
+		fold = self._by_header.get(block.blockNumber())
+		return fold if fold is not None and fold[0].block() == block else None
+
+	def _add(self, fold):
+		self._folds.append(fold)
+		if self._by_header_revision is not None:
+			self._by_header[fold[0].blockNumber()] = fold
+
+	def _remove(self, fold):
+		self._folds.remove(fold)
+		self._by_header_revision = None
+
+	def end_of(self, block):
+		fold = self.fold_at(block) if self._folds else None
+		return fold[1].block() if fold else None
+
+	def is_foldable(self, block):
+		return fold_kind(block) is not None
+
+	def headers(self):
+		return [header.block().blockNumber() for header, _tail in self._folds]
+
+	def fold(self, block):
+		if self.fold_at(block) is not None:
+			return False
+		end = fold_region_end(block)
+		if end is None:
+			return False
+		# Nested folds inside the new region are absorbed into it
+		for inner in [f for f in self._folds if block.position() < f[0].position() <= end.position()]:
+			self._remove(inner)
+		self._set_visible(block.next(), end, False)
+		self._add((QTextCursor(block), QTextCursor(end)))
+		self.changed.emit()
+		return True
+
+	def unfold(self, block):
+		fold = self.fold_at(block)
+		if fold is None:
+			return False
+		self._unfold(fold)
+		self.changed.emit()
+		return True
+
+	def toggle(self, block):
+		return self.unfold(block) or self.fold(block)
+
+	def fold_all(self):
+		block = self.document.firstBlock()
+		while block.isValid():
+			end = fold_region_end(block)
+			if end is not None and self.fold_at(block) is None:
+				self._set_visible(block.next(), end, False)
+				self._add((QTextCursor(block), QTextCursor(end)))
+				block = end.next()
+			else:
+				block = block.next()
+		self.changed.emit()
+
+	def unfold_all(self):
+		for fold in list(self._folds):
+			self._unfold(fold)
+		self.changed.emit()
+
+	def containing_fold(self, block):
+		# Header block of the fold hiding `block`, if any
+		for header, tail in self._folds:
+			if header.block().blockNumber() < block.blockNumber() <= tail.block().blockNumber():
+				return header.block()
+		return None
+
+	def _unfold(self, fold):
+		if fold in self._folds:
+			self._remove(fold)
+		header, tail = fold
+		self._set_visible(header.block().next(), tail.block(), True)
+
+	def _set_visible(self, first, last, visible):
+		if not first.isValid() or not last.isValid() or last.blockNumber() < first.blockNumber():
+			return
+		stop = last.next()
+		block = first
+		while block.isValid() and block != stop:
+			block.setVisible(visible)
+			block = block.next()
+		# Only the affected range is laid out again
+		start = first.position()
+		self.document.markContentsDirty(start, last.position() + last.length() - start)
+
+	def _on_contents_change(self, position, removed, added):
+		if not self._folds:
+			return
+		touched = False
+		for fold in list(self._folds):
+			header, tail = fold
+			# From the header's first character to the hidden tail's line
+			# break: edits right before or right after the region leave it
+			# folded, removing that line break joins the next line into it
+			start = header.block().position()
+			end = tail.block().position() + tail.block().length() - 1
+			if (position < end or (removed and position == end)) and position + max(removed, added) > start:
+				self._unfold(fold)
+				touched = True
+			elif tail.block().blockNumber() <= header.block().blockNumber():
+				self._remove(fold)  # the region was deleted
+				touched = True
+		if touched:
+			self.changed.emit()
@@ -0,0 +1,645 @@
+import hashlib
+import os
+import re
+import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+
+# Git status for the project explorer without running git per file: the
+# index (.git/index) is parsed directly and its stat data compared against
+# the working tree, like `git status` does. Only the HEAD tree comes from
+# git itself, one `git ls-tree` per HEAD commit.
+
+MODIFIED = 'modified'
+ADDED = 'added'
+UNTRACKED = 'untracked'
+PRIORITY = (MODIFIED, ADDED, UNTRACKED)  # what a directory shows when its children differ
+
+_pool = None
+
+
+def _executor():
+	# One background thread owns the status of every explorer
+	global _pool
+	if _pool is None:
+		_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='git-status')
+	return _pool
+
+
+def shutdown():
+	global _pool
+	if _pool is not None:
+		_pool.shutdown(wait=False, cancel_futures=True)
+		_pool = None
+
+
+def find_repository(path):
+	# (worktree, git dir) of the repository containing `path`, or (None, None)
+	path = os.path.abspath(path)
+	while True:
+		dot_git = os.path.join(path, '.git')
+		if os.path.isdir(dot_git):
+			return path, dot_git
+		if os.path.isfile(dot_git):
+			# Linked worktrees and submodules: "gitdir: <path>"
+			try:
+				with open(dot_git, encoding='utf-8') as f:
+					line = f.readline().strip()
+			except OSError:
+				line = ''
+			if line.startswith('gitdir:'):
+				return path, os.path.normpath(os.path.join(path, line[7:].strip()))
+		parent = os.path.dirname(path)
+		if parent == path:
+			return None, None
+		path = parent
+
+
+def common_dir(git_dir):
+	# Where refs live; differs from the git dir for linked worktrees
+	try:
+		with open(os.path.join(git_dir, 'commondir'), encoding='utf-8') as f:
+			return os.path.normpath(os.path.join(git_dir, f.read().strip()))
+	except OSError:
+		return git_dir
+
+
+def _varint(data, pos):
+	# The offset encoding of index v4 path prefixes
+	c = data[pos]
+	pos += 1
+	value = c & 0x7f
+	while c & 0x80:
+		c = data[pos]
+		pos += 1
+		value = ((value + 1) << 7) | (c & 0x7f)
+	return value, pos
+
+
+_ENTRY = struct.Struct('>10I20sH')  # stat data, sha, flags
+
+
+def read_index(path):
+	# {path: (mtime ns, size, sha, mode, stage, skip worktree, intent to add)}
+	# for index versions 2-4; extensions are not needed and skipped
+	with open(path, 'rb') as f:
+		data = f.read()
+	if data[:4] != b'DIRC':
+		raise ValueError(f'{path}: not a git index')
+	version, count = struct.unpack_from('>II', data, 4)
+	if version not in (2, 3, 4):
+		raise ValueError(f'{path}: unsupported index version {version}')
+	entries = {}
+	pos = 12
+	previous = b''
+	unpack = _ENTRY.unpack_from
+	for _ in range(count):
+		_, _, mtime_s, mtime_ns, _, _, mode, _, _, size, sha, flags = unpack(data, pos)
+		name_pos = pos + 62
+		extended = 0
+		if flags & 0x4000 and version >= 3:
+			extended, = struct.unpack_from('>H', data, name_pos)
+			name_pos += 2
+		if version == 4:
+			strip, name_pos = _varint(data, name_pos)
+			end = data.index(b'\0', name_pos)
+			name = previous[:len(previous) - strip] + data[name_pos:end]
+			pos = end + 1
+		else:
+			end = data.index(b'\0', name_pos)
+			name = data[name_pos:end]
+			pos += (end - pos + 8) & ~7  # NUL padded to a multiple of 8
+		previous = name
+		entries[name.decode('utf-8', 'surrogateescape')] = (
+			mtime_s * 1000000000 + mtime_ns, size, sha, mode, (flags >> 12) & 3,
+			bool(extended & 0x4000), bool(extended & 0x2000))
+	return entries
+
+
+def head_id(git_dir):
+	# Commit id of HEAD, '' on an unborn branch, None if unreadable
+	try:
+		with open(os.path.join(git_dir, 'HEAD'), encoding='utf-8') as f:
+			head = f.read().strip()
+	except OSError:
+		return None
+	if not head.startswith('ref:'):
+		return head
+	ref = head[4:].strip()
+	refs = common_dir(git_dir)
+	try:
+		with open(os.path.join(refs, *ref.split('/')), encoding='utf-8') as f:
+			return f.read().strip()
+	except OSError:
+		pass
+	try:
+		with open(os.path.join(refs, 'packed-refs'), encoding='utf-8') as f:
+			for line in f:
+				parts = line.split()
+				if len(parts) == 2 and parts[1] == ref:
+					return parts[0]
+	except OSError:
+		pass
+	return ''
+
+
+def head_tree(worktree, commit):
+	# {path: sha} of the HEAD commit; None when unknown (git cannot be run)
+	if commit is None:
+		return None
+	if not commit:
+		return {}
+	try:
+		result = subprocess.run(['git', 'ls-tree', '-r', '-z', '--full-tree', commit], cwd=worktree,
+								capture_output=True, timeout=60)
+	except (OSError, subprocess.SubprocessError):
+		return None
+	if result.returncode != 0:
+		return None
+	tree = {}
+	for record in result.stdout.split(b'\0'):
+		meta, sep, name = record.partition(b'\t')
+		if sep:
+			tree[name.decode('utf-8', 'surrogateescape')] = bytes.fromhex(meta.split()[2].decode('ascii'))
+	return tree
+
+
+def _translate(pattern):
+	# gitignore glob -> regex over '/'-separated paths
+	out = []
+	i, n = 0, len(pattern)
+	while i < n:
+		c = pattern[i]
+		if pattern.startswith('**/', i):
+			out.append('(?:.*/)?')
+			i += 3
+			continue
+		if pattern.startswith('**', i):
+			out.append('.*')
+			i += 2
+			continue
+		if c == '*':
+			out.append('[^/]*')
+		elif c == '?':
+			out.append('[^/]')
+		elif c == '[' and pattern.find(']', i + 2) > 0:
+			end = pattern.find(']', i + 2)
+			body = pattern[i + 1:end].replace('\\', '\\\\')
+			out.append('[' + ('^' + body[1:] if body.startswith('!') else body) + ']')
+			i = end + 1
+			continue
+		elif c == '\\' and i + 1 < n:
+			out.append(re.escape(pattern[i + 1]))
+			i += 2
+			continue
+		else:
+			out.append(re.escape(c))
+		i += 1
+	return re.compile(''.join(out))
+
+
+def parse_ignore(text):
+	# [(regex, negate, directories only, anchored)] in file order
+	rules = []
+	for line in text.splitlines():
+		line = line.rstrip()
+		if not line or line.startswith('#'):
+			continue
+		negate = line.startswith('!')
+		if negate:
+			line = line[1:]
+		dir_only = line.endswith('/')
+		line = line.rstrip('/')
+		anchored = '/' in line
+		line = line.lstrip('/')
+		if line:
+			rules.append((_translate(line), negate, dir_only, anchored))
+	return rules
+
+
+class IgnoreRules:
+	# .gitignore files are read lazily per directory and re-read when their
+	# mtime changes; info/exclude applies from the top
+	def __init__(self, worktree, git_dir):
+		self.worktree = worktree
+		self._files = {}  # rel dir -> (mtime ns, rules)
+		try:
+			with open(os.path.join(common_dir(git_dir), 'info', 'exclude'), encoding='utf-8', errors='replace') as f:
+				self.exclude = parse_ignore(f.read())
+		except OSError:
+			self.exclude = []
+
+	def _rules(self, rel_dir):
+		cached = self._files.get(rel_dir)
+		if cached is None:
+			cached = self._files[rel_dir] = self._read(rel_dir)
+		return cached[1]
+
+	def _read(self, rel_dir):
+		path = os.path.join(self.worktree, rel_dir, '.gitignore')
+		try:
+			mtime = os.stat(path).st_mtime_ns
+			with open(path, encoding='utf-8', errors='replace') as f:
+				return mtime, parse_ignore(f.read())
+		except OSError:
+			return None, []
+
+	def refresh(self, rel_dir):
+		# True if the directory's .gitignore changed since it was read
+		if rel_dir not in self._files:
+			return False
+		fresh = self._read(rel_dir)
+		if fresh[0] == self._files[rel_dir][0]:
+			return False
+		self._files[rel_dir] = fresh
+		return True
+
+	def ignored(self, rel, is_dir):
+		# Later rules win; the caller never asks about paths below an ignored directory
+		name = rel.rsplit('/', 1)[-1]
+		ignored = False
+		base = ''
+		layers = [('', self.exclude)]
+		for part in rel.split('/')[:-1]:
+			layers.append((base, self._rules(base)))
+			base = base + '/' + part if base else part
+		layers.append((base, self._rules(base)))
+		for base, rules in layers:
+			sub = rel[len(base) + 1:] if base else rel
+			for regex, negate, dir_only, anchored in rules:
+				if (is_dir or not dir_only) and regex.fullmatch(sub if anchored else name):
+					ignored = not negate
+		return ignored
+
+
+def _parent(rel):
+	return rel.rsplit('/', 1)[0] if '/' in rel else ''
+
+
+def _inside(rel, rel_dir):
+	return not rel_dir or rel.startswith(rel_dir + '/')
+
+
+class StatusTree:
+	# Git status of one project, owned by the background thread. Only files
+	# that differ are stored; every directory keeps a count of such files
+	# below it per status, so rolling up a change touches only its ancestors.
+	# Changes since the last take_changes() are collected for the GUI.
+	def __init__(self, worktree, git_dir, scope=''):
+		self.worktree = worktree
+		self.git_dir = git_dir
+		self._root = os.path.join(worktree, '')
+		self.scope = scope  # project directory relative to the worktree
+		self.ignore = IgnoreRules(worktree, git_dir)
+		self.index = {}
+		self.head = {}
+		self.by_dir = {}   # rel dir -> tracked files directly inside
+		self._index_key = None
+		self._head_commit = None
+		self._previous = ({}, {})  # index and HEAD tree the statuses were computed from
+		self.files = {}    # rel path -> status, files that differ only
+		self.counts = {}   # rel dir -> [modified, added, untracked] below it
+		self.children = {}  # rel dir -> names of its files in self.files
+		self.subdirs = {}  # rel dir -> names of its scanned subdirectories
+		self._verified = {}  # rel path -> (mtime ns, size, index sha, same content)
+		self._changes = {}
+
+	def full(self, rel):
+		return self._root + rel.replace('/', os.sep) if rel else self.worktree
+
+	def take_changes(self):
+		changes, self._changes = self._changes, {}
+		return changes
+
+	def _set(self, rel, status):
+		old = self.files.get(rel)
+		if old == status:
+			return
+		parent = _parent(rel)
+		name = rel[len(parent) + 1:] if parent else rel
+		if status is None:
+			del self.files[rel]
+			names = self.children[parent]
+			names.discard(name)
+			if not names:
+				del self.children[parent]
+		else:
+			self.files[rel] = status
+			self.children.setdefault(parent, set()).add(name)
+		self._changes[rel] = status
+		while True:
+			counts = self.counts.setdefault(parent, [0, 0, 0])
+			before = self._rollup(counts)
+			if old is not None:
+				counts[PRIORITY.index(old)] -= 1
+			if status is not None:
+				counts[PRIORITY.index(status)] += 1
+			after = self._rollup(counts)
+			if not any(counts):
+				del self.counts[parent]
+			if before != after:
+				self._changes[parent] = after
+			if not parent:
+				break
+			parent = _parent(parent)
+
+	@staticmethod
+	def _rollup(counts):
+		for status, count in zip(PRIORITY, counts):
+			if count:
+				return status
+		return None
+
+	def _load_index(self):
+		# True if the index or HEAD moved since the last load
+		path = os.path.join(self.git_dir, 'index')
+		try:
+			st = os.stat(path)
+			stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+		except OSError:
+			stamp = None
+		commit = head_id(self.git_dir)
+		key = (stamp, commit)
+		if key == self._index_key:
+			return False
+		self._index_key = key
+		self.index = read_index(path) if stamp is not None else {}
+		if self._head_commit != commit or self.head is None:
+			self.head = head_tree(self.worktree, commit)
+			self._head_commit = commit
+		self.by_dir = {}
+		for rel in self.index:
+			if _inside(rel, self.scope):
+				self.by_dir.setdefault(_parent(rel), []).append(rel)
+		return True
+
+	def _tracked_status(self, rel):
+		mtime, size, sha, mode, stage, skip_worktree, intent_to_add = self.index[rel]
+		if stage:
+			return MODIFIED  # unmerged
+		if skip_worktree or mode & 0o170000 == 0o160000:
+			return None      # sparse checkout, submodule
+		if intent_to_add:
+			return ADDED
+		staged = None
+		if self.head is not None:
+			in_head = self.head.get(rel)
+			staged = ADDED if in_head is None else (MODIFIED if in_head != sha else None)
+		path = self.full(rel)
+		try:
+			st = os.lstat(path)
+		except OSError:
+			return staged or MODIFIED  # deleted; only shows on its directories
+		if staged:
+			return staged
+		if st.st_size & 0xffffffff != size:
+			return MODIFIED
+		same_time = st.st_mtime_ns == mtime if mtime % 1000000000 else st.st_mtime_ns // 1000000000 == mtime // 1000000000
+		if same_time:
+			return None
+		# Touched but maybe not changed (the index is refreshed lazily): hash
+		# the content once per stat and remember the answer
+		verified = self._verified.get(rel)
+		if verified is None or verified[:3] != (st.st_mtime_ns, st.st_size, sha):
+			verified = (st.st_mtime_ns, st.st_size, sha, self._blob_sha(path, st) == sha)
+			self._verified[rel] = verified
+		return None if verified[3] else MODIFIED
+
+	@staticmethod
+	def _blob_sha(path, st):
+		digest = hashlib.sha1(b'blob %d\0' % st.st_size)
+		try:
+			if os.path.islink(path):
+				digest.update(os.fsencode(os.readlink(path)))
+			else:
+				with open(path, 'rb') as f:
+					for chunk in iter(lambda: f.read(1 << 20), b''):
+						digest.update(chunk)
+		except OSError:
+			return None
+		return digest.digest()
+
+	def _file_status(self, rel):
+		if rel in self.index:
+			return self._tracked_status(rel)
+		if not os.path.lexists(self.full(rel)) or self.ignore.ignored(rel, False):
+			return None
+		return UNTRACKED
+
+	def scan(self):
+		self._load_index()
+		self._previous = (self.index, self.head or {})
+		self._scan(self.scope)
+		return self.take_changes()
+
+	def _scan(self, rel_dir):
+		# Everything below rel_dir: tracked files by stat, then a walk for untracked ones
+		for rel in self.index:
+			if _inside(rel, rel_dir):
+				self._set(rel, self._tracked_status(rel))
+		stack = [rel_dir]
+		while stack:
+			current = stack.pop()
+			stack.extend(self._scan_directory(current))
+
+	def _scan_directory(self, rel_dir):
+		# Untracked files directly in rel_dir; returns the subdirectories to descend into
+		subdirs = set()
+		try:
+			entries = list(os.scandir(self.full(rel_dir)))
+		except OSError:
+			entries = []
+		for entry in entries:
+			if entry.name == '.git':
+				continue
+			rel = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+			try:
+				is_dir = entry.is_dir(follow_symlinks=False)
+			except OSError:
+				continue
+			if is_dir:
+				if rel in self.index or self.ignore.ignored(rel, True):
+					continue  # submodule or ignored
+				if os.path.exists(os.path.join(entry.path, '.git')):
+					self._set(rel, UNTRACKED)  # a nested repository, shown as one item
+					continue
+				subdirs.add(entry.name)
+			elif rel not in self.index:
+				self._set(rel, None if self.ignore.ignored(rel, False) else UNTRACKED)
+		self.subdirs[rel_dir] = subdirs
+		return [f'{rel_dir}/{name}' if rel_dir else name for name in subdirs]
+
+	def _drop(self, rel_dir):
+		# A directory went away (or became ignored): forget what was below it
+		for rel in [rel for rel in self.files if _inside(rel, rel_dir)]:
+			self._set(rel, self._tracked_status(rel) if rel in self.index else None)
+		for rel in [rel for rel in self.subdirs if rel == rel_dir or _inside(rel, rel_dir)]:
+			del self.subdirs[rel]
+		for rel in self.index:
+			if _inside(rel, rel_dir):
+				self._set(rel, self._tracked_status(rel))
+
+	def update(self, directories=(), files=(), index=False):
+		# Incremental refresh after filesystem events; returns the changes
+		if index and self._load_index():
+			self._refresh_tracked()
+		for rel in files:
+			if _inside(rel, self.scope) and _parent(rel) in self.subdirs:
+				self._set(rel, self._file_status(rel))
+		for rel_dir in sorted(directories):
+			if rel_dir == self.scope or _inside(rel_dir, self.scope):
+				self._rescan_directory(rel_dir)
+		return self.take_changes()
+
+	def _refresh_tracked(self):
+		# Only entries whose index or HEAD data moved can have changed status
+		previous = self._previous
+		index, head = self.index, self.head or {}
+		for rel in set(previous[0]) | set(index):
+			if not _inside(rel, self.scope):
+				continue
+			if previous[0].get(rel) != index.get(rel) or previous[1].get(rel) != head.get(rel):
+				self._set(rel, self._file_status(rel))
+		self._previous = (index, head)
+
+	def _rescan_directory(self, rel_dir):
+		if rel_dir not in self.subdirs:
+			return  # never scanned (below an ignored or new directory); its parent covers it
+		if not os.path.isdir(self.full(rel_dir)):
+			self._drop(rel_dir)
+			return
+		if self.ignore.refresh(rel_dir):
+			self._drop(rel_dir)
+			self._scan(rel_dir)
+			return
+		old_subdirs = self.subdirs[rel_dir]
+		old_files = {f'{rel_dir}/{name}' if rel_dir else name for name in self.children.get(rel_dir, ())}
+		old_files.update(self.by_dir.get(rel_dir, ()))
+		self._scan_directory(rel_dir)
+		for rel in old_files:
+			self._set(rel, self._file_status(rel))
+		for name in self.subdirs[rel_dir] - old_subdirs:
+			self._scan(f'{rel_dir}/{name}' if rel_dir else name)
+		for name in old_subdirs - self.subdirs[rel_dir]:
+			self._drop(f'{rel_dir}/{name}' if rel_dir else name)
+
+
+class GitStatus(QObject):
+	# Decorations for one explorer. The StatusTree lives on the background
+	# thread (every job for it runs there, in order); the GUI thread only
+	# keeps the statuses it is sent, keyed by '/'-separated absolute path,
+	# so looking one up while painting costs a dict lookup.
+	changed = Signal()
+	_result = Signal(int, object)  # generation, future (emitted from the pool's thread)
+
+	def __init__(self, delay_ms=200, parent=None):
+		super().__init__(parent)
+		self.statuses = {}
+		self.tree = None
+		self.generation = 0
+		self._prefix = ''
+		self._directories = set()
+		self._files = set()
+		self._index = False
+		self._timer = QTimer(self)
+		self._timer.setSingleShot(True)
+		self._timer.setInterval(delay_ms)
+		self._timer.timeout.connect(self._submit)
+		self.watcher = QFileSystemWatcher(self)
+		self.watcher.directoryChanged.connect(self._on_directory_changed)
+		self._result.connect(self._on_result)
+
+	def set_root(self, path):
+		self.generation += 1
+		self._timer.stop()
+		self._directories.clear()
+		self._files.clear()
+		if self.watcher.directories():
+			self.watcher.removePaths(self.watcher.directories())
+		if self.statuses:
+			self.statuses = {}
+			self.changed.emit()
+		worktree, git_dir = find_repository(path)
+		if worktree is None:
+			self.tree = None
+			return
+		scope = os.path.relpath(os.path.abspath(path), worktree).replace(os.sep, '/')
+		self.tree = StatusTree(worktree, git_dir, '' if scope == '.' else scope)
+		self._prefix = worktree.replace(os.sep, '/').rstrip('/') + '/'
+		refs = os.path.join(common_dir(git_dir), 'refs', 'heads')
+		self.watcher.addPaths([p for p in (git_dir, refs) if os.path.isdir(p)])
+		self._run(self.tree.scan)
+
+	def status(self, path):
+		return self.statuses.get(path)
+
+	def watch_directory(self, path):
+		# Called as the explorer loads a directory: watch it from now on and
+		# catch up with anything that changed since the scan
+		rel = self._rel(path)
+		if rel is None:
+			return
+		self.watcher.addPath(path)
+		self._directories.add(rel)
+		self._timer.start()
+
+	def refresh_paths(self, paths):
+		# Files written in place (e.g. saved by the editor) without a directory event
+		for path in paths:
+			rel = self._rel(path)
+			if rel is not None:
+				self._files.add(rel)
+		self._timer.start()
+
+	def _rel(self, path):
+		path = os.path.abspath(path).replace(os.sep, '/')
+		if self.tree is None:
+			return None
+		if path + '/' == self._prefix:
+			return ''
+		if not path.startswith(self._prefix) or '/.git/' in path[len(self._prefix) - 1:] + '/':
+			return None
+		return path[len(self._prefix):]
+
+	def _on_directory_changed(self, path):
+		if self.tree is None:
+			return
+		rel = self._rel(path)
+		if rel is None:
+			self._index = True  # the git dir: index written, HEAD or a branch moved
+		else:
+			self._directories.add(rel)
+		self._timer.start()
+
+	def _submit(self):
+		if self.tree is None:
+			return
+		directories, self._directories = self._directories, set()
+		files, self._files = self._files, set()
+		index, self._index = self._index, False
+		self._run(self.tree.update, directories, files, index)
+
+	def _run(self, job, *args):
+		generation = self.generation
+		try:
+			future = _executor().submit(job, *args)
+		except RuntimeError:
+			return  # pool shut down (application closing)
+		future.add_done_callback(lambda f, g=generation: self._result.emit(g, f))
+
+	def _on_result(self, generation, future):
+		if generation != self.generation or future.cancelled() or future.exception() is not None:
+			return
+		changes = future.result()
+		if not changes:
+			return
+		root = self._prefix.rstrip('/')
+		for rel, status in changes.items():
+			path = self._prefix + rel if rel else root
+			if status is None:
+				self.statuses.pop(path, None)
+			else:
+				self.statuses[path] = status
+		self.changed.emit()
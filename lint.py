@@ -0,0 +1,227 @@
+import ast
+import builtins
+import warnings
+
+# Pure stdlib checks run in the checker worker process (see checker.py).
+# Kept free of Qt imports so the worker starts quickly.
+
+ERROR = 'error'
+WARNING = 'warning'
+
+BUILTIN_NAMES = frozenset(dir(builtins)) | {'__file__', '__name__', '__doc__', '__spec__',
+	'__loader__', '__package__', '__builtins__', '__path__', '__annotations__', '__dict__',
+	'__module__', '__qualname__', '__class__'}
+
+
+def diagnostic(line, col, end_col, severity, message):
+	return (line, col, end_col, severity, message)
+
+
+def check_source(source, filename='<editor>'):
+	# List of (line, col, end_col, severity, message); lines are 1-based
+	with warnings.catch_warnings(record=True) as caught:
+		warnings.simplefilter('always')
+		try:
+			tree = compile(source, filename, 'exec', ast.PyCF_ONLY_AST)
+			# The compiler stage catches what the parser does not ('return' outside
+			# a function, ...) and emits SyntaxWarnings such as `is` with a literal
+			compile(tree, filename, 'exec')
+		except SyntaxError as e:
+			line = e.lineno or 1
+			col = max((e.offset or 1) - 1, 0)
+			end_col = (e.end_offset - 1) if getattr(e, 'end_offset', None) and e.end_lineno == e.lineno else col + 1
+			return [diagnostic(line, col, max(end_col, col + 1), ERROR, e.msg)]
+		except (ValueError, MemoryError, RecursionError) as e:
+			return [diagnostic(1, 0, 1, ERROR, str(e))]
+	results = []
+	for w in caught:
+		if issubclass(w.category, SyntaxWarning):
+			results.append(diagnostic(w.lineno or 1, 0, 1, WARNING, str(w.message)))
+	results.extend(NameChecker(tree).run())
+	results.sort()
+	return results
+
+
+class _Scope:
+	def __init__(self, node, is_function):
+		self.node = node
+		self.is_function = is_function
+		self.assigned = {}   # name -> first Name node storing it
+		self.loaded = set()
+		self.declared = set()  # global / nonlocal
+
+
+class NameChecker(ast.NodeVisitor):
+	# A small pyflakes-style pass: unused imports, unused locals and names
+	# that are never bound anywhere in the module.
+	def __init__(self, tree):
+		self.tree = tree
+		self.results = []
+		self.imports = {}       # bound name -> import node (module level only)
+		self.bound = set(BUILTIN_NAMES)
+		self.loaded_everywhere = set()
+		self.name_loads = []    # (name, node)
+		self.star_import = False
+		self.exported = set()
+		self.scopes = []
+
+	def run(self):
+		self._collect_bindings(self.tree)
+		self.scopes.append(_Scope(self.tree, False))
+		self.visit(self.tree)
+		self.scopes.pop()
+		for name, node in self.imports.items():
+			if name not in self.loaded_everywhere and name not in self.exported:
+				self.results.append(diagnostic(node.lineno, node.col_offset, node.col_offset + len('import'),
+					WARNING, f"'{name}' imported but unused"))
+		if not self.star_import:
+			for name, node in self.name_loads:
+				if name not in self.bound:
+					self.results.append(diagnostic(node.lineno, node.col_offset, node.col_offset + len(name),
+						ERROR, f"undefined name '{name}'"))
+		return self.results
+
+	def _collect_bindings(self, tree):
+		# Every name bound in any scope; used for the (conservative) undefined check
+		for node in ast.walk(tree):
+			if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+				self.bound.add(node.id)
+			elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+				self.bound.add(node.name)
+			elif isinstance(node, ast.arg):
+				self.bound.add(node.arg)
+			elif isinstance(node, (ast.Import, ast.ImportFrom)):
+				for alias in node.names:
+					if alias.name == '*':
+						self.star_import = True
+					else:
+						self.bound.add((alias.asname or alias.name).split('.')[0])
+			elif isinstance(node, ast.ExceptHandler) and node.name:
+				self.bound.add(node.name)
+			elif isinstance(node, (ast.Global, ast.Nonlocal)):
+				self.bound.update(node.names)
+			elif isinstance(node, ast.MatchAs) and node.name:
+				self.bound.add(node.name)
+			elif isinstance(node, ast.MatchStar) and node.name:
+				self.bound.add(node.name)
+			elif isinstance(node, ast.MatchMapping) and node.rest:
+				self.bound.add(node.rest)
+			elif isinstance(node, ast.Assign):
+				for target in node.targets:
+					if isinstance(target, ast.Name) and target.id == '__all__':
+						self._collect_exports(node.value)
+
+	def _collect_exports(self, value):
+		if isinstance(value, (ast.List, ast.Tuple)):
+			for elt in value.elts:
+				if isinstance(elt, ast.Constant) and isinstance(elt.value, str):
+					self.exported.add(elt.value)
+
+	# ---------- Visitors ----------
+	def visit_Import(self, node):
+		if len(self.scopes) == 1:
+			for alias in node.names:
+				name = (alias.asname or alias.name).split('.')[0]
+				self.imports.setdefault(name, node)
+
+	def visit_ImportFrom(self, node):
+		if len(self.scopes) == 1 and node.module != '__future__':
+			for alias in node.names:
+				if alias.name != '*':
+					self.imports.setdefault(alias.asname or alias.name, node)
+
+	def visit_Name(self, node):
+		scope = self.scopes[-1]
+		if isinstance(node.ctx, ast.Load):
+			self.loaded_everywhere.add(node.id)
+			self.name_loads.append((node.id, node))
+			for s in self.scopes:
+				s.loaded.add(node.id)
+		elif isinstance(node.ctx, ast.Store):
+			scope.assigned.setdefault(node.id, node)
+
+	def visit_Global(self, node):
+		self.scopes[-1].declared.update(node.names)
+
+	visit_Nonlocal = visit_Global
+
+	def _visit_function(self, node):
+		for decorator in node.decorator_list:
+			self.visit(decorator)
+		self.visit(node.args)
+		if node.returns is not None:
+			self.visit(node.returns)
+		scope = _Scope(node, True)
+		self.scopes.append(scope)
+		for stmt in node.body:
+			self.visit(stmt)
+		self.scopes.pop()
+		for name, name_node in scope.assigned.items():
+			if name in scope.loaded or name in scope.declared or name.startswith('_'):
+				continue
+			if name in ('__tracebackhide__', '__traceback_info__', '__traceback_supplement__'):
+				continue
+			self.results.append(diagnostic(name_node.lineno, name_node.col_offset,
+				name_node.col_offset + len(name), WARNING, f"local variable '{name}' is assigned to but never used"))
+
+	visit_FunctionDef = _visit_function
+	visit_AsyncFunctionDef = _visit_function
+
+	def visit_AugAssign(self, node):
+		self.generic_visit(node)
+		if isinstance(node.target, ast.Name):
+			for s in self.scopes:
+				s.loaded.add(node.target.id)
+
+	def visit_For(self, node):
+		# Loop targets are commonly unused on purpose; do not report them
+		self.visit(node.iter)
+		scope = self.scopes[-1]
+		before = set(scope.assigned)
+		self.visit(node.target)
+		for name in set(scope.assigned) - before:
+			scope.loaded.add(name)
+		for stmt in node.body + node.orelse:
+			self.visit(stmt)
+
+	visit_AsyncFor = visit_For
+
+	def visit_Tuple(self, node):
+		# Tuple unpacking targets are not reported as unused either
+		self.generic_visit(node)
+		if isinstance(node.ctx, ast.Store) and self.scopes[-1].is_function:
+			for elt in node.elts:
+				if isinstance(elt, ast.Name):
+					self.scopes[-1].loaded.add(elt.id)
+
+	visit_List = visit_Tuple
+
+	def visit_withitem(self, node):
+		self.visit(node.context_expr)
+		if node.optional_vars is not None:
+			scope = self.scopes[-1]
+			before = set(scope.assigned)
+			self.visit(node.optional_vars)
+			for name in set(scope.assigned) - before:
+				scope.loaded.add(name)
+
+	def visit_ExceptHandler(self, node):
+		if node.type is not None:
+			self.visit(node.type)
+		for stmt in node.body:
+			self.visit(stmt)
+
+	def visit_ClassDef(self, node):
+		for expr in node.bases + node.keywords + node.decorator_list:
+			self.visit(expr)
+		# Class bodies are not function scopes: assignments there are attributes
+		scope = _Scope(node, False)
+		self.scopes.append(scope)
+		for stmt in node.body:
+			self.visit(stmt)
+		self.scopes.pop()
+
+	def visit_Constant(self, node):
+		# Names used only in string annotations still count as used imports
+		if isinstance(node.value, str) and node.value.isidentifier():
+			self.loaded_everywhere.add(node.value)
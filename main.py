@@ -2,9 +2,25 @@ import os
 import sys
 
 from texteditor import CodeEditor
-from theme_to_stylesheet import get_stylesheet
+from theme_to_stylesheet import get_stylesheet, list_themes, theme_diff
 from project_explorer import FileExplorerTree
-from console import ConsoleWidget
+from console import TerminalTabs
+from tab_memory import TabMemoryManager, format_bytes
+from settings_service import SettingsService
+from file_io import SavePipeline, ExternalChangeWatcher, read_text
+from find_replace import FindBar
+from debugger import DebugSession, DebugPanel
+from test_runner import TestPanel
+from outline import OutlinePanel
+from warm_run import WarmRunner
+import warm_run
+import telemetry
+import checker
+import git_status
+import find_replace
+import test_runner
+import outline
+import dir_listing
 
 from PySide6.QtWidgets import (
 	QApplication, QMainWindow, QSplitter, QTabWidget, QFileDialog,
@@ -16,17 +32,24 @@ from PySide6.QtGui import QAction, QIcon, QKeySequence
 from PySide6.QtWidgets import QKeySequenceEdit
 from PySide6.QtCore import Qt
 import fnmatch
+import difflib
+import itertools
 
 class SnyIDE(QMainWindow):
 	def __init__(self, project_path, *args):
 		super().__init__(*args)
 
-		self.theme_path = os.path.join(os.path.dirname(__file__), "default.json")
+		self.settings = SettingsService(self._settings_path(), self._default_settings(), parent=self)
+		self.settings.error.connect(lambda msg: QMessageBox.warning(self, 'Settings', msg))
+		if self.settings.load_error:
+			QMessageBox.warning(self, 'Settings', self.settings.load_error + '\nDefaults are used until it is fixed.')
+		self.theme_path = self._theme_file(self.settings.get('theme'))
 		self.current_project = os.path.abspath(project_path)
 		
 		# Explorer
 		self.Explorer = FileExplorerTree(self.current_project)
 		self.Explorer.setObjectName("explorer")
+		self.Explorer.apply_theme(self.theme_path)
 		self.Explorer.doubleClicked.connect(self.on_explorer_double_clicked)
 
 		# Tabs
@@ -34,9 +57,20 @@ class SnyIDE(QMainWindow):
 		self.tabs.setTabsClosable(True)
 		self.tabs.setMovable(True)
 		self.tabs.tabCloseRequested.connect(self.close_tab)
+		self.tabs.currentChanged.connect(self._on_current_tab_changed)
+		self.tab_memory = TabMemoryManager(0)
+		# Open documents by canonical path -> an editor showing that document
+		self.documents = {}
+		self.save_pipeline = SavePipeline(parent=self)
+		self.save_pipeline.saved.connect(self._on_saved)
+		self.save_pipeline.failed.connect(self._on_save_failed)
+		# Open files changed on disk by other tools are diffed into their tabs
+		self.file_watcher = ExternalChangeWatcher(parent=self)
+		self.file_watcher.changed.connect(self._on_file_changed_on_disk)
+		self._disk_prompt_open = False
 
 		# Console (bottom of right pane)
-		self.console = ConsoleWidget(cwd=self.current_project, parent=self)
+		self.terminals = TerminalTabs(cwd=self.current_project, parent=self)
 
 		# Right-side panel with topbar + (tabs|console) splitter
 		self.right_panel = QWidget()
@@ -46,10 +80,13 @@ class SnyIDE(QMainWindow):
 		# placeholder topbar; will be created in _create_topbar, but add a holder first
 		self.topbar_holder = QWidget()
 		right_layout.addWidget(self.topbar_holder)
+		# Find/replace bar above the editor tabs, hidden until Find is used
+		self.find_bar = FindBar(self.right_panel)
+		right_layout.addWidget(self.find_bar)
 		# Vertical splitter for editor tabs and console (resizable)
 		self.editor_console_splitter = QSplitter(Qt.Vertical)
 		self.editor_console_splitter.addWidget(self.tabs)
-		self.editor_console_splitter.addWidget(self.console)
+		self.editor_console_splitter.addWidget(self.terminals)
 		self.editor_console_splitter.setStretchFactor(0, 3)
 		self.editor_console_splitter.setStretchFactor(1, 1)
 		self.editor_console_splitter.setSizes([800, 200])
@@ -64,13 +101,46 @@ class SnyIDE(QMainWindow):
 		self.splitter.setStretchFactor(0, 0)
 		self.splitter.setStretchFactor(1, 1)
 
+		# Debugger: agent connection plus a side panel shown while debugging
+		self.debug_session = DebugSession(self)
+		self.debug_session.stopped.connect(self._on_debug_stopped)
+		self.debug_session.running.connect(self._on_debug_running)
+		self.debug_session.finished.connect(self._on_debug_finished)
+		self.debug_panel = DebugPanel(self.debug_session)
+		self.debug_panel.frameSelected.connect(lambda _i, path, line: self._show_execution_line(path, line))
+		self.debug_panel.setVisible(False)
+		self.splitter.addWidget(self.debug_panel)
+		self.splitter.setStretchFactor(2, 0)
+		self.test_panel = TestPanel(self.current_project, os.path.join(os.path.dirname(__file__), 'test_timings.json'))
+		self.test_panel.openRequested.connect(self._open_at_line)
+		self.test_panel.setVisible(False)
+		self.splitter.addWidget(self.test_panel)
+		self.splitter.setStretchFactor(3, 0)
+		self.outline_panel = OutlinePanel()
+		self.outline_panel.setVisible(False)
+		self.splitter.addWidget(self.outline_panel)
+		self.splitter.setStretchFactor(4, 0)
+		self._execution_editor = None
+		self.warm_runner = WarmRunner(self)
+		self._warm_console = None
+		self.warm_runner.output.connect(self._on_warm_output)
+		self.warm_runner.finished.connect(self._on_warm_run_finished)
+		self.warm_runner.started.connect(self._on_warm_run_started)
+		self.warm_runner.declined.connect(self._run_cold)
+		self.perf_overlay = telemetry.PerfOverlay(self)
+
 		# Menu and top status-like bar
 		self._create_menu()
 		self._create_topbar()
 
-		# Load settings
-		self._load_and_apply_shortcuts()
-		self._load_run_options()
+		# Load settings; subscribers re-apply them when they change
+		self._apply_shortcuts(self.settings.get('shortcuts'))
+		self._apply_run_options(self.settings.get('run_options'))
+		self._apply_editor_options(self.settings.get('editor'))
+		self.settings.subscribe('shortcuts', self._apply_shortcuts)
+		self.settings.subscribe('run_options', self._apply_run_options)
+		self.settings.subscribe('editor', self._apply_editor_options)
+		self.settings.subscribe('theme', lambda name: self.set_theme(self._theme_file(name)))
 
 		# Theme
 		self.setStyleSheet(get_stylesheet(self.theme_path))
@@ -100,8 +170,24 @@ class SnyIDE(QMainWindow):
 		self.action_open_folder.triggered.connect(self.open_project_dialog)
 		file_menu.addAction(self.action_open_folder)
 
+		self.action_save = QAction("Save", self)
+		self.action_save.triggered.connect(self.save_current)
+		file_menu.addAction(self.action_save)
+
+		self.action_save_as = QAction("Save As...", self)
+		self.action_save_as.triggered.connect(self.save_current_as)
+		file_menu.addAction(self.action_save_as)
+
+		self.action_save_all = QAction("Save All", self)
+		self.action_save_all.triggered.connect(self.save_all)
+		file_menu.addAction(self.action_save_all)
+
 		file_menu.addSeparator()
 
+		self.action_split_view = QAction("Split View", self)
+		self.action_split_view.triggered.connect(self.split_current_view)
+		file_menu.addAction(self.action_split_view)
+
 		self.action_close_tab = QAction("Close Tab", self)
 		self.action_close_tab.triggered.connect(lambda: self.close_tab(self.tabs.currentIndex()))
 		file_menu.addAction(self.action_close_tab)
@@ -114,30 +200,174 @@ class SnyIDE(QMainWindow):
 		self.action_exit.triggered.connect(self.close)
 		file_menu.addAction(self.action_exit)
 
+		# Edit menu
+		edit_menu = menubar.addMenu("Edit")
+		self.action_match_bracket = QAction("Go to Matching Bracket", self)
+		self.action_match_bracket.triggered.connect(lambda: self.current_editor() and self.current_editor().jump_to_matching_bracket())
+		edit_menu.addAction(self.action_match_bracket)
+		edit_menu.addSeparator()
+		self.action_find = QAction("Find...", self)
+		self.action_find.triggered.connect(lambda: self.find_bar.open())
+		edit_menu.addAction(self.action_find)
+		self.action_replace = QAction("Replace...", self)
+		self.action_replace.triggered.connect(lambda: self.find_bar.open(replace=True))
+		edit_menu.addAction(self.action_replace)
+		self.action_find_next = QAction("Find Next", self)
+		self.action_find_next.triggered.connect(lambda: self.find_bar.find_next())
+		edit_menu.addAction(self.action_find_next)
+		self.action_find_previous = QAction("Find Previous", self)
+		self.action_find_previous.triggered.connect(lambda: self.find_bar.find_previous())
+		edit_menu.addAction(self.action_find_previous)
+
+		# View menu
+		view_menu = menubar.addMenu("View")
+		self.theme_menu = view_menu.addMenu("Theme")
+		self.theme_menu.aboutToShow.connect(self._populate_theme_menu)
+		view_menu.addSeparator()
+		self.action_fold = QAction("Fold", self)
+		self.action_fold.triggered.connect(lambda: self.current_editor() and self.current_editor().fold_current())
+		view_menu.addAction(self.action_fold)
+		self.action_unfold = QAction("Unfold", self)
+		self.action_unfold.triggered.connect(lambda: self.current_editor() and self.current_editor().unfold_current())
+		view_menu.addAction(self.action_unfold)
+		self.action_fold_all = QAction("Fold All", self)
+		self.action_fold_all.triggered.connect(lambda: self.current_editor() and self.current_editor().fold_all())
+		view_menu.addAction(self.action_fold_all)
+		self.action_unfold_all = QAction("Unfold All", self)
+		self.action_unfold_all.triggered.connect(lambda: self.current_editor() and self.current_editor().unfold_all())
+		view_menu.addAction(self.action_unfold_all)
+		self.action_full_processing = QAction("Process Long Lines Fully", self)
+		self.action_full_processing.setCheckable(True)
+		self.action_full_processing.toggled.connect(lambda on: self.current_editor() and self.current_editor().set_full_processing(on))
+		view_menu.addAction(self.action_full_processing)
+		self.action_tail = QAction("Follow File (Tail)", self)
+		self.action_tail.setCheckable(True)
+		self.action_tail.toggled.connect(self.set_tail_mode)
+		view_menu.addAction(self.action_tail)
+		view_menu.addSeparator()
+		self.action_show_outline = QAction("Outline", self)
+		self.action_show_outline.triggered.connect(self.toggle_outline_panel)
+		view_menu.addAction(self.action_show_outline)
+		self.action_perf_overlay = QAction("Performance Overlay", self)
+		self.action_perf_overlay.setCheckable(True)
+		self.action_perf_overlay.toggled.connect(self.perf_overlay.set_active)
+		view_menu.addAction(self.action_perf_overlay)
+		self.action_export_trace = QAction("Export Performance Trace...", self)
+		self.action_export_trace.triggered.connect(self.export_performance_trace)
+		view_menu.addAction(self.action_export_trace)
+
+		# Debug menu (Debug/Resume also sit on the top bar)
+		debug_menu = menubar.addMenu("Debug")
+		self.action_debug = QAction(self._icon('debug_run.svg'), "Debug", self)
+		debug_menu.addAction(self.action_debug)
+		self.action_resume = QAction(self._icon('resume_execution.svg'), "Resume", self)
+		debug_menu.addAction(self.action_resume)
+		self.action_step_over = QAction("Step Over", self)
+		self.action_step_over.triggered.connect(self.debug_session.step_over)
+		debug_menu.addAction(self.action_step_over)
+		self.action_step_into = QAction("Step Into", self)
+		self.action_step_into.triggered.connect(self.debug_session.step_into)
+		debug_menu.addAction(self.action_step_into)
+		self.action_step_out = QAction("Step Out", self)
+		self.action_step_out.triggered.connect(self.debug_session.step_out)
+		debug_menu.addAction(self.action_step_out)
+		debug_menu.addSeparator()
+		self.action_toggle_breakpoint = QAction("Toggle Breakpoint", self)
+		self.action_toggle_breakpoint.triggered.connect(lambda: self.current_editor() and self.current_editor().toggle_breakpoint())
+		debug_menu.addAction(self.action_toggle_breakpoint)
+		self._set_debug_paused(False)
+
+		# Tests menu
+		tests_menu = menubar.addMenu("Tests")
+		self.action_show_tests = QAction("Show Tests", self)
+		self.action_show_tests.triggered.connect(self.toggle_test_panel)
+		tests_menu.addAction(self.action_show_tests)
+		self.action_run_tests = QAction("Run All Tests", self)
+		self.action_run_tests.triggered.connect(lambda: self._show_test_panel().run_all())
+		tests_menu.addAction(self.action_run_tests)
+		self.action_rerun_tests = QAction("Run Failed and Changed Tests", self)
+		self.action_rerun_tests.triggered.connect(lambda: self._show_test_panel().run_failed_and_changed())
+		tests_menu.addAction(self.action_rerun_tests)
+
 		# Terminal menu
 		terminal_menu = menubar.addMenu("Terminal")
 		self.action_toggle_console = QAction("Toggle Console", self)
 		self.action_toggle_console.triggered.connect(self.toggle_console)
 		terminal_menu.addAction(self.action_toggle_console)
 
+		self.action_new_terminal = QAction("New Terminal", self)
+		self.action_new_terminal.triggered.connect(self.new_terminal)
+		terminal_menu.addAction(self.action_new_terminal)
+
 		self.action_terminal_clear = QAction("Clear", self)
-		self.action_terminal_clear.triggered.connect(self.console.clear)
+		self.action_terminal_clear.triggered.connect(lambda: self.console.clear())
 		terminal_menu.addAction(self.action_terminal_clear)
 
 		self.action_terminal_restart = QAction("Restart Shell", self)
-		self.action_terminal_restart.triggered.connect(self.console.restart)
+		self.action_terminal_restart.triggered.connect(lambda: self.console.restart())
 		terminal_menu.addAction(self.action_terminal_restart)
 
+		terminal_menu.addSeparator()
+		self.action_warm_run = QAction("Warm Python Runs", self)
+		self.action_warm_run.setCheckable(True)
+		self.action_warm_run.setEnabled(warm_run.available())
+		self.action_warm_run.toggled.connect(
+			lambda on: self.settings.set('editor', dict(self.settings.get('editor'), warm_run=on)))
+		terminal_menu.addAction(self.action_warm_run)
+
+	def _populate_theme_menu(self):
+		self.theme_menu.clear()
+		current = os.path.abspath(self.theme_path)
+		for path in list_themes():
+			name = os.path.splitext(os.path.basename(path))[0]
+			action = self.theme_menu.addAction(name.capitalize())
+			action.setCheckable(True)
+			action.setChecked(os.path.abspath(path) == current)
+			action.triggered.connect(lambda checked=False, p=path: self.set_theme(p))
+
+	def set_theme(self, theme_path):
+		theme_path = os.path.abspath(theme_path)
+		if theme_path == os.path.abspath(self.theme_path):
+			return
+		sections, colors_changed = theme_diff(self.theme_path, theme_path)
+		self.theme_path = theme_path
+		self.settings.set('theme', os.path.basename(theme_path))
+		if sections:
+			# Qt cannot patch part of a style sheet, so the (cached) sheet is set
+			# once with repaints held off until every widget is repolished
+			self.setUpdatesEnabled(False)
+			try:
+				self.setStyleSheet(get_stylesheet(theme_path))
+			finally:
+				self.setUpdatesEnabled(True)
+		self.Explorer.apply_theme(theme_path)
+		# Gutter colors are per view; syntax colors are per document and only
+		# visible documents rehighlight now, the rest when they are shown
+		for i in range(self.tabs.count()):
+			w = self.tabs.widget(i)
+			if isinstance(w, CodeEditor):
+				w.apply_theme(theme_path, syntax=colors_changed)
+
 	def _update_window_title(self):
 		self.setWindowTitle(f"SnyIDE - {self.current_project}")
 
+	@property
+	def console(self):
+		# The terminal tab in front; runs and Terminal menu actions go there
+		return self.terminals.current_console()
+
+	def new_terminal(self):
+		if not self.terminals.isVisible():
+			self.toggle_console()
+		self.terminals.new_terminal()
+
 	def toggle_console(self):
-		if self.console.isVisible():
+		if self.terminals.isVisible():
 			self._console_prev_sizes = self.editor_console_splitter.sizes()
-			self.console.setVisible(False)
+			self.terminals.setVisible(False)
 			# allocate all space to tabs automatically
 		else:
-			self.console.setVisible(True)
+			self.terminals.setVisible(True)
 			if self._console_prev_sizes and len(self._console_prev_sizes) == 2:
 				self.editor_console_splitter.setSizes(self._console_prev_sizes)
 			else:
@@ -164,9 +394,6 @@ class SnyIDE(QMainWindow):
 		self.action_debug.triggered.connect(self.debug_active_file)
 		self.action_resume = getattr(self, 'action_resume', QAction(self._icon('resume_execution.svg'), "Resume", self))
 		self.action_resume.triggered.connect(self.resume_execution)
-		# Disable unimplemented actions for now
-		self.action_debug.setEnabled(False)
-		self.action_resume.setEnabled(False)
 		
 		# Buttons
 		btn_run = QPushButton()
@@ -212,29 +439,161 @@ class SnyIDE(QMainWindow):
 		if not editor or not getattr(editor, 'file_path', None):
 			return  # No file selected; do nothing
 		path = os.path.abspath(editor.file_path)
+		if not self._run_warm(path):
+			self._run_cold(path)
+
+	def _run_cold(self, path):
 		cmd = self._command_for_file(path)
 		if not cmd:
 			return  # No matching run option; do nothing
 		self.console.execute_line(cmd)
 
+	def _run_warm(self, path):
+		# Python files run as a fork of the warm server when that mode is on;
+		# anything it cannot take (server starting, stale imports) runs cold,
+		# straight away or once the server declines it
+		if not self.action_warm_run.isChecked() or not path.endswith('.py'):
+			return False
+		return not self.warm_runner.is_running() and self.warm_runner.run(path, self.console.cwd)
+
+	def _on_warm_run_started(self):
+		if not self.terminals.isVisible():
+			self.toggle_console()
+		self._warm_console = self.console
+		self._warm_console.input_sink = self.warm_runner.write_input
+
+	def _on_warm_output(self, text):
+		try:
+			(self._warm_console or self.console).write(text)
+		except RuntimeError:
+			self._warm_console = None  # its terminal tab was closed
+			self.console.write(text)
+
+	def _on_warm_run_finished(self, code, seconds):
+		console, self._warm_console = self._warm_console, None
+		try:
+			console.input_sink = None
+		except (AttributeError, RuntimeError):
+			return  # its terminal tab was closed
+		status = 'killed' if code is None or code < 0 else f'exit code {code}'
+		console.write(f"\n[warm run finished: {status}, {seconds:.2f}s]\n")
+
+	def _apply_warm_run(self):
+		if self.settings.value('editor', 'warm_run', bool, False) and warm_run.available():
+			preload = self.settings.get('editor').get('warm_run_preload') or []
+			self.warm_runner.configure(self.current_project, [str(name) for name in preload])
+		else:
+			self.warm_runner.shutdown()
+
 	def debug_active_file(self):
-		# Not implemented; button is disabled
-		pass
+		editor = self.current_editor()
+		if not editor or not getattr(editor, 'file_path', None):
+			return
+		path = os.path.abspath(editor.file_path)
+		cmd = self.debug_session.command(path)
+		if not cmd:
+			return
+		self.debug_session.replace_breakpoints(self._all_breakpoints())
+		self.debug_panel.setVisible(True)
+		if not self.terminals.isVisible():
+			self.toggle_console()
+		self.console.execute_line(cmd)
 
 	def stop_execution(self):
+		if self.debug_session.is_active():
+			self.debug_session.stop()
+			return
+		if self.warm_runner.is_running():
+			self.warm_runner.stop()
+			return
 		# Best-effort: restart the shell
 		self.console.restart()
 
 	def resume_execution(self):
-		# Not implemented; button is disabled
-		pass
+		self.debug_session.resume()
+
+	def export_performance_trace(self):
+		path, _ = QFileDialog.getSaveFileName(self, "Export Performance Trace", os.path.join(self.current_project, 'snyide-trace.json'), "Trace (*.json)")
+		if not path:
+			return
+		try:
+			count = telemetry.export_chrome_trace(path)
+		except OSError as e:
+			QMessageBox.warning(self, 'Export Performance Trace', str(e))
+			return
+		if not count:
+			QMessageBox.information(self, 'Export Performance Trace', 'No samples recorded; turn on View > Performance Overlay first.')
+
+	# ---------- Tests ----------
+	def toggle_test_panel(self):
+		if self.test_panel.isVisible():
+			self.test_panel.setVisible(False)
+		else:
+			self._show_test_panel().refresh()
+
+	def _show_test_panel(self):
+		self.test_panel.setVisible(True)
+		return self.test_panel
+
+	def toggle_outline_panel(self):
+		self.outline_panel.setVisible(not self.outline_panel.isVisible())
+
+	def _open_at_line(self, path, line):
+		editor = self.open_file(path) if os.path.isfile(path) else None
+		if editor is not None:
+			editor.go_to_line(line)
+			editor.setFocus()
+
+	# ---------- Debugging ----------
+	def _all_breakpoints(self):
+		breakpoints = {}
+		for editor in self.documents.values():
+			lines = editor.breakpoints.lines()
+			if editor.file_path and lines:
+				breakpoints[os.path.abspath(editor.file_path)] = lines
+		return breakpoints
+
+	def _sync_breakpoints(self):
+		if self.debug_session.is_active():
+			self.debug_session.replace_breakpoints(self._all_breakpoints())
+
+	def _set_debug_paused(self, paused):
+		for action in (self.action_resume, self.action_step_over, self.action_step_into, self.action_step_out):
+			action.setEnabled(paused)
+
+	def _show_execution_line(self, path, line):
+		if self._execution_editor is not None:
+			try:
+				self._execution_editor.set_execution_line(None)
+			except RuntimeError:
+				pass  # tab was closed
+			self._execution_editor = None
+		editor = self.open_file(path) if path and os.path.isfile(path) else None
+		if editor is not None:
+			editor.set_execution_line(line)
+			self._execution_editor = editor
+
+	def _on_debug_stopped(self, message):
+		self._set_debug_paused(True)
+		stack = message.get('stack') or [{}]
+		self._show_execution_line(stack[0].get('file'), stack[0].get('line'))
+		self.activateWindow()
+
+	def _on_debug_running(self):
+		self._set_debug_paused(False)
+		self._show_execution_line(None, None)
+
+	def _on_debug_finished(self):
+		self._on_debug_running()
 
 	def new_tab(self):
 		editor = CodeEditor(self.theme_path)
+		self._configure_editor(editor)
 		idx = self.tabs.addTab(editor, os.path.basename(getattr(editor, 'file_path', '') or 'Untitled'))
 		self.tabs.setCurrentIndex(idx)
 		# Remove placeholder if present
 		self._remove_placeholder_if_present()
+		self._refresh_tab_tooltips()
 		return editor
 
 	def set_tab_title(self, index, path):
@@ -242,15 +601,188 @@ class SnyIDE(QMainWindow):
 		self.tabs.setTabText(index, name)
 		self.tabs.setTabToolTip(index, path or "")
 
-	def open_file(self, path):
+	def _configure_editor(self, editor):
+		editor.modificationChanged.connect(self._refresh_tab_titles)
+		editor.breakpoints.changed.connect(self._sync_breakpoints)
+		self._configure_editor_options(editor)
+
+	def _configure_editor_options(self, editor):
+		budget_mb = self.settings.value('editor', 'undo_budget_mb', float, 0)
+		editor.set_undo_budget(int(budget_mb * 1024 * 1024))
+		editor.checker.set_delay(self.settings.value('editor', 'lint_delay_ms', int, 500))
+		large_mb = self.settings.value('editor', 'large_file_mb', float, 16)
+		editor.set_large_file_threshold(int(large_mb * 1024 * 1024))
+		editor.set_minimap_enabled(self.settings.value('editor', 'minimap', bool, True))
+		editor.set_long_line_limit(self.settings.value('editor', 'long_line_chars', int, 10000))
+
+	def _refresh_tab_titles(self, *_):
+		# Tab text is the file name, with a trailing * while the document has unsaved changes
+		for i in range(self.tabs.count()):
+			w = self.tabs.widget(i)
+			if not isinstance(w, CodeEditor):
+				continue
+			name = os.path.basename(w.file_path) if w.file_path else "Untitled"
+			self.tabs.setTabText(i, name + (" *" if w.is_modified() else ""))
+
+	# ---------- Saving ----------
+	def save_current(self):
+		editor = self.current_editor()
+		if editor is None:
+			return
+		if editor.is_tailing():
+			return  # only the end of the file is loaded
+		if not editor.file_path:
+			self.save_current_as()
+			return
+		self.save_pipeline.save(editor)
+
+	def save_current_as(self):
+		editor = self.current_editor()
+		if editor is None:
+			return
+		path, _ = QFileDialog.getSaveFileName(self, "Save As", editor.file_path or self.current_project)
+		if not path:
+			return
+		other = self.documents.get(self._canonical_path(path))
+		if other is not None and other not in editor.views():
+			# One document per file: saving over another open tab would leave two
+			QMessageBox.warning(self, "Save As", f"'{os.path.basename(path)}' is open in another tab. Close that tab first to save over it.")
+			return
+		self.save_pipeline.save(editor, path)
+
+	def save_all(self):
+		editors = [self.tabs.widget(i) for i in range(self.tabs.count())]
+		editors = [w for w in editors if isinstance(w, CodeEditor) and not w.is_tailing()]
+		for editor in editors:
+			if editor.is_hibernated() and editor.is_modified():
+				editor.restore()
+		self.save_pipeline.save_all(editors)
+
+	def _on_saved(self, editor, path):
+		if editor.file_path != path:
+			# Save As: every view now shows the new file
+			for key, registered in list(self.documents.items()):
+				if registered in editor.views():
+					del self.documents[key]
+					self.file_watcher.unwatch(key)
+			for view in editor.views():
+				view.file_path = path
+			self.documents[self._canonical_path(path)] = editor
+		self.file_watcher.watch(self._canonical_path(path))
+		self._refresh_tab_titles()
+		self._refresh_tab_tooltips()
+		self.Explorer.git_status.refresh_paths([path])
+
+	def _on_file_changed_on_disk(self, key):
+		editor = self.documents.get(key)
+		if editor is None or self.file_watcher.is_current(key) or self._disk_prompt_open:
+			return
+		if editor.is_hibernated() or self.save_pipeline.is_saving(editor):
+			return  # checked again when the tab is shown / saved
+		if editor.is_tailing():
+			return
+		try:
+			text, encoding, newline = read_text(editor.file_path, editor.encoding)
+		except OSError:
+			return
+		if text == editor.toPlainText():
+			self.file_watcher.acknowledge(key)
+			return
+		if editor.is_modified():
+			# Unsaved edits here and a new version on disk: ask, showing the difference
+			self._disk_prompt_open = True
+			try:
+				reload = self._confirm_disk_reload(editor, text)
+			finally:
+				self._disk_prompt_open = False
+			self.file_watcher.acknowledge(key)
+			if not reload:
+				return
+		editor.apply_external_text(text)
+		for view in editor.views():
+			view.encoding, view.newline = encoding, newline
+		editor.document().setModified(False)
+		self.file_watcher.acknowledge(key)
+
+	def _confirm_disk_reload(self, editor, text):
+		name = os.path.basename(editor.file_path)
+		diff = difflib.unified_diff(editor.toPlainText().split('\n'), text.split('\n'),
+									f'{name} (unsaved)', f'{name} (on disk)', lineterm='', n=2)
+		details = '\n'.join(itertools.islice(diff, 400))
+		box = QMessageBox(QMessageBox.Warning, "File Changed on Disk",
+						  f"{name} was changed on disk and also has unsaved changes here.", parent=self)
+		box.setInformativeText("Reload takes the version on disk (your edits stay in the undo history). "
+							   "Keep leaves your version, which overwrites the file when saved.")
+		box.setDetailedText(details)
+		reload = box.addButton("Reload from Disk", QMessageBox.AcceptRole)
+		box.addButton("Keep My Changes", QMessageBox.RejectRole)
+		box.exec()
+		return box.clickedButton() is reload
+
+	def set_tail_mode(self, enabled):
+		# Follows the current file as it grows (logs); leaving reloads it whole
+		editor = self.current_editor()
+		if editor is None:
+			return
+		if enabled and not editor.is_tailing():
+			if editor.is_modified() or not editor.start_tail(self.settings.value('editor', 'tail_max_lines', int, 100000)):
+				QMessageBox.information(self, 'Follow File', 'Only saved files shown in a single view can be followed.')
+				self.action_tail.blockSignals(True)
+				self.action_tail.setChecked(False)
+				self.action_tail.blockSignals(False)
+		elif not enabled and editor.is_tailing():
+			editor.stop_tail()
+			self.file_watcher.acknowledge(self._canonical_path(editor.file_path))
+
+	def _on_save_failed(self, editor, path, message):
+		QMessageBox.warning(self, "Save", f"Failed to save {path}:\n{message}")
+
+	def _canonical_path(self, path):
+		return os.path.normcase(os.path.realpath(path))
+
+	def _tab_index_of(self, widget):
+		for i in range(self.tabs.count()):
+			if self.tabs.widget(i) is widget:
+				return i
+		return -1
+
+	def open_file(self, path, split=False):
 		if not os.path.isfile(path):
 			return
+		key = self._canonical_path(path)
+		existing = self.documents.get(key)
+		if existing is not None:
+			if split:
+				return self._add_view(existing)
+			# Already open: focus it instead of loading a second copy
+			self.tabs.setCurrentIndex(self._tab_index_of(existing))
+			return existing
 		editor = CodeEditor(self.theme_path)
 		editor.load_from_file(path)
+		self._configure_editor(editor)
+		self.documents[key] = editor
+		self.file_watcher.watch(key)
 		idx = self.tabs.addTab(editor, os.path.basename(path))
 		self.tabs.setCurrentIndex(idx)
 		self.tabs.setTabToolTip(idx, path)
 		self._remove_placeholder_if_present()
+		self._refresh_tab_tooltips()
+		return editor
+
+	def _add_view(self, source):
+		# New tab showing the same QTextDocument and highlighter as `source`
+		editor = CodeEditor(self.theme_path, shared=source)
+		self._configure_editor(editor)
+		title = os.path.basename(source.file_path or '') or 'Untitled'
+		idx = self.tabs.insertTab(self._tab_index_of(source) + 1, editor, title)
+		self.tabs.setCurrentIndex(idx)
+		self._refresh_tab_tooltips()
+		return editor
+
+	def split_current_view(self):
+		editor = self.current_editor()
+		if editor is not None:
+			self._add_view(editor)
 
 	def close_tab(self, index):
 		if index < 0:
@@ -260,12 +792,54 @@ class SnyIDE(QMainWindow):
 		if getattr(widget, 'objectName', lambda: '')() == 'noFileWidget':
 			return
 		# For future: prompt to save if modified
+		if isinstance(widget, CodeEditor):
+			self._forget_view(widget)
+		self.tab_memory.remove(widget)
 		self.tabs.removeTab(index)
 		if widget is not None:
 			widget.deleteLater()
 		if self.tabs.count() == 0:
 			self.show_placeholder()
 
+	def _forget_view(self, editor):
+		editor.detach_view()
+		remaining = editor.views()
+		for key, registered in list(self.documents.items()):
+			if registered is editor:
+				if remaining:
+					self.documents[key] = remaining[0]
+				else:
+					del self.documents[key]
+					self.file_watcher.unwatch(key)
+
+	def _on_current_tab_changed(self, index):
+		widget = self.tabs.widget(index)
+		self.find_bar.set_editor(widget if isinstance(widget, CodeEditor) else None)
+		if isinstance(widget, CodeEditor):
+			if not self.tab_memory.activate(widget):
+				QMessageBox.warning(self, "Open", f"Failed to reload {widget.file_path}:\n{widget.restore_error}")
+			self._refresh_tab_tooltips()
+			# Changes to hibernated tabs (or missed events) are picked up when shown
+			if widget.file_path:
+				self._on_file_changed_on_disk(self._canonical_path(widget.file_path))
+		self.outline_panel.set_editor(widget if isinstance(widget, CodeEditor) else None)
+		self.action_full_processing.blockSignals(True)
+		self.action_full_processing.setChecked(isinstance(widget, CodeEditor) and widget.is_full_processing())
+		self.action_full_processing.blockSignals(False)
+		self.action_tail.blockSignals(True)
+		self.action_tail.setChecked(isinstance(widget, CodeEditor) and widget.is_tailing())
+		self.action_tail.blockSignals(False)
+
+	def _refresh_tab_tooltips(self):
+		# Tooltips show the path plus the current memory estimate of each tab
+		for i in range(self.tabs.count()):
+			w = self.tabs.widget(i)
+			if not isinstance(w, CodeEditor):
+				continue
+			state = " (hibernated)" if w.is_hibernated() else ""
+			self.tabs.setTabToolTip(i, f"{w.file_path or 'Untitled'}\nMemory: {format_bytes(w.memory_usage())}{state}"
+				f"\nUndo history: {format_bytes(w.undo_memory_usage())}")
+
 	def open_file_dialog(self):
 		path, _ = QFileDialog.getOpenFileName(self, "Open File", self.current_project)
 		if path:
@@ -276,14 +850,14 @@ class SnyIDE(QMainWindow):
 		if path:
 			self.current_project = path
 			self.Explorer.set_project_path(path)
-			self.console.set_working_directory(path)
+			self.terminals.set_working_directory(path)
+			self.test_panel.set_root(path)
+			self._apply_warm_run()
 			self._update_window_title()
 
 	def on_explorer_double_clicked(self, proxy_index):
-		# Map from proxy to source to get the real path
-		source_index = self.Explorer.proxy_model.mapToSource(proxy_index)
-		path = self.Explorer.fs_model.filePath(source_index)
-		if os.path.isfile(path):
+		path = self.Explorer.file_path(proxy_index)
+		if path and os.path.isfile(path):
 			self.open_file(path)
 
 	def show_placeholder(self):
@@ -318,27 +892,38 @@ class SnyIDE(QMainWindow):
 			'open_file': 'Ctrl+O',
 			'open_folder': 'Ctrl+Shift+O',
 			'close_tab': 'Ctrl+W',
+			'save': 'Ctrl+S',
+			'save_as': 'Ctrl+Shift+S',
+			'save_all': 'Ctrl+Alt+Shift+S',
+			'split_view': 'Ctrl+\\',
+			'match_bracket': 'Ctrl+Shift+M',
+			'find': 'Ctrl+F',
+			'replace': 'Ctrl+H',
+			'find_next': 'F3',
+			'find_previous': 'Shift+F3',
+			'fold': 'Ctrl+Shift+[',
+			'unfold': 'Ctrl+Shift+]',
+			'fold_all': 'Ctrl+K, Ctrl+0',
+			'unfold_all': 'Ctrl+K, Ctrl+J',
 			'exit': 'Alt+F4',
 			'terminal_clear': 'Ctrl+L',
 			'toggle_console': 'Ctrl+`',
+			'new_terminal': 'Ctrl+Shift+`',
 			'settings': 'Ctrl+Alt+S',
 			'run_file': 'Ctrl+Shift+F10',
 			'stop': 'Ctrl+F2',
 			'debug': 'Shift+F9',
-			'resume': 'F9'
+			'step_over': 'F8',
+			'step_into': 'F7',
+			'step_out': 'Shift+F8',
+			'toggle_breakpoint': 'Ctrl+F8',
+			'resume': 'F9',
+			'show_tests': 'Ctrl+Alt+T',
+			'run_tests': 'Ctrl+Alt+R',
+			'rerun_tests': 'Ctrl+Alt+F',
+			'show_outline': 'Alt+7'
 		}
 
-	def _load_and_apply_shortcuts(self):
-		import json
-		shortcuts = self._default_shortcuts()
-		try:
-			with open(self._settings_path(), 'r', encoding='utf-8') as f:
-				user = json.load(f).get('shortcuts', {})
-				shortcuts.update(user)
-		except Exception:
-			pass
-		self._apply_shortcuts(shortcuts)
-
 	def _default_run_options(self):
 		# pattern => command template
 		return {
@@ -346,17 +931,79 @@ class SnyIDE(QMainWindow):
 			"*.txt": "notepad $path"
 		}
 
-	def _load_run_options(self):
-		import json
-		opts = self._default_run_options()
-		try:
-			with open(self._settings_path(), 'r', encoding='utf-8') as f:
-				user = json.load(f).get('run_options', {})
-				if isinstance(user, dict):
-					opts.update(user)
-		except Exception:
-			pass
-		self.run_options = opts
+	def _apply_run_options(self, opts):
+		self.run_options = opts if isinstance(opts, dict) else self._default_run_options()
+
+	def _default_editor_options(self):
+		return {
+			# Inactive tabs are hibernated once all tabs together exceed this
+			"memory_budget_mb": 512,
+			# Per-document undo history, in bytes rather than steps
+			"undo_budget_mb": 16,
+			# Pause in typing before the background syntax/lint check runs
+			"lint_delay_ms": 500,
+			"minimap": True,
+			# Files at least this large open without optional views such as the minimap
+			"large_file_mb": 16,
+			# Lines longer than this are only partly highlighted and skipped by completion; 0 = no limit
+			"long_line_chars": 10000,
+			# Lines kept in a tab following a growing file (View > Follow File); older ones are dropped
+			"tail_max_lines": 100000,
+			# Explorer directories with more entries than this are listed in pages with a filter
+			"large_directory_entries": 5000,
+			# Worker processes for the test panel; 0 uses one per CPU
+			"test_workers": 0,
+			# Run .py files as forks of a server with these modules already imported (Unix)
+			"warm_run": False,
+			"warm_run_preload": [],
+			# Consoles run the shell on a pseudo-terminal (Linux) instead of pipes
+			"console_pty": True
+		}
+
+	def _apply_editor_options(self, opts):
+		self.editor_options = opts
+		budget_mb = self.settings.value('editor', 'memory_budget_mb', float, 0)
+		self.tab_memory.set_budget(int(budget_mb * 1024 * 1024))
+		self.test_panel.workers = self.settings.value('editor', 'test_workers', int, 0) or os.cpu_count() or 2
+		self.action_warm_run.blockSignals(True)
+		self.action_warm_run.setChecked(self.settings.value('editor', 'warm_run', bool, False) and warm_run.available())
+		self.action_warm_run.blockSignals(False)
+		self._apply_warm_run()
+		self.terminals.pool.set_use_pty(self.settings.value('editor', 'console_pty', bool, True))
+		self.Explorer.set_large_directory_threshold(self.settings.value('editor', 'large_directory_entries', int, 5000))
+		for i in range(self.tabs.count()):
+			w = self.tabs.widget(i)
+			if isinstance(w, CodeEditor):
+				self._configure_editor_options(w)
+
+	def _default_settings(self):
+		return {
+			'shortcuts': self._default_shortcuts(),
+			'run_options': self._default_run_options(),
+			'editor': self._default_editor_options(),
+			'theme': 'default.json',
+		}
+
+	def _theme_file(self, name):
+		base_dir = os.path.dirname(__file__)
+		path = os.path.join(base_dir, name or 'default.json')
+		return path if os.path.isfile(path) else os.path.join(base_dir, 'default.json')
+
+	def closeEvent(self, event):
+		# Write any settings change still waiting for the debounce timer
+		self.settings.flush()
+		self.save_pipeline.shutdown()
+		checker.shutdown()
+		find_replace.shutdown()
+		git_status.shutdown()
+		outline.shutdown()
+		dir_listing.shutdown()
+		self.debug_session.stop()
+		self.test_panel.runner.stop()
+		test_runner.shutdown()
+		self.warm_runner.shutdown()
+		self.terminals.shutdown()
+		super().closeEvent(event)
 
 	def _command_for_file(self, path: str) -> str | None:
 		name = os.path.basename(path)
@@ -372,15 +1019,37 @@ class SnyIDE(QMainWindow):
 		self.action_open_file.setShortcut(QKeySequence(s['open_file']))
 		self.action_open_folder.setShortcut(QKeySequence(s['open_folder']))
 		self.action_close_tab.setShortcut(QKeySequence(s['close_tab']))
+		self.action_split_view.setShortcut(QKeySequence(s['split_view']))
+		self.action_match_bracket.setShortcut(QKeySequence(s['match_bracket']))
+		self.action_find.setShortcut(QKeySequence(s['find']))
+		self.action_replace.setShortcut(QKeySequence(s['replace']))
+		self.action_find_next.setShortcut(QKeySequence(s['find_next']))
+		self.action_find_previous.setShortcut(QKeySequence(s['find_previous']))
+		self.action_fold.setShortcut(QKeySequence(s['fold']))
+		self.action_unfold.setShortcut(QKeySequence(s['unfold']))
+		self.action_fold_all.setShortcut(QKeySequence(s['fold_all']))
+		self.action_unfold_all.setShortcut(QKeySequence(s['unfold_all']))
+		self.action_save.setShortcut(QKeySequence(s['save']))
+		self.action_save_as.setShortcut(QKeySequence(s['save_as']))
+		self.action_save_all.setShortcut(QKeySequence(s['save_all']))
 		self.action_settings.setShortcut(QKeySequence(s['settings']))
 		self.action_exit.setShortcut(QKeySequence(s['exit']))
 		self.action_terminal_clear.setShortcut(QKeySequence(s['terminal_clear']))
 		self.action_toggle_console.setShortcut(QKeySequence(s['toggle_console']))
+		self.action_new_terminal.setShortcut(QKeySequence(s['new_terminal']))
 		# Toolbar/Topbar actions
 		self.action_run_file.setShortcut(QKeySequence(s['run_file']))
 		self.action_stop.setShortcut(QKeySequence(s['stop']))
 		self.action_debug.setShortcut(QKeySequence(s['debug']))
 		self.action_resume.setShortcut(QKeySequence(s['resume']))
+		self.action_step_over.setShortcut(QKeySequence(s['step_over']))
+		self.action_step_into.setShortcut(QKeySequence(s['step_into']))
+		self.action_step_out.setShortcut(QKeySequence(s['step_out']))
+		self.action_toggle_breakpoint.setShortcut(QKeySequence(s['toggle_breakpoint']))
+		self.action_show_tests.setShortcut(QKeySequence(s['show_tests']))
+		self.action_run_tests.setShortcut(QKeySequence(s['run_tests']))
+		self.action_rerun_tests.setShortcut(QKeySequence(s['rerun_tests']))
+		self.action_show_outline.setShortcut(QKeySequence(s['show_outline']))
 
 	def open_settings_dialog(self):
 		from PySide6.QtWidgets import QWidget
@@ -396,9 +1065,15 @@ class SnyIDE(QMainWindow):
 				# Shortcuts editors
 				labels = [
 					('Run', 'run_file'), ('Stop', 'stop'), ('Debug', 'debug'), ('Resume', 'resume'),
-					('Toggle Console', 'toggle_console'),
+					('Step Over', 'step_over'), ('Step Into', 'step_into'), ('Step Out', 'step_out'),
+					('Toggle Breakpoint', 'toggle_breakpoint'),
+					('Show Tests', 'show_tests'), ('Run All Tests', 'run_tests'), ('Run Failed and Changed Tests', 'rerun_tests'),
+					('Toggle Console', 'toggle_console'), ('New Terminal', 'new_terminal'), ('Outline', 'show_outline'),
 					('New Tab', 'new_tab'), ('Open File', 'open_file'), ('Open Folder', 'open_folder'),
-					('Close Tab', 'close_tab'), ('Terminal: Clear', 'terminal_clear'), ('Settings', 'settings'), ('Exit', 'exit')
+					('Close Tab', 'close_tab'), ('Save', 'save'), ('Save As', 'save_as'), ('Save All', 'save_all'),
+					('Split View', 'split_view'), ('Go to Matching Bracket', 'match_bracket'),
+					('Find', 'find'), ('Replace', 'replace'), ('Find Next', 'find_next'), ('Find Previous', 'find_previous'),
+					('Fold', 'fold'), ('Unfold', 'unfold'), ('Fold All', 'fold_all'), ('Unfold All', 'unfold_all'), ('Terminal: Clear', 'terminal_clear'), ('Settings', 'settings'), ('Exit', 'exit')
 				]
 				for label, key in labels:
 					edit = QKeySequenceEdit()
@@ -439,44 +1114,15 @@ class SnyIDE(QMainWindow):
 					if pat and cmd:
 						opts[pat] = cmd
 				return opts
-		# Load current settings
-		shortcuts = self._default_shortcuts()
-		run_opts = self._default_run_options()
-		import json
-		try:
-			with open(self._settings_path(), 'r', encoding='utf-8') as f:
-				data = json.load(f)
-				shortcuts.update(data.get('shortcuts', {}))
-				run_opts.update(data.get('run_options', {}))
-		except Exception:
-			pass
-		dlg = SettingsDialog(self, shortcuts, run_opts)
+		dlg = SettingsDialog(self, self.settings.get('shortcuts'), self.settings.get('run_options'))
 		if dlg.exec() == QDialog.Accepted:
-			new_shortcuts = dlg.shortcuts_values()
-			new_run_opts = dlg.run_opts_values()
-			# Save (merge with any unknown future fields)
-			data = {}
-			try:
-				with open(self._settings_path(), 'r', encoding='utf-8') as f:
-					data = json.load(f)
-			except Exception:
-				data = {}
-			data['shortcuts'] = new_shortcuts
-			data['run_options'] = new_run_opts
-			try:
-				with open(self._settings_path(), 'w', encoding='utf-8') as f:
-					json.dump(data, f, indent=2)
-			except Exception as e:
-				QMessageBox.warning(self, 'Settings', f'Failed to save settings: {e}')
-			# Apply
-			merged = self._default_shortcuts()
-			merged.update(new_shortcuts)
-			self._apply_shortcuts(merged)
-			self.run_options = self._default_run_options()
-			self.run_options.update(new_run_opts)
-
-
-app = QApplication(sys.argv)
-ide = SnyIDE('.')
-ide.show()
-sys.exit(app.exec())
+			# Subscribers apply the new values; the write is atomic and debounced
+			self.settings.set('shortcuts', dlg.shortcuts_values())
+			self.settings.set('run_options', dlg.run_opts_values())
+
+if __name__ == '__main__':
+	# Guarded so worker processes started with 'spawn' can import this module
+	app = QApplication(sys.argv)
+	ide = SnyIDE('.')
+	ide.show()
+	sys.exit(app.exec())
@@ -0,0 +1,191 @@
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QRect
+from PySide6.QtGui import QColor, QImage, QPainter
+from PySide6.QtWidgets import QWidget
+
+from brackets import BlockData
+
+
+class Minimap(QWidget):
+	# Downsampled overview of an editor's document: one pixel per column and
+	# LINE_HEIGHT pixels per line, drawn from the token colors the highlighter
+	# caches in each block's BlockData. The image is kept in tiles of
+	# TILE_LINES lines; every row remembers the block data it was drawn from,
+	# so a paint only redraws rows whose block was rehighlighted or shifted
+	# since. Scrolling repaints the viewport indicator and, once the document
+	# is taller than the strip, blits the cached tiles at the new offset.
+	WIDTH = 96
+	LINE_HEIGHT = 2
+	TILE_LINES = 256
+	MAX_TILES = 12
+
+	def __init__(self, editor):
+		super().__init__(editor)
+		self.editor = editor
+		self.setObjectName('minimap')
+		self.setCursor(Qt.PointingHandCursor)
+		self._tiles = OrderedDict()  # tile index -> (QImage, [row keys])
+		self._indicator = QRect()
+		self._offset = 0
+		self._background = QColor()
+		self._foreground = QColor()
+		self.apply_colors(editor.colors)
+		editor.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+	def apply_colors(self, theme):
+		self._background = QColor(theme.get('EditorBG', '#2B2B2B'))
+		self._foreground = QColor(theme.get('colors', {}).get('default', '#D6D6DD'))
+		self.invalidate()
+
+	def invalidate(self):
+		self._tiles.clear()
+		self.update()
+
+	def attach(self, document):
+		# Called when the editor swaps documents (hibernate/restore)
+		self.invalidate()
+		if document is not None:
+			document.contentsChange.connect(self._on_contents_change)
+
+	def _on_contents_change(self, _position, _removed, _added):
+		# Which rows changed is settled at paint time by comparing row keys,
+		# which also catches blocks rehighlighted further down the document
+		if self.isVisible():
+			self.update()
+
+	# ---------- Geometry ----------
+
+	def _scroll_offset(self):
+		# Pixel offset of the first drawn row; the map scrolls in proportion
+		# to the editor once the whole document no longer fits
+		total = self.editor.document().blockCount() * self.LINE_HEIGHT
+		if total <= self.height():
+			return 0
+		bar = self.editor.verticalScrollBar()
+		fraction = bar.value() / bar.maximum() if bar.maximum() else 0
+		return int((total - self.height()) * fraction)
+
+	def _indicator_rect(self, offset):
+		editor = self.editor
+		first = editor.firstVisibleBlock().blockNumber()
+		last = editor.cursorForPosition(editor.viewport().rect().bottomLeft()).blockNumber()
+		top = first * self.LINE_HEIGHT - offset
+		return QRect(0, top, self.width(), max((last - first + 1) * self.LINE_HEIGHT, self.LINE_HEIGHT))
+
+	def _on_scrolled(self, _value):
+		if not self.isVisible():
+			return
+		offset = self._scroll_offset()
+		if offset != self._offset:
+			self.update()
+			return
+		# The map itself did not move: only the old and new indicator areas change
+		indicator = self._indicator_rect(offset)
+		self.update(self._indicator.united(indicator).adjusted(0, -1, 0, 1))
+		self._indicator = indicator
+
+	# ---------- Tiles ----------
+
+	def _tile(self, index, first_row=0, last_row=TILE_LINES - 1):
+		# Tile image with rows first_row..last_row brought up to date
+		tile = self._tiles.get(index)
+		if tile is None:
+			image = QImage(self.WIDTH, self.TILE_LINES * self.LINE_HEIGHT, QImage.Format_RGB32)
+			image.fill(self._background)
+			tile = (image, [False] * self.TILE_LINES)
+			self._tiles[index] = tile
+			while len(self._tiles) > self.MAX_TILES:
+				self._tiles.popitem(last=False)
+		else:
+			self._tiles.move_to_end(index)
+		image, keys = tile
+		painter = None
+		block = self.editor.document().findBlockByNumber(index * self.TILE_LINES + first_row)
+		for row in range(first_row, last_row + 1):
+			if block.isValid():
+				data = block.userData()
+				key = (data if isinstance(data, BlockData) else None, block.revision())
+			else:
+				key = None
+			if keys[row] is False or keys[row] != key:
+				if painter is None:
+					painter = QPainter(image)
+				self._draw_row(painter, row, block if key is not None else None)
+				keys[row] = key
+			if block.isValid():
+				block = block.next()
+		if painter is not None:
+			painter.end()
+		return image
+
+	def _draw_row(self, painter, row, block):
+		y = row * self.LINE_HEIGHT
+		painter.fillRect(0, y, self.WIDTH, self.LINE_HEIGHT, self._background)
+		if block is None:
+			return
+		text = block.text()
+		# Column of every character with tabs expanded, clipped to the strip
+		columns = []
+		col = 0
+		for ch in text:
+			if col >= self.WIDTH:
+				break
+			columns.append(col)
+			col += 4 if ch == '\t' else 1
+		height = self.LINE_HEIGHT - 1 or 1
+		fg = QColor(self._foreground)
+		fg.setAlpha(150)
+		start = None
+		for i, c in enumerate(columns):
+			if text[i].isspace():
+				if start is not None:
+					painter.fillRect(start, y, c - start, height, fg)
+					start = None
+			elif start is None:
+				start = c
+		if start is not None:
+			painter.fillRect(start, y, col - start, height, fg)
+		data = block.userData()
+		if isinstance(data, BlockData):
+			for begin, length, rgba in data.spans:
+				if begin >= len(columns):
+					continue
+				end = begin + length
+				x = columns[begin]
+				x_end = columns[end] if end < len(columns) else min(col, self.WIDTH)
+				painter.fillRect(x, y, x_end - x, height, QColor.fromRgba(rgba))
+
+	# ---------- Events ----------
+
+	def paintEvent(self, event):
+		painter = QPainter(self)
+		painter.fillRect(event.rect(), self._background)
+		offset = self._scroll_offset()
+		self._offset = offset
+		tile_height = self.TILE_LINES * self.LINE_HEIGHT
+		lines = self.editor.document().blockCount()
+		first_line = (offset + event.rect().top()) // self.LINE_HEIGHT
+		last_line = min(offset + event.rect().bottom(), lines * self.LINE_HEIGHT) // self.LINE_HEIGHT
+		for index in range(first_line // self.TILE_LINES, last_line // self.TILE_LINES + 1):
+			base = index * self.TILE_LINES
+			image = self._tile(index, max(first_line - base, 0), min(last_line - base, self.TILE_LINES - 1))
+			painter.drawImage(0, index * tile_height - offset, image)
+		self._indicator = self._indicator_rect(offset)
+		shade = QColor(self._foreground)
+		shade.setAlpha(40)
+		painter.fillRect(self._indicator, shade)
+
+	def mousePressEvent(self, event):
+		if event.button() == Qt.LeftButton:
+			self._scroll_to(event.position().y())
+
+	def mouseMoveEvent(self, event):
+		if event.buttons() & Qt.LeftButton:
+			self._scroll_to(event.position().y())
+
+	def _scroll_to(self, y):
+		# Centre the clicked line in the editor
+		line = int(y + self._offset) // self.LINE_HEIGHT
+		page = self._indicator.height() // self.LINE_HEIGHT
+		self.editor.verticalScrollBar().setValue(max(line - page // 2, 0))
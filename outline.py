@@ -0,0 +1,179 @@
+import ast
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import Signal, Qt, QTimer
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem
+
+_pool = None
+
+PYTHON_SUFFIXES = ('.py', '.pyw')
+
+
+def _executor():
+	# One background thread parses for the outline panel
+	global _pool
+	if _pool is None:
+		_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outline')
+	return _pool
+
+
+def shutdown():
+	global _pool
+	if _pool is not None:
+		_pool.shutdown(wait=False, cancel_futures=True)
+		_pool = None
+
+
+def parse_outline(text):
+	# Nested (label, line, children) tuples for the classes and functions of
+	# `text`; raises SyntaxError (or ValueError) if it does not parse
+	return _symbols(ast.parse(text).body)
+
+
+def _symbols(body):
+	found = []
+	for node in body:
+		if isinstance(node, ast.ClassDef):
+			found.append((f'class {node.name}', node.lineno, _symbols(node.body)))
+		elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+			prefix = 'async def' if isinstance(node, ast.AsyncFunctionDef) else 'def'
+			found.append((f'{prefix} {node.name}()', node.lineno, _symbols(node.body)))
+		else:
+			# Definitions under if/try/with/for/match belong to the enclosing scope
+			for field in ('body', 'orelse', 'finalbody', 'handlers', 'cases'):
+				children = getattr(node, field, None)
+				if isinstance(children, list):
+					for child in children:
+						found.extend(_symbols(child.body if isinstance(child, (ast.ExceptHandler, ast.match_case)) else [child]))
+	return tuple(found)
+
+
+class OutlinePanel(QWidget):
+	# Classes and functions of the current tab, rebuilt from an ast parse of
+	# a document snapshot on the background thread once typing pauses. The
+	# tree is updated in place (items matched by label in order), so
+	# expansion, selection and scroll position survive edits; a snapshot that
+	# does not parse leaves the last good outline in place.
+	_parsed = Signal(int, object)  # generation, future (emitted from the pool's thread)
+
+	def __init__(self, delay_ms=400, parent=None):
+		super().__init__(parent)
+		self.setObjectName('outlinePanel')
+		self.editor = None
+		self.document = None
+		self.generation = 0
+		self._dirty = False
+		self._timer = QTimer(self)
+		self._timer.setSingleShot(True)
+		self._timer.setInterval(delay_ms)
+		self._timer.timeout.connect(self._submit)
+		self._parsed.connect(self._on_parsed)
+
+		layout = QVBoxLayout(self)
+		layout.setContentsMargins(0, 0, 0, 0)
+		layout.setSpacing(2)
+		self.status = QLabel('')
+		self.status.setContentsMargins(6, 3, 6, 3)
+		layout.addWidget(self.status)
+		self.tree = QTreeWidget()
+		self.tree.setHeaderLabels(['Symbol', 'Line'])
+		self.tree.setUniformRowHeights(True)
+		self.tree.itemClicked.connect(self._on_item_clicked)
+		self.tree.itemActivated.connect(self._on_item_clicked)
+		layout.addWidget(self.tree, 1)
+
+	def set_editor(self, editor):
+		# Follows the current tab
+		if self.document is not None:
+			try:
+				self.document.contentsChanged.disconnect(self._schedule)
+			except (RuntimeError, TypeError):
+				pass
+		self.generation += 1  # anything in flight belongs to the old tab
+		self._timer.stop()
+		path = editor.file_path if editor is not None else None
+		if editor is None or (path is not None and not path.lower().endswith(PYTHON_SUFFIXES)):
+			self.editor = self.document = None
+			self._sync(self.tree.invisibleRootItem(), ())
+			self.status.setText('No Python file' if editor is not None else '')
+			return
+		self.editor = editor
+		self.document = editor.document()
+		self.document.contentsChanged.connect(self._schedule)
+		# The last good outline is kept per document, next to its symbol index
+		self.tree.clear()
+		self._sync(self.tree.invisibleRootItem(), editor.Highlighter.outline or ())
+		self.tree.expandAll()
+		self.status.setText('')
+		self._dirty = True
+		if self.isVisible():
+			self._submit()
+
+	def _schedule(self):
+		self._dirty = True
+		if self.isVisible():
+			self._timer.start()
+
+	def showEvent(self, event):
+		super().showEvent(event)
+		if self._dirty:
+			self._submit()
+
+	def _submit(self):
+		if self.editor is None or not self._dirty:
+			return
+		self._dirty = False
+		generation = self.generation
+		text = self.document.toPlainText()
+		try:
+			future = _executor().submit(parse_outline, text)
+		except RuntimeError:
+			return  # pool shut down (application closing)
+		future.add_done_callback(lambda f, g=generation: self._parsed.emit(g, f))
+
+	def _on_parsed(self, generation, future):
+		if generation != self.generation or future.cancelled() or self.editor is None:
+			return
+		error = future.exception()
+		if error is not None:
+			line = getattr(error, 'lineno', None)
+			self.status.setText(f'Syntax error{f" at line {line}" if line else ""}; showing the last good outline')
+			return
+		symbols = future.result()
+		self.editor.Highlighter.outline = symbols
+		self.status.setText('')
+		self._sync(self.tree.invisibleRootItem(), symbols)
+
+	def _sync(self, parent, symbols):
+		# Reuses the children of `parent` whose label matches, in order; only
+		# new symbols get items and only vanished ones are removed
+		existing = {}
+		for i in range(parent.childCount()):
+			item = parent.child(i)
+			existing.setdefault(item.text(0), []).append(item)
+		items = []
+		for label, line, children in symbols:
+			candidates = existing.get(label)
+			items.append(candidates.pop(0) if candidates else None)
+		for leftovers in existing.values():
+			for item in leftovers:
+				parent.removeChild(item)
+		for index, ((label, line, children), item) in enumerate(zip(symbols, items)):
+			if item is None:
+				item = QTreeWidgetItem([label, str(line)])
+				item.setData(1, Qt.TextAlignmentRole, Qt.AlignRight)
+				parent.insertChild(index, item)
+				item.setExpanded(True)
+			elif parent.indexOfChild(item) != index:
+				expanded = item.isExpanded()
+				parent.takeChild(parent.indexOfChild(item))
+				parent.insertChild(index, item)
+				item.setExpanded(expanded)
+			if item.text(1) != str(line):
+				item.setText(1, str(line))
+			self._sync(item, children)
+
+	def _on_item_clicked(self, item, _column=0):
+		if self.editor is not None:
+			self.editor.go_to_line(int(item.text(1)))
+			self.editor.setFocus()
@@ -1,8 +1,12 @@
 import os
 import shutil
 from PySide6.QtWidgets import QWidget, QTreeView, QVBoxLayout, QFileSystemModel, QFileIconProvider, QMenu, QInputDialog, QMessageBox, QAbstractItemView
-from PySide6.QtCore import QSortFilterProxyModel, QDir, Qt, QPoint
-from PySide6.QtGui import QIcon, QAction
+from PySide6.QtCore import (QSortFilterProxyModel, QIdentityProxyModel, QModelIndex, QPersistentModelIndex, QMimeData,
+                            QFileSystemWatcher, QTimer, QUrl, QDir, Qt, QPoint, Signal)
+from PySide6.QtGui import QIcon, QAction, QColor, QFont
+import dir_listing
+from git_status import GitStatus, MODIFIED, ADDED, UNTRACKED
+from theme_to_stylesheet import load_theme
 
 class ProjectPathFilterProxy(QSortFilterProxyModel):
     def __init__(self, project_path, source_model):
@@ -10,10 +14,31 @@ class ProjectPathFilterProxy(QSortFilterProxyModel):
         self.project_path = os.path.abspath(project_path)
         self._parent = os.path.dirname(project_path)
         self.source_model = source_model
+        self.git_status = None
+        self.status_colors = {}
+        self.icons = None
+        self.pager = None
+
+    def data(self, index, role=Qt.DisplayRole):
+        # Icons are looked up for painted rows only, not as directories load
+        if role == Qt.DecorationRole and self.icons is not None and index.column() == 0:
+            source = self.mapToSource(index)
+            return self.icons.icon_for(self.source_model.fileName(source), self.source_model.isDir(source))
+        # Git status colors the name; statuses are looked up, never computed, here
+        if role == Qt.ForegroundRole or role == Qt.ToolTipRole:
+            status = self.git_status.status(self.source_model.filePath(self.mapToSource(index))) if self.git_status else None
+            if status is not None:
+                return self.status_colors.get(status) if role == Qt.ForegroundRole else status.capitalize()
+        return super().data(index, role)
 
     def filterAcceptsRow(self, source_row, source_parent):
         index = self.source_model.index(source_row, 0, source_parent)
-        file_path = os.path.abspath(self.source_model.filePath(index))
+        raw_path = self.source_model.filePath(index)
+        # Paged directories show their own rows; entries QFileSystemModel
+        # loads there anyway (an index() lookup of a file inside) stay hidden
+        if self.pager is not None and self.pager.is_paged(os.path.dirname(raw_path)):
+            return False
+        file_path = os.path.abspath(raw_path)
         if file_path.startswith(self._parent):
                 if file_path == self._parent:
                         return True
@@ -21,6 +46,11 @@ class ProjectPathFilterProxy(QSortFilterProxyModel):
                         return True
         return False
 
+    def fetchMore(self, parent):
+        # Directories are sized up before QFileSystemModel loads them
+        if self.pager is None or self.pager.may_load(parent):
+            super().fetchMore(parent)
+
 class CustomIconProvider(QFileIconProvider):
     def __init__(self, base_dir):
         super().__init__()
@@ -33,13 +63,345 @@ class CustomIconProvider(QFileIconProvider):
 
     def icon(self, info):  # info is QFileInfo
         try:
-            if info.isDir():
-                return self.folder_icon
-            ext = info.suffix().lower()
-            return self.ext_icons.get(ext, self.default_file_icon)
+            return self.icon_for(info.fileName(), info.isDir())
         except Exception:
             return self.default_file_icon
 
+    def icon_for(self, name, is_dir):
+        if is_dir:
+            return self.folder_icon
+        ext = name.rsplit('.', 1)[-1].lower() if '.' in name else ''
+        return self.ext_icons.get(ext, self.default_file_icon)
+
+
+class LargeDirectory:
+    # Paged listing of one directory too big to load into QFileSystemModel
+    def __init__(self, ident, path, anchor):
+        self.id = ident
+        self.path = path
+        self.anchor = anchor        # QPersistentModelIndex of the directory's row
+        self.entries = None         # sorted (name, is_dir) once listed
+        self.matches = None         # entries containing filter_text
+        self.filter_text = ''
+        self.shown = 0              # rows exposed so far; the placeholder follows them
+        self.generation = 0
+
+    def visible_entries(self):
+        if self.filter_text:
+            return self.matches or []
+        return self.entries or []
+
+    def remaining(self):
+        return len(self.visible_entries()) - self.shown
+
+    def placeholder_text(self):
+        if self.entries is None or (self.filter_text and self.matches is None):
+            return 'Listing…'
+        more = f'{self.remaining()} more…' if self.remaining() else ''
+        if self.filter_text:
+            return f"Filter '{self.filter_text}': {len(self.matches)} matches" + (f', {more}' if more else '')
+        return f'{more} (type to filter)' if more else f'{len(self.entries)} entries (type to filter)'
+
+
+class LargeDirectoryProxy(QIdentityProxyModel):
+    # Sits between the filtered file system model and the tree. Before a
+    # directory is first loaded its entries are counted on a worker thread;
+    # past `threshold` QFileSystemModel never loads it. Instead the worker
+    # lists and sorts it once, rows are exposed a page at a time (the tree asks
+    # for the next page when the trailing "N more…" row scrolls into view) and
+    # typing on that row filters the listing.
+    PAGE = 500
+    largeDirectoryFound = Signal(str)
+    directoryListed = Signal(str)
+    _done = Signal(object, object)  # callback, future (emitted from the pool's thread)
+
+    def __init__(self, icons, threshold=5000):
+        super().__init__()
+        self.icons = icons
+        self.threshold = threshold
+        self._dirs = {}         # id -> LargeDirectory; ids stay valid for the model's lifetime
+        self._paths = {}        # path -> LargeDirectory
+        self._small = set()     # directories known to be under the threshold
+        self._counting = {}     # path -> QPersistentModelIndex
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._on_directory_changed)
+        self._changed = set()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(500)
+        self._timer.timeout.connect(self._relist_changed)
+        self._done.connect(self._on_done)
+        self.placeholder_font = QFont()
+        self.placeholder_font.setItalic(True)
+
+    # ---------- Lookup ----------
+    def _fs(self):
+        return self.sourceModel().source_model
+
+    # The tree calls the methods below for every row it lays out, so they
+    # check the (usually empty) id table before anything else. Rows of large
+    # directories carry their directory's id; an invalid index has id 0.
+    def _virtual(self, index):
+        return self._dirs.get(index.internalId()) if self._dirs else None
+
+    def _large(self, index):
+        if not self._dirs or not index.isValid() or index.column() != 0:
+            return None
+        for d in self._dirs.values():
+            if d.anchor.isValid() and d.anchor == index:
+                return d
+        return None
+
+    def is_paged(self, path):
+        return path in self._paths
+
+    def large_directories(self):
+        return [d for d in self._dirs.values() if d.anchor.isValid()]
+
+    def directory_of(self, index):
+        return self._virtual(index)
+
+    def is_placeholder(self, index):
+        d = self._virtual(index)
+        return d is not None and index.row() == d.shown
+
+    def file_path(self, index):
+        d = self._virtual(index)
+        if d is None:
+            return self._fs().filePath(self.sourceModel().mapToSource(self.mapToSource(index)))
+        entries = d.visible_entries()
+        if index.row() >= min(d.shown, len(entries)):
+            return None
+        return d.path + '/' + entries[index.row()][0]
+
+    def set_threshold(self, threshold):
+        self.threshold = threshold
+        self._small.clear()
+
+    # ---------- Structure ----------
+    def mapToSource(self, index):
+        if self._dirs and index.internalId() in self._dirs:
+            return QModelIndex()
+        return super().mapToSource(index)
+
+    def rowCount(self, parent=QModelIndex()):
+        if self._dirs:
+            if parent.internalId() in self._dirs:
+                return 0
+            d = self._large(parent)
+            if d is not None:
+                return d.shown + 1
+        return super().rowCount(parent)
+
+    def columnCount(self, parent=QModelIndex()):
+        if self._dirs and parent.internalId() in self._dirs:
+            return 0
+        return super().columnCount(parent)
+
+    def hasChildren(self, parent=QModelIndex()):
+        if self._dirs:
+            if parent.internalId() in self._dirs:
+                return False
+            if self._large(parent) is not None:
+                return True
+        return super().hasChildren(parent)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if self._dirs:
+            d = self._large(parent)
+            if d is not None:
+                if 0 <= row <= d.shown and 0 <= column < self.columnCount(parent):
+                    return self.createIndex(row, column, d.id)
+                return QModelIndex()
+            if parent.internalId() in self._dirs:
+                return QModelIndex()
+        return super().index(row, column, parent)
+
+    def parent(self, child=None):
+        if child is None:
+            return super().parent()
+        if self._dirs:
+            d = self._dirs.get(child.internalId())
+            if d is not None:
+                return QModelIndex(d.anchor) if d.anchor.isValid() else QModelIndex()
+        return super().parent(child)
+
+    def sibling(self, row, column, index):
+        if self._dirs and index.internalId() in self._dirs:
+            return self.index(row, column, self.parent(index))
+        return super().sibling(row, column, index)
+
+    def flags(self, index):
+        d = self._dirs.get(index.internalId()) if self._dirs else None
+        if d is None:
+            return super().flags(index)
+        flags = Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemNeverHasChildren
+        if index.row() < d.shown:
+            flags |= Qt.ItemIsDragEnabled
+        return flags
+
+    def data(self, index, role=Qt.DisplayRole):
+        d = self._virtual(index)
+        if d is not None:
+            return self._virtual_data(d, index, role)
+        return super().data(index, role)
+
+    def _virtual_data(self, d, index, role):
+        if index.column() != 0:
+            return None
+        if index.row() == d.shown:
+            if role == Qt.DisplayRole:
+                return d.placeholder_text()
+            if role == Qt.FontRole:
+                return self.placeholder_font
+            if role == Qt.ToolTipRole:
+                return f'{d.path} is listed in pages. Type here to filter it; Backspace and Escape edit the filter.'
+            return None
+        entries = d.visible_entries()
+        if index.row() >= len(entries):
+            return None
+        name, is_dir = entries[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == Qt.DecorationRole:
+            return self.icons.icon_for(name, is_dir)
+        if role == Qt.ForegroundRole or role == Qt.ToolTipRole:
+            filtered = self.sourceModel()
+            status = filtered.git_status.status(d.path + '/' + name) if filtered.git_status else None
+            if status is not None:
+                return filtered.status_colors.get(status) if role == Qt.ForegroundRole else status.capitalize()
+        return None
+
+    def mimeData(self, indexes):
+        if not any(self._virtual(index) is not None for index in indexes):
+            return super().mimeData(indexes)
+        paths = {self.file_path(index) for index in indexes if index.column() == 0}
+        data = QMimeData()
+        data.setUrls([QUrl.fromLocalFile(path) for path in sorted(p for p in paths if p)])
+        return data
+
+    def canDropMimeData(self, data, action, row, column, parent):
+        if self._virtual(parent) is not None:
+            return False
+        return super().canDropMimeData(data, action, row, column, parent)
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if self._virtual(parent) is not None:
+            return False
+        return super().dropMimeData(data, action, row, column, parent)
+
+    # ---------- Loading ----------
+    def may_load(self, source_parent):
+        # Asked by the filter proxy before QFileSystemModel loads a directory.
+        # Most are small and load once counted; directories it has already
+        # loaded (the project root) stay as they are.
+        filtered = self.sourceModel()
+        path = filtered.source_model.filePath(filtered.mapToSource(source_parent))
+        if not path or path in self._small or filtered.rowCount(source_parent):
+            return True
+        if path not in self._paths and path not in self._counting:
+            self._counting[path] = QPersistentModelIndex(source_parent)
+            self._submit(lambda f, path=path: self._on_counted(path, f.result()),
+                         dir_listing.count_entries, path, self.threshold + 1)
+        return False
+
+    def _submit(self, callback, fn, *args):
+        try:
+            future = dir_listing.submit(fn, *args)
+        except RuntimeError:
+            return  # pool shut down (application closing)
+        future.add_done_callback(lambda f: self._done.emit(callback, f))
+
+    def _on_done(self, callback, future):
+        if not future.cancelled() and future.exception() is None:
+            callback(future)
+
+    def _on_counted(self, path, count):
+        anchor = self._counting.pop(path, None)
+        if anchor is None or not anchor.isValid():
+            return
+        source_parent = QModelIndex(anchor)
+        if count <= self.threshold or self.sourceModel().rowCount(source_parent):
+            self._small.add(path)
+            self.sourceModel().fetchMore(source_parent)
+            return
+        parent = self.mapFromSource(source_parent)
+        d = LargeDirectory(len(self._dirs) + 1, path, QPersistentModelIndex(parent))
+        self.beginInsertRows(parent, 0, 0)
+        self._dirs[d.id] = d
+        self._paths[path] = d
+        self.endInsertRows()
+        self.watcher.addPath(path)
+        self.largeDirectoryFound.emit(path)
+        self._list(d)
+
+    def _list(self, d):
+        d.generation += 1
+        self._submit(lambda f, g=d.generation: self._on_listed(d, g, f.result()), dir_listing.list_entries, d.path)
+
+    def _on_listed(self, d, generation, entries):
+        if generation != d.generation or not d.anchor.isValid():
+            return
+        keep = max(d.shown, self.PAGE)
+        self._clear_rows(d)
+        d.entries = entries
+        self.directoryListed.emit(d.path)
+        if d.filter_text:
+            self.set_filter(d, d.filter_text)
+        else:
+            self._show(d, keep)
+
+    def _clear_rows(self, d):
+        if d.shown:
+            self.beginRemoveRows(QModelIndex(d.anchor), 0, d.shown - 1)
+            d.shown = 0
+            self.endRemoveRows()
+
+    def _show(self, d, count):
+        count = min(count, d.remaining())
+        if count > 0:
+            self.beginInsertRows(QModelIndex(d.anchor), d.shown, d.shown + count - 1)
+            d.shown += count
+            self.endInsertRows()
+        placeholder = self.index(d.shown, 0, QModelIndex(d.anchor))
+        self.dataChanged.emit(placeholder, placeholder)
+
+    def fetch_page(self, d):
+        if d.anchor.isValid() and d.entries is not None and d.remaining() > 0:
+            self._show(d, self.PAGE)
+
+    def set_filter(self, d, text):
+        d.filter_text = text
+        d.generation += 1
+        self._clear_rows(d)
+        if not text:
+            d.matches = None
+            self._show(d, self.PAGE)
+            return
+        d.matches = None
+        self._show(d, 0)
+        if d.entries is not None:
+            self._submit(lambda f, g=d.generation: self._on_filtered(d, g, f.result()),
+                         dir_listing.filter_entries, d.entries, text)
+
+    def _on_filtered(self, d, generation, matches):
+        if generation != d.generation or not d.anchor.isValid():
+            return
+        d.matches = matches
+        self._show(d, self.PAGE)
+
+    def _on_directory_changed(self, path):
+        # Files come and go in busy directories; relist once things settle
+        self._changed.add(path)
+        self._timer.start()
+
+    def _relist_changed(self):
+        changed, self._changed = self._changed, set()
+        for d in self.large_directories():
+            if d.path in changed:
+                self._list(d)
+
+
 class FileExplorerTree(QTreeView):
     def __init__(self, project_path):
         super().__init__()
@@ -51,14 +413,33 @@ class FileExplorerTree(QTreeView):
         self.fs_model.setFilter(QDir.NoDotAndDotDot | QDir.AllDirs | QDir.Files)
         self.fs_model.setRootPath(project_path)
         self.fs_model.setReadOnly(False)
-        # Custom icons
+        # Custom icons, looked up by the view model for painted rows only
         base_dir = os.path.dirname(__file__)
-        self.fs_model.setIconProvider(CustomIconProvider(base_dir))
+        self.icons = CustomIconProvider(base_dir)
+        self.fs_model.setIconProvider(None)
 
         self.proxy_model = ProjectPathFilterProxy(project_path, self.fs_model)
         self.proxy_model.setSourceModel(self.fs_model)
+        self.proxy_model.icons = self.icons
+        # Huge directories are paged instead of loaded whole. The paging model
+        # costs every row a few Python calls, so the tree only switches to it
+        # once such a directory turns up.
+        self.view_model = LargeDirectoryProxy(self.icons)
+        self.view_model.setSourceModel(self.proxy_model)
+        self.proxy_model.pager = self.view_model
+        self.view_model.largeDirectoryFound.connect(self._on_large_directory)
+
+        # Git status decorations, kept up to date in the background
+        self.git_status = GitStatus(parent=self)
+        self.git_status.changed.connect(self.viewport().update)
+        self.fs_model.directoryLoaded.connect(self.git_status.watch_directory)
+        self.view_model.directoryListed.connect(self.git_status.watch_directory)
+        self.proxy_model.git_status = self.git_status
+        self.apply_theme(os.path.join(base_dir, 'default.json'))
+        self.git_status.set_root(project_path)
 
         self.setModel(self.proxy_model)
+        self.setUniformRowHeights(True)
         self._apply_root(project_path)
 
         self.setRootIsDecorated(True)
@@ -84,14 +465,88 @@ class FileExplorerTree(QTreeView):
         self.customContextMenuRequested.connect(self._show_context_menu)
         self._context_target_dir = None
 
+        # Next pages of huge directories load as their "more" row scrolls into view
+        self._page_timer = QTimer(self)
+        self._page_timer.setSingleShot(True)
+        self._page_timer.setInterval(0)
+        self._page_timer.timeout.connect(self._fetch_visible_pages)
+        self.verticalScrollBar().valueChanged.connect(self._page_timer.start)
+        self.expanded.connect(self._page_timer.start)
+        self.view_model.rowsInserted.connect(self._page_timer.start)
+
+    def view_index(self, source_index):
+        index = self.proxy_model.mapFromSource(source_index)
+        return self.view_model.mapFromSource(index) if self.model() is self.view_model else index
+
+    def file_path(self, index):
+        # Path of a row of the tree; None for the "more" row of a huge directory
+        if not index.isValid():
+            return None
+        if self.model() is self.view_model:
+            return self.view_model.file_path(index)
+        return self.fs_model.filePath(self.proxy_model.mapToSource(index))
+
+    def set_large_directory_threshold(self, entries):
+        self.view_model.set_threshold(entries)
+
     def _apply_root(self, project_path):
         project_path = os.path.abspath(project_path)
         parent = os.path.dirname(project_path)
-        source_parent_index = self.fs_model.index(parent)
-        proxy_root_index = self.proxy_model.mapFromSource(source_parent_index)
-        self.setRootIndex(proxy_root_index)
+        self.setRootIndex(self.view_index(self.fs_model.index(parent)))
         # Expand the project root
-        self.expand(self.proxy_model.mapFromSource(self.fs_model.index(project_path)))
+        self.expand(self.view_index(self.fs_model.index(project_path)))
+
+    def _on_large_directory(self, path):
+        if self.model() is not self.view_model:
+            # Same tree on the paging model: expansion, selection and scroll carry over
+            expanded = []
+            self._collect_expanded(self.rootIndex(), expanded)
+            current = self.file_path(self.currentIndex())
+            scroll = self.verticalScrollBar().value()
+            root = self.view_model.mapFromSource(self.rootIndex())
+            self.setModel(self.view_model)
+            for col in range(1, self.fs_model.columnCount()):
+                self.hideColumn(col)
+            self.setRootIndex(root)
+            for expanded_path in expanded:
+                self.expand(self.view_index(self.fs_model.index(expanded_path)))
+            if current:
+                self.setCurrentIndex(self.view_index(self.fs_model.index(current)))
+            self.verticalScrollBar().setValue(scroll)
+        self.expand(self.view_index(self.fs_model.index(path)))
+
+    def _collect_expanded(self, parent, paths):
+        model = self.model()
+        for row in range(model.rowCount(parent)):
+            index = model.index(row, 0, parent)
+            if self.isExpanded(index):
+                paths.append(self.file_path(index))
+                self._collect_expanded(index, paths)
+
+    def _fetch_visible_pages(self):
+        viewport = self.viewport().rect()
+        for d in self.view_model.large_directories():
+            if d.remaining() > 0 and self.isExpanded(QModelIndex(d.anchor)):
+                placeholder = self.view_model.index(d.shown, 0, QModelIndex(d.anchor))
+                if self.visualRect(placeholder).intersects(viewport):
+                    self.view_model.fetch_page(d)
+
+    def keyPressEvent(self, event):
+        # Typing in a huge directory filters it
+        d = self.view_model.directory_of(self.currentIndex())
+        if d is not None and not event.modifiers() & (Qt.ControlModifier | Qt.AltModifier):
+            text = d.filter_text
+            if event.key() == Qt.Key_Backspace and text:
+                text = text[:-1]
+            elif event.key() == Qt.Key_Escape and text:
+                text = ''
+            elif event.text().isprintable() and event.text() and event.key() not in (Qt.Key_Return, Qt.Key_Enter):
+                text += event.text()
+            if text != d.filter_text:
+                self.view_model.set_filter(d, text)
+                self.setCurrentIndex(self.view_model.index(d.shown, 0, QModelIndex(d.anchor)))
+                return
+        super().keyPressEvent(event)
 
     def set_project_path(self, project_path):
         project_path = os.path.abspath(os.path.expanduser(project_path))
@@ -100,27 +555,34 @@ class FileExplorerTree(QTreeView):
         self.fs_model.setRootPath(project_path)
         self.proxy_model.project_path = project_path
         self.proxy_model._parent = os.path.dirname(project_path)
+        self.git_status.set_root(project_path)
         self._apply_root(project_path)
 
+    def apply_theme(self, theme_path):
+        colors = load_theme(theme_path)
+        self.proxy_model.status_colors = {
+            MODIFIED: QColor(colors.get('Accent', '#6897BB')),
+            ADDED: QColor(colors.get('Success', '#2e7d32')),
+            UNTRACKED: QColor(colors.get('Error', '#e45649')),
+        }
+        self.viewport().update()
+
     # ---------- Context menu actions ----------
-    def _selected_source_index(self):
-        idx = self.currentIndex()
-        if not idx.isValid():
-            return None
-        return self.proxy_model.mapToSource(idx)
+    def _selected_path(self):
+        return self.file_path(self.currentIndex())
 
-    def _index_dir_path(self, source_index):
-        if source_index is None:
+    def _index_dir_path(self, path):
+        if path is None:
             return self.fs_model.rootPath()
-        path = self.fs_model.filePath(source_index)
         return path if os.path.isdir(path) else os.path.dirname(path)
 
     def _show_context_menu(self, pos: QPoint):
         index = self.indexAt(pos)
+        path = self.file_path(index)
         # Determine target dir for New File/Folder
         if index.isValid():
-            src_index = self.proxy_model.mapToSource(index)
-            self._context_target_dir = self._index_dir_path(src_index)
+            d = self.view_model.directory_of(index)
+            self._context_target_dir = self._index_dir_path(path) if path else d.path
         else:
             # Right-clicked empty space: use root
             self._context_target_dir = self.fs_model.rootPath()
@@ -136,7 +598,7 @@ class FileExplorerTree(QTreeView):
         act_delete.triggered.connect(self._action_delete)
         menu.addAction(act_new_file)
         menu.addAction(act_new_folder)
-        if index.isValid():
+        if path:
             menu.addSeparator()
             menu.addAction(act_rename)
             menu.addAction(act_delete)
@@ -144,7 +606,7 @@ class FileExplorerTree(QTreeView):
 
     def _action_new_file(self):
         # Prefer context-target dir if set by the last right-click
-        dir_path = self._context_target_dir or self._index_dir_path(self._selected_source_index())
+        dir_path = self._context_target_dir or self._index_dir_path(self._selected_path())
         name, ok = QInputDialog.getText(self, "New File", "File name:")
         if not ok or not name.strip():
             return
@@ -158,7 +620,7 @@ class FileExplorerTree(QTreeView):
             QMessageBox.critical(self, "New File", f"Failed to create file:\n{e}")
 
     def _action_new_folder(self):
-        dir_path = self._context_target_dir or self._index_dir_path(self._selected_source_index())
+        dir_path = self._context_target_dir or self._index_dir_path(self._selected_path())
         name, ok = QInputDialog.getText(self, "New Folder", "Folder name:")
         if not ok or not name.strip():
             return
@@ -172,17 +634,30 @@ class FileExplorerTree(QTreeView):
             QMessageBox.critical(self, "New Folder", f"Failed to create folder:\n{e}")
 
     def _action_rename(self):
-        src_index = self._selected_source_index()
-        if not src_index or not src_index.isValid():
+        index = self.currentIndex()
+        path = self.file_path(index)
+        if not path:
+            return
+        if self.view_model.directory_of(index) is None:
+            self.edit(index)
             return
-        proxy_index = self.proxy_model.mapFromSource(src_index)
-        self.edit(proxy_index)
+        # Rows of paged directories are not editable in place
+        name, ok = QInputDialog.getText(self, "Rename", "New name:", text=os.path.basename(path))
+        if not ok or not name.strip() or name.strip() == os.path.basename(path):
+            return
+        target = os.path.join(os.path.dirname(path), name.strip())
+        if os.path.exists(target):
+            QMessageBox.warning(self, "Rename", "A file or folder with that name already exists.")
+            return
+        try:
+            os.rename(path, target)
+        except Exception as e:
+            QMessageBox.critical(self, "Rename", f"Failed to rename:\n{e}")
 
     def _action_delete(self):
-        src_index = self._selected_source_index()
-        if not src_index or not src_index.isValid():
+        path = self._selected_path()
+        if not path:
             return
-        path = self.fs_model.filePath(src_index)
         name = os.path.basename(path)
         if QMessageBox.question(self, "Delete", f"Are you sure you want to delete '\n{name}\n'? This cannot be undone.") != QMessageBox.Yes:
             return
@@ -0,0 +1,223 @@
+import io
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import traceback
+
+# Warm run server started by the IDE:
+#   python run_server.py --socket PATH --root PROJECT [--preload numpy,pandas]
+# Stdlib only, Unix only (needs fork). Imports the preload modules once, then
+# forks a child per run request so each script starts with those modules
+# already in sys.modules but a fresh __main__, its own cwd and argv. A run
+# request is one JSON line on a new connection to the socket; the child
+# answers {"pid": N}, then the connection carries the script's raw
+# stdin/stdout/stderr, and the server appends EXIT_MARKER + exit code once
+# the child has been reaped.
+#
+# The server stays single-threaded: forking a process with threads can copy
+# a lock held by another thread and deadlock the child.
+
+EXIT_MARKER = b'\x1eSNYEXIT '
+
+
+def parse_args(argv):
+	options = {'socket': None, 'root': os.getcwd(), 'preload': ''}
+	i = 0
+	while i < len(argv) - 1:
+		key = argv[i].lstrip('-')
+		if key in options:
+			options[key] = argv[i + 1]
+		i += 2
+	return options
+
+
+def preload(names):
+	for name in filter(None, (n.strip() for n in names.split(','))):
+		try:
+			__import__(name)
+		except BaseException as e:
+			print(f'preload failed: {name}: {type(e).__name__}: {e}', flush=True)
+
+
+def project_modules(root):
+	# Modules loaded from the project itself; they go stale when edited
+	root = os.path.join(os.path.abspath(root), '')
+	files = {}
+	for module in list(sys.modules.values()):
+		path = getattr(module, '__file__', None)
+		if path and os.path.abspath(path).startswith(root):
+			try:
+				files[path] = os.stat(path).st_mtime
+			except OSError:
+				pass
+	return files
+
+
+def is_stale(files):
+	for path, mtime in files.items():
+		try:
+			if os.stat(path).st_mtime != mtime:
+				return True
+		except OSError:
+			return True
+	return False
+
+
+def read_request(conn):
+	data = b''
+	while not data.endswith(b'\n'):
+		chunk = conn.recv(65536)
+		if not chunk:
+			return None
+		data += chunk
+	return json.loads(data)
+
+
+def run_child(conn, request, inherited, wakeup_fds):
+	# In the forked child: become a process group of its own (so the IDE can
+	# stop the script and anything it spawned), wire the connection to fds
+	# 0-2 and run the script as __main__
+	os.setsid()
+	signal.set_wakeup_fd(-1)
+	for fd in wakeup_fds:
+		os.close(fd)
+	signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+	signal.signal(signal.SIGINT, signal.default_int_handler)
+	for other in inherited:
+		other.close()  # listener and other runs' connections, else they never see EOF
+	for fd in (0, 1, 2):
+		os.dup2(conn.fileno(), fd)
+	conn.close()
+	sys.stdin = io.TextIOWrapper(io.FileIO(0, 'r', closefd=False), encoding='utf-8')
+	sys.stdout = io.TextIOWrapper(io.FileIO(1, 'w', closefd=False), encoding='utf-8',
+								  errors='backslashreplace', line_buffering=True, write_through=True)
+	sys.stderr = io.TextIOWrapper(io.FileIO(2, 'w', closefd=False), encoding='utf-8',
+								  errors='backslashreplace', line_buffering=True, write_through=True)
+	os.write(1, (json.dumps({'pid': os.getpid()}) + '\n').encode('utf-8'))
+
+	import atexit
+	import runpy
+	path = os.path.abspath(request['path'])
+	code = 0
+	try:
+		os.chdir(request.get('cwd') or os.path.dirname(path))
+		sys.argv = [path] + list(request.get('args', []))
+		sys.path[0] = os.path.dirname(path)
+		if 'random' in sys.modules:
+			sys.modules['random'].seed()  # do not share the server's random state
+		runpy.run_path(path, run_name='__main__')
+	except SystemExit as e:
+		if e.code is None:
+			code = 0
+		elif isinstance(e.code, int):
+			code = e.code
+		else:
+			print(e.code, file=sys.stderr)
+			code = 1
+	except BaseException:
+		# Report like a plain run, without the runpy and server frames
+		etype, value, tb = sys.exc_info()
+		while tb is not None and tb.tb_frame.f_code.co_filename != path:
+			tb = tb.tb_next
+		traceback.print_exception(etype, value, tb)
+		code = 1
+	try:
+		atexit._run_exitfuncs()
+		sys.stdout.flush()
+		sys.stderr.flush()
+	finally:
+		os._exit(code)
+
+
+def main(argv):
+	options = parse_args(argv)
+	if not options['socket'] or not hasattr(os, 'fork'):
+		print('usage: run_server.py --socket PATH --root DIR [--preload a,b] (Unix only)', file=sys.stderr)
+		return 2
+	root = os.path.abspath(options['root'])
+	if root not in sys.path:
+		sys.path.insert(0, root)
+	preload(options['preload'])
+	watched = project_modules(root)
+
+	try:
+		os.unlink(options['socket'])
+	except OSError:
+		pass
+	listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	listener.bind(options['socket'])
+	listener.listen(16)
+	# SIGCHLD wakes the select loop through the wakeup pipe
+	wake_r, wake_w = os.pipe()
+	os.set_blocking(wake_r, False)
+	os.set_blocking(wake_w, False)
+	signal.set_wakeup_fd(wake_w)
+	signal.signal(signal.SIGCHLD, lambda *_: None)
+	print('ready', flush=True)
+
+	children = {}  # pid -> connection
+	try:
+		while True:
+			try:
+				readable, _, _ = select.select([listener, wake_r, sys.stdin], [], [])
+			except InterruptedError:
+				continue
+			if sys.stdin in readable and not os.read(sys.stdin.fileno(), 1024):
+				break  # the IDE went away
+			if wake_r in readable:
+				try:
+					os.read(wake_r, 1024)
+				except BlockingIOError:
+					pass
+				while children:
+					try:
+						pid, status = os.waitpid(-1, os.WNOHANG)
+					except ChildProcessError:
+						break
+					if pid == 0:
+						break
+					conn = children.pop(pid, None)
+					if conn is not None:
+						try:
+							conn.sendall(EXIT_MARKER + b'%d\n' % os.waitstatus_to_exitcode(status))
+						except OSError:
+							pass
+						conn.close()
+			if listener in readable:
+				conn, _ = listener.accept()
+				try:
+					request = read_request(conn)
+				except (OSError, ValueError):
+					request = None
+				if request is None:
+					conn.close()
+					continue
+				if is_stale(watched):
+					# A preloaded project module was edited: tell the IDE to run
+					# this one cold, and start over with fresh imports
+					conn.sendall(b'{"stale": true}\n')
+					conn.close()
+					listener.close()
+					os.execv(sys.executable, [sys.executable] + sys.argv)
+				pid = os.fork()
+				if pid == 0:
+					run_child(conn, request, [listener] + list(children.values()), (wake_r, wake_w))
+				children[pid] = conn
+	finally:
+		for pid in children:
+			try:
+				os.killpg(pid, signal.SIGKILL)
+			except OSError:
+				pass
+		try:
+			os.unlink(options['socket'])
+		except OSError:
+			pass
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
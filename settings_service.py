@@ -0,0 +1,162 @@
+import copy
+import json
+import os
+import shutil
+import tempfile
+
+from PySide6.QtCore import QObject, QTimer, QFileSystemWatcher, Signal
+
+
+def atomic_write_json(path, data):
+	# Write to a temp file in the same directory, then rename over the target,
+	# so a crash mid-write never leaves a truncated settings file behind
+	directory = os.path.dirname(os.path.abspath(path))
+	fd, tmp = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+	try:
+		with os.fdopen(fd, 'w', encoding='utf-8') as f:
+			json.dump(data, f, indent=2)
+			f.flush()
+			os.fsync(f.fileno())
+		os.replace(tmp, path)
+	except BaseException:
+		try:
+			os.remove(tmp)
+		except OSError:
+			pass
+		raise
+
+
+class SettingsService(QObject):
+	# Loads settings.json once and serves values from memory. Sections are the
+	# top-level keys (shortcuts, run_options, editor, theme, ...); `changed`
+	# is emitted with the section name whenever its value changes, whether by
+	# set() or by the file being edited externally.
+	changed = Signal(str)
+	error = Signal(str)
+
+	def __init__(self, path, defaults=None, delay_ms=300, parent=None):
+		super().__init__(parent)
+		self.path = os.path.abspath(path)
+		self.defaults = defaults or {}
+		self._data = {}
+		self._dirty = False
+		self._last_written = None
+		# Why the file on disk could not be parsed, if it could not. Set while
+		# constructing too, before anyone is connected to `error`.
+		self.load_error = None
+
+		self._save_timer = QTimer(self)
+		self._save_timer.setSingleShot(True)
+		self._save_timer.setInterval(delay_ms)
+		self._save_timer.timeout.connect(self.flush)
+
+		self._watcher = QFileSystemWatcher(self)
+		self._watcher.fileChanged.connect(self._on_file_changed)
+		# Editors that save by rename briefly remove the file; the directory
+		# watch picks it up again when it reappears
+		self._watcher.addPath(os.path.dirname(self.path))
+		self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+		self._data = self._read()
+		self._watch()
+
+	def _read(self):
+		try:
+			with open(self.path, 'r', encoding='utf-8') as f:
+				data = json.load(f)
+		except FileNotFoundError:
+			self.load_error = None
+			return {}
+		except (OSError, ValueError) as e:
+			self.load_error = f'Failed to read settings: {e}'
+			self.error.emit(self.load_error)
+			return dict(self._data)
+		self.load_error = None
+		return data if isinstance(data, dict) else {}
+
+	def _watch(self):
+		if os.path.exists(self.path) and self.path not in self._watcher.files():
+			self._watcher.addPath(self.path)
+
+	# ---------- Access ----------
+	def get(self, section, default=None):
+		# Section value merged over its defaults (dict sections) or the raw value
+		fallback = self.defaults.get(section, default)
+		value = self._data.get(section)
+		if isinstance(fallback, dict):
+			merged = copy.deepcopy(fallback)
+			if isinstance(value, dict):
+				merged.update(value)
+			return merged
+		return copy.deepcopy(value) if value is not None else copy.deepcopy(fallback)
+
+	def value(self, section, key, type_=str, default=None):
+		# Typed lookup of one key inside a dict section
+		raw = self.get(section, {}).get(key, default)
+		if raw is None:
+			return default
+		try:
+			return type_(raw)
+		except (TypeError, ValueError):
+			return default
+
+	def subscribe(self, section, callback):
+		# Call `callback(value)` whenever `section` changes
+		self.changed.connect(lambda name: name == section and callback(self.get(section)))
+
+	# ---------- Updates ----------
+	def set(self, section, value):
+		if self._data.get(section) == value:
+			return
+		self._data[section] = copy.deepcopy(value)
+		self._dirty = True
+		self.changed.emit(section)
+		# Rapid changes are batched into a single write
+		self._save_timer.start()
+
+	def flush(self):
+		self._save_timer.stop()
+		if not self._dirty:
+			return True
+		try:
+			if self.load_error is not None and os.path.exists(self.path):
+				# Only the sections changed since are known; keep what the
+				# unreadable file held for the user to merge back
+				shutil.copy2(self.path, self.path + '.bak')
+			atomic_write_json(self.path, self._data)
+		except OSError as e:
+			self.error.emit(f'Failed to save settings: {e}')
+			return False
+		if self.load_error is not None:
+			self.error.emit(f'{os.path.basename(self.path)} could not be read and was rewritten; its previous contents are in {self.path}.bak')
+			self.load_error = None
+		self._dirty = False
+		self._last_written = self._stat()
+		# The rename replaced the watched inode; watch the new file
+		self._watcher.removePaths(self._watcher.files())
+		self._watch()
+		return True
+
+	def _stat(self):
+		try:
+			st = os.stat(self.path)
+		except OSError:
+			return None
+		return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+	def _on_directory_changed(self, _path):
+		if self.path not in self._watcher.files() and os.path.exists(self.path):
+			self._on_file_changed(self.path)
+
+	def _on_file_changed(self, _path):
+		self._watch()
+		if self._stat() == self._last_written:
+			return  # our own write
+		if self._dirty:
+			return  # pending local changes win; they are written shortly
+		data = self._read()
+		old = self._data
+		self._data = data
+		for section in set(old) | set(data):
+			if old.get(section) != data.get(section):
+				self.changed.emit(section)
@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+
+class TabMemoryManager:
+	# Keeps editor tabs under a memory budget by hibernating the least
+	# recently viewed ones. Editors are expected to provide memory_usage(),
+	# hibernate(), restore() and is_hibernated().
+	def __init__(self, budget_bytes):
+		self.budget_bytes = budget_bytes
+		self._lru = OrderedDict()  # editor -> None, oldest first
+
+	def set_budget(self, budget_bytes):
+		self.budget_bytes = budget_bytes
+		self.enforce()
+
+	def add(self, editor):
+		self._lru[editor] = None
+		self._lru.move_to_end(editor)
+
+	def remove(self, editor):
+		self._lru.pop(editor, None)
+
+	def activate(self, editor):
+		# Called when a tab gains focus: rebuild it if needed and mark it most recent.
+		# Returns False when a hibernated tab could not be rebuilt.
+		restored = editor.restore() if editor.is_hibernated() else True
+		self.add(editor)
+		self.enforce(keep=editor)
+		return restored
+
+	def total_usage(self):
+		return sum(editor.memory_usage() for editor in self._lru)
+
+	def enforce(self, keep=None):
+		if not self.budget_bytes or self.budget_bytes <= 0:
+			return []
+		usage = {editor: editor.memory_usage() for editor in self._lru}
+		total = sum(usage.values())
+		evicted = []
+		for editor in list(self._lru):
+			if total <= self.budget_bytes:
+				break
+			if editor is keep or editor.is_hibernated():
+				continue
+			editor.hibernate()
+			total += editor.memory_usage() - usage[editor]
+			evicted.append(editor)
+		return evicted
+
+
+def format_bytes(n):
+	for unit in ('B', 'KB', 'MB'):
+		if n < 1024:
+			return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+		n /= 1024
+	return f"{n:.1f} GB"
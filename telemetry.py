@@ -0,0 +1,186 @@
+import collections
+import functools
+import json
+import os
+import time
+
+from PySide6.QtCore import QObject, QTimer, QEvent, Qt
+from PySide6.QtWidgets import QLabel
+
+# Timing of known hot handlers. While telemetry is off nothing is wrapped,
+# so the handlers run exactly as written; install() swaps in timing wrappers
+# at class level and uninstall() puts the originals back. Samples are
+# (name, start ns, duration ns) in a fixed-size ring buffer.
+
+CAPACITY = 200000
+FRAME = 'frame'
+
+_samples = collections.deque(maxlen=CAPACITY)
+_originals = {}   # (class, attribute) -> original function
+
+
+def hot_handlers():
+	# Imported here so the instrumented modules can import telemetry themselves
+	from texteditor import CodeEditor, Highlighter
+	from console import ConsoleWidget
+	from project_explorer import ProjectPathFilterProxy, LargeDirectoryProxy
+	return [
+		(CodeEditor, 'keyPressEvent'),
+		(CodeEditor, 'paintEvent'),
+		(CodeEditor, 'lineNumberAreaPaintEvent'),
+		(CodeEditor, 'updateDynamicCompletions'),
+		(Highlighter, 'highlightBlock'),
+		(ConsoleWidget, '_append_text'),
+		(ProjectPathFilterProxy, 'filterAcceptsRow'),
+		(ProjectPathFilterProxy, 'data'),
+		(LargeDirectoryProxy, 'data'),
+	]
+
+
+def _timed(name, func):
+	clock = time.perf_counter_ns
+	append = _samples.append
+
+	@functools.wraps(func)
+	def wrapper(*args, **kwargs):
+		start = clock()
+		try:
+			return func(*args, **kwargs)
+		finally:
+			append((name, start, clock() - start))
+	return wrapper
+
+
+def install(targets=None):
+	for cls, attr in targets or hot_handlers():
+		if (cls, attr) not in _originals:
+			original = cls.__dict__[attr]
+			_originals[(cls, attr)] = original
+			setattr(cls, attr, _timed(f'{cls.__name__}.{attr}', original))
+
+
+def uninstall():
+	while _originals:
+		(cls, attr), original = _originals.popitem()
+		setattr(cls, attr, original)
+
+
+def enabled():
+	return bool(_originals)
+
+
+def record(name, start_ns, duration_ns):
+	_samples.append((name, start_ns, duration_ns))
+
+
+def clear():
+	_samples.clear()
+
+
+def summary(window_ns):
+	# {name: (count, total ns, max ns)} over the samples of the last window
+	since = time.perf_counter_ns() - window_ns
+	stats = {}
+	for name, start, duration in reversed(_samples):
+		if start < since:
+			break
+		count, total, longest = stats.get(name, (0, 0, 0))
+		stats[name] = (count + 1, total + duration, max(longest, duration))
+	return stats
+
+
+def export_chrome_trace(path):
+	# Trace Event Format ("X" complete events), loadable in chrome://tracing
+	# or Perfetto. Handlers nest on one track, frame gaps get their own.
+	samples = list(_samples)
+	origin = samples[0][1] if samples else 0
+	pid = os.getpid()
+	events = [{'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': 'SnyIDE'}}]
+	for name, start, duration in samples:
+		events.append({
+			'name': name, 'cat': 'frame' if name == FRAME else 'handler', 'ph': 'X',
+			'ts': (start - origin) / 1000.0, 'dur': duration / 1000.0,
+			'pid': pid, 'tid': 2 if name == FRAME else 1,
+		})
+	with open(path, 'w', encoding='utf-8') as f:
+		json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+	return len(samples)
+
+
+class FrameMonitor(QObject):
+	# A 60 Hz precise timer; how late each tick fires is how long the event
+	# loop was busy, which is what a user perceives as a dropped frame
+	INTERVAL_MS = 16
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self._last = 0
+		self.timer = QTimer(self)
+		self.timer.setTimerType(Qt.PreciseTimer)
+		self.timer.setInterval(self.INTERVAL_MS)
+		self.timer.timeout.connect(self._tick)
+
+	def start(self):
+		self._last = time.perf_counter_ns()
+		self.timer.start()
+
+	def stop(self):
+		self.timer.stop()
+
+	def _tick(self):
+		now = time.perf_counter_ns()
+		record(FRAME, self._last, now - self._last)
+		self._last = now
+
+
+class PerfOverlay(QLabel):
+	# Heads-up text in the top-right corner of `parent`: frame times and the
+	# handlers that took longest over the last second
+	WINDOW_NS = 1000000000
+	TOP = 6
+
+	def __init__(self, parent):
+		super().__init__(parent)
+		self.setObjectName('perfOverlay')
+		self.setAttribute(Qt.WA_TransparentForMouseEvents)
+		self.setTextFormat(Qt.PlainText)
+		self.frames = FrameMonitor(self)
+		self.refresh_timer = QTimer(self)
+		self.refresh_timer.setInterval(500)
+		self.refresh_timer.timeout.connect(self.refresh)
+		parent.installEventFilter(self)
+		self.hide()
+
+	def set_active(self, active):
+		if active:
+			install()
+			self.frames.start()
+			self.refresh_timer.start()
+			self.refresh()
+			self.show()
+			self.raise_()
+		else:
+			self.refresh_timer.stop()
+			self.frames.stop()
+			uninstall()
+			self.hide()
+
+	def refresh(self):
+		stats = summary(self.WINDOW_NS)
+		count, total, longest = stats.pop(FRAME, (0, 0, 0))
+		lines = [f'frame  avg {total / max(count, 1) / 1e6:6.1f} ms  max {longest / 1e6:6.1f} ms']
+		ranked = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)[:self.TOP]
+		for name, (calls, spent, worst) in ranked:
+			lines.append(f'{name:<40} {calls:6d}x {spent / 1e6:8.1f} ms  max {worst / 1e6:6.1f}')
+		self.setText('\n'.join(lines))
+		self.adjustSize()
+		self._place()
+
+	def _place(self):
+		parent = self.parentWidget()
+		self.move(max(parent.width() - self.width() - 24, 0), 40)
+
+	def eventFilter(self, obj, event):
+		if obj is self.parentWidget() and event.type() == QEvent.Resize and self.isVisible():
+			self._place()
+		return False
@@ -0,0 +1,394 @@
+import ast
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from PySide6.QtCore import QObject, QProcess, Signal, Qt
+from PySide6.QtWidgets import (
+	QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTreeWidget, QTreeWidgetItem,
+	QSplitter, QPlainTextEdit
+)
+
+from settings_service import atomic_write_json
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_worker.py')
+MARKER = b'\x1eSNYTEST '
+SKIP_DIRS = {'.git', '.hg', '.svn', '__pycache__', 'node_modules', '.venv', 'venv', 'env', '.tox', '.nox',
+			 'build', 'dist', '.mypy_cache', '.pytest_cache', 'site-packages'}
+
+_pool = None
+
+
+def _executor():
+	global _pool
+	if _pool is None:
+		_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tests')
+	return _pool
+
+
+def shutdown():
+	global _pool
+	if _pool is not None:
+		_pool.shutdown(wait=False, cancel_futures=True)
+		_pool = None
+
+
+def is_test_file(name):
+	return name.endswith('.py') and (name.startswith('test_') or name.endswith('_test.py'))
+
+
+def _is_test_class(node):
+	if not isinstance(node, ast.ClassDef):
+		return False
+	if node.name.startswith('Test'):
+		return True
+	return any((isinstance(b, ast.Name) and b.id.endswith('TestCase')) or
+			   (isinstance(b, ast.Attribute) and b.attr.endswith('TestCase')) for b in node.bases)
+
+
+def discover(root):
+	# Walks `root` and parses test files without importing them. Returns
+	# {relpath: {'tests': [(test id, line)], 'imports': {module names}, 'mtime': float}}
+	found = {}
+	for directory, dirs, files in os.walk(root):
+		dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+		for name in files:
+			if not is_test_file(name):
+				continue
+			path = os.path.join(directory, name)
+			relpath = os.path.relpath(path, root).replace(os.sep, '/')
+			try:
+				with open(path, 'rb') as f:
+					tree = ast.parse(f.read(), path)
+				mtime = os.stat(path).st_mtime
+			except (OSError, SyntaxError, ValueError):
+				continue
+			tests = []
+			imports = set()
+			for node in tree.body:
+				if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith('test'):
+					tests.append((f'{relpath}::{node.name}', node.lineno))
+				elif _is_test_class(node):
+					for item in node.body:
+						if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith('test'):
+							tests.append((f'{relpath}::{node.name}::{item.name}', item.lineno))
+			for node in ast.walk(tree):
+				if isinstance(node, ast.Import):
+					imports.update(alias.name.split('.')[-1] for alias in node.names)
+					imports.update(alias.name.split('.')[0] for alias in node.names)
+				elif isinstance(node, ast.ImportFrom) and node.module:
+					imports.update(node.module.split('.'))
+					imports.update(alias.name for alias in node.names)
+			if tests:
+				found[relpath] = {'tests': tests, 'imports': imports, 'mtime': mtime}
+	return found
+
+
+def changed_modules(root, since):
+	# Base names of .py files under `root` modified after `since`
+	names = set()
+	for directory, dirs, files in os.walk(root):
+		dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
+		for name in files:
+			if name.endswith('.py'):
+				try:
+					if os.stat(os.path.join(directory, name)).st_mtime > since:
+						names.add(name[:-3])
+				except OSError:
+					pass
+	return names
+
+
+def _discover_job(root, since):
+	# discover() plus, for Run Failed + Changed, the modules changed since the last run
+	return discover(root), (changed_modules(root, since) if since is not None else None)
+
+
+class TimingStore:
+	# Per-test durations and outcomes across runs, one JSON file for all
+	# projects (keyed by project path), written atomically like settings.json
+	def __init__(self, path):
+		self.path = path
+		try:
+			with open(path, 'r', encoding='utf-8') as f:
+				self.data = json.load(f)
+		except (OSError, ValueError):
+			self.data = {}
+
+	def project(self, root):
+		return self.data.setdefault(os.path.abspath(root), {'last_run': 0, 'tests': {}})
+
+	def save(self):
+		try:
+			atomic_write_json(self.path, self.data)
+		except OSError:
+			pass
+
+
+class TestRunner(QObject):
+	# Runs test ids across N worker processes. Each worker has one test in
+	# flight and gets the next from the shared queue as soon as it answers,
+	# so slow tests never hold up a whole batch; known-slow tests go first.
+	result = Signal(str, str, float, str)   # id, outcome, duration, message
+	finished = Signal()
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.workers = []
+		self.queue = []
+		self.in_flight = {}   # QProcess -> test id
+		self._buffers = {}
+		self.running = False
+
+	def start(self, root, test_ids, workers, timings=None):
+		self.stop()
+		timings = timings or {}
+		# Longest first, then by file so a worker tends to reuse imported modules
+		self.queue = sorted(test_ids, key=lambda t: (-timings.get(t, {}).get('duration', 0.0), t), reverse=True)
+		if not self.queue:
+			self.finished.emit()
+			return
+		self.running = True
+		for _ in range(max(1, min(workers, len(self.queue)))):
+			self._spawn(root)
+
+	def stop(self):
+		self.queue = []
+		# Killed workers are deleted once they have exited; nothing waits for them here
+		for proc in self.workers:
+			proc.readyReadStandardOutput.disconnect()
+			proc.finished.disconnect()
+			proc.finished.connect(proc.deleteLater)
+			proc.kill()
+		self.workers = []
+		self.in_flight = {}
+		self._buffers = {}
+		if self.running:
+			self.running = False
+			self.finished.emit()
+
+	def _feed(self, proc):
+		if not self.queue:
+			self.in_flight.pop(proc, None)
+			proc.closeWriteChannel()
+			return
+		test_id = self.queue.pop()
+		self.in_flight[proc] = test_id
+		proc.write((json.dumps({'id': test_id}) + '\n').encode('utf-8'))
+
+	def _on_output(self, proc):
+		data = self._buffers.get(proc, b'') + bytes(proc.readAllStandardOutput())
+		*lines, self._buffers[proc] = data.split(b'\n')
+		for line in lines:
+			if not line.startswith(MARKER):
+				continue  # output a test printed straight to fd 1
+			try:
+				message = json.loads(line[len(MARKER):])
+			except ValueError:
+				continue
+			self.result.emit(message['id'], message['outcome'], message['duration'], message.get('message', ''))
+			self._feed(proc)
+
+	def _on_worker_exit(self, proc):
+		# A test that kills its worker (os._exit, segfault) fails; the rest of
+		# the queue moves on to a replacement worker
+		test_id = self.in_flight.pop(proc, None)
+		if proc in self.workers:
+			self.workers.remove(proc)
+			self._buffers.pop(proc, None)
+			proc.deleteLater()
+		if test_id is not None:
+			self.result.emit(test_id, 'error', 0.0, 'worker process exited while running this test')
+			if self.queue:
+				self._spawn(proc.workingDirectory())
+				return
+		if not self.workers and self.running:
+			self.running = False
+			self.finished.emit()
+
+	def _spawn(self, root):
+		proc = QProcess(self)
+		proc.setWorkingDirectory(root)
+		proc.setStandardErrorFile(QProcess.nullDevice())
+		proc.readyReadStandardOutput.connect(lambda p=proc: self._on_output(p))
+		proc.finished.connect(lambda _code, _status, p=proc: self._on_worker_exit(p))
+		proc.start(shutil.which('python') or sys.executable, ['-u', WORKER_PATH, root])
+		self.workers.append(proc)
+		self._buffers[proc] = b''
+		self._feed(proc)
+
+
+class TestPanel(QWidget):
+	# Discovered tests grouped by file with live outcome and duration; the
+	# "Last" column keeps the previous run's duration so slow tests stand out
+	openRequested = Signal(str, int)
+	_discovered = Signal(object)
+
+	def __init__(self, root, timings_path, parent=None):
+		super().__init__(parent)
+		self.setObjectName('testPanel')
+		self.root = root
+		self.workers = os.cpu_count() or 2
+		self.store = TimingStore(timings_path)
+		self.runner = TestRunner(self)
+		self.runner.result.connect(self._on_result)
+		self.runner.finished.connect(self._on_finished)
+		self._discovered.connect(self._on_discovered)
+		self.files = {}
+		self.items = {}       # test id -> QTreeWidgetItem
+		self.results = {}     # test id -> outcome for the current run
+		self._run_started = 0.0
+		self._pending_run = None
+
+		layout = QVBoxLayout(self)
+		layout.setContentsMargins(0, 0, 0, 0)
+		layout.setSpacing(2)
+		bar = QHBoxLayout()
+		bar.setContentsMargins(6, 3, 6, 3)
+		self.status = QLabel('')
+		bar.addWidget(self.status, 1)
+		for label, slot in (('Refresh', lambda: self.refresh()), ('Run All', self.run_all),
+							('Run Failed + Changed', self.run_failed_and_changed), ('Stop', self.runner.stop)):
+			button = QPushButton(label)
+			button.setObjectName('testButton')
+			button.clicked.connect(slot)
+			bar.addWidget(button)
+		layout.addLayout(bar)
+
+		splitter = QSplitter(Qt.Vertical)
+		self.tree = QTreeWidget()
+		self.tree.setHeaderLabels(['Test', 'Result', 'Time (s)', 'Last (s)'])
+		self.tree.setSortingEnabled(True)
+		self.tree.sortByColumn(0, Qt.AscendingOrder)
+		self.tree.currentItemChanged.connect(self._on_current_changed)
+		self.tree.itemDoubleClicked.connect(self._on_double_clicked)
+		self.details = QPlainTextEdit()
+		self.details.setReadOnly(True)
+		splitter.addWidget(self.tree)
+		splitter.addWidget(self.details)
+		splitter.setStretchFactor(0, 3)
+		layout.addWidget(splitter, 1)
+
+	def set_root(self, root):
+		self.runner.stop()
+		self.root = root
+		self.tree.clear()
+		self.items = {}
+		self.files = {}
+		if self.isVisible():
+			self.refresh()
+
+	# ---------- Discovery ----------
+
+	def refresh(self, then=None, since=None):
+		# then(changed) runs once discovery lands; `changed` holds the modules
+		# modified after `since`, found on the same background pass (None without it)
+		self._pending_run = then
+		self.status.setText('Discovering tests...')
+		root = self.root
+		try:
+			future = _executor().submit(_discover_job, root, since)
+		except RuntimeError:
+			return
+		future.add_done_callback(lambda f: self._discovered.emit((root, f)))
+
+	def _on_discovered(self, payload):
+		root, future = payload
+		if root != self.root or future.cancelled() or future.exception() is not None:
+			return
+		self.files, changed = future.result()
+		timings = self.store.project(self.root)['tests']
+		self.tree.setSortingEnabled(False)
+		self.tree.clear()
+		self.items = {}
+		for relpath, info in sorted(self.files.items()):
+			parent = QTreeWidgetItem([relpath])
+			parent.setData(0, Qt.UserRole, (relpath, 1))
+			for test_id, line in info['tests']:
+				label = test_id.split('::', 1)[1]
+				item = QTreeWidgetItem([label, '', '', ''])
+				item.setData(0, Qt.UserRole, (relpath, line))
+				known = timings.get(test_id)
+				if known:
+					item.setText(1, known.get('outcome', ''))
+					item.setData(3, Qt.DisplayRole, round(known.get('duration', 0.0), 3))
+				parent.addChild(item)
+				self.items[test_id] = item
+			self.tree.addTopLevelItem(parent)
+		self.tree.setSortingEnabled(True)
+		self.tree.expandAll()
+		self.status.setText(f'{len(self.items)} tests in {len(self.files)} files')
+		pending, self._pending_run = self._pending_run, None
+		if pending is not None:
+			pending(changed)
+
+	# ---------- Running ----------
+
+	def run_all(self):
+		self.refresh(then=lambda _changed: self._run(list(self.items)))
+
+	def run_failed_and_changed(self):
+		# Tests that failed last time, plus tests in test files changed since the
+		# last run or importing a module that changed since then
+		since = self.store.project(self.root).get('last_run', 0)
+
+		def select(changed):
+			project = self.store.project(self.root)
+			selected = [t for t, info in project['tests'].items()
+						if info.get('outcome') in ('failed', 'error') and t in self.items]
+			for relpath, info in self.files.items():
+				name = os.path.splitext(os.path.basename(relpath))[0]
+				if info['mtime'] > since or name in changed or info['imports'] & changed:
+					selected.extend(t for t, _line in info['tests'])
+			self._run(sorted(set(selected)))
+		self.refresh(then=select, since=since)
+
+	def _run(self, test_ids):
+		self.results = {}
+		for test_id in test_ids:
+			item = self.items.get(test_id)
+			if item is not None:
+				item.setText(1, 'queued')
+				item.setText(2, '')
+		self._run_started = time.time()
+		self.status.setText(f'Running {len(test_ids)} tests on {min(self.workers, max(len(test_ids), 1))} workers...')
+		self.runner.start(self.root, test_ids, self.workers, self.store.project(self.root)['tests'])
+
+	def _on_result(self, test_id, outcome, duration, message):
+		self.results[test_id] = outcome
+		self.store.project(self.root)['tests'][test_id] = {'outcome': outcome, 'duration': duration}
+		item = self.items.get(test_id)
+		if item is not None:
+			item.setText(1, outcome)
+			item.setData(2, Qt.DisplayRole, round(duration, 3))
+			item.setData(0, Qt.UserRole + 1, message)
+		counts = {}
+		for value in self.results.values():
+			counts[value] = counts.get(value, 0) + 1
+		self.status.setText(', '.join(f'{n} {k}' for k, n in sorted(counts.items())))
+
+	def _on_finished(self):
+		project = self.store.project(self.root)
+		if self._run_started:
+			project['last_run'] = self._run_started
+			self._run_started = 0.0
+		self.store.save()
+		for item in self.items.values():
+			if item.text(1) == 'queued':
+				item.setText(1, '')
+		if not self.results:
+			self.status.setText('No tests run')
+
+	# ---------- Navigation ----------
+
+	def _on_current_changed(self, item, _previous):
+		self.details.setPlainText(item.data(0, Qt.UserRole + 1) or '' if item is not None else '')
+
+	def _on_double_clicked(self, item, _column):
+		location = item.data(0, Qt.UserRole)
+		if location:
+			relpath, line = location
+			self.openRequested.emit(os.path.join(self.root, relpath), line)
@@ -0,0 +1,116 @@
+import asyncio
+import importlib
+import inspect
+import io
+import json
+import os
+import sys
+import time
+import traceback
+import unittest
+
+# Test worker started by the IDE's test panel: `python test_worker.py ROOT`.
+# Stdlib only, since it runs in the project's interpreter. Reads one JSON
+# request per line on stdin ({"id": "path/test_x.py::Class::test_y"}) and
+# answers each with one result line on stdout, prefixed by MARKER so stray
+# output from tests (including C extensions writing to fd 1) cannot be
+# mistaken for protocol. Imported modules stay cached between tests, which
+# is why the IDE keeps a worker alive for a whole run.
+
+MARKER = '\x1eSNYTEST '
+
+
+def emit(message):
+	sys.__stdout__.write(MARKER + json.dumps(message) + '\n')
+	sys.__stdout__.flush()
+
+
+def load_module(root, relpath):
+	# Same idea as pytest's default import mode: the test file's directory is
+	# put on sys.path and the file is imported under its base name
+	path = os.path.join(root, relpath)
+	directory = os.path.dirname(path)
+	if directory not in sys.path:
+		sys.path.insert(0, directory)
+	name = os.path.splitext(os.path.basename(path))[0]
+	module = sys.modules.get(name)
+	if module is not None and os.path.abspath(getattr(module, '__file__', '') or '') == os.path.abspath(path):
+		return module
+	return importlib.import_module(name)
+
+
+def call(func):
+	# `async def` tests are discovered too; run them to completion
+	result = func()
+	if inspect.iscoroutine(result):
+		asyncio.run(result)
+
+
+def run_test(root, test_id):
+	relpath, *names = test_id.split('::')
+	module = load_module(root, relpath)
+	obj = module
+	owner = None
+	for name in names:
+		owner = obj
+		obj = getattr(obj, name)
+	if inspect.isclass(owner) and issubclass(owner, unittest.TestCase):
+		result = unittest.TestResult()
+		owner(names[-1]).run(result)
+		if result.skipped:
+			return 'skipped', result.skipped[0][1]
+		problems = result.errors or result.failures
+		if problems:
+			return ('error' if result.errors else 'failed'), problems[0][1]
+		return 'passed', ''
+	if inspect.isclass(owner):
+		instance = owner()
+		if hasattr(instance, 'setup_method'):
+			instance.setup_method(getattr(instance, names[-1]))
+		try:
+			call(getattr(instance, names[-1]))
+		finally:
+			if hasattr(instance, 'teardown_method'):
+				instance.teardown_method(getattr(instance, names[-1]))
+		return 'passed', ''
+	params = [p for p in inspect.signature(obj).parameters.values() if p.default is p.empty]
+	if params:
+		return 'skipped', 'needs fixtures: ' + ', '.join(p.name for p in params)
+	call(obj)
+	return 'passed', ''
+
+
+def main(argv):
+	root = os.path.abspath(argv[0] if argv else os.getcwd())
+	os.chdir(root)
+	if root not in sys.path:
+		sys.path.insert(0, root)
+	for line in sys.stdin:
+		line = line.strip()
+		if not line:
+			continue
+		request = json.loads(line)
+		test_id = request['id']
+		captured = io.StringIO()
+		sys.stdout = sys.stderr = captured
+		start = time.perf_counter()
+		try:
+			outcome, message = run_test(root, test_id)
+		except unittest.SkipTest as e:
+			outcome, message = 'skipped', str(e)
+		except AssertionError:
+			outcome, message = 'failed', traceback.format_exc()
+		except BaseException:
+			outcome, message = 'error', traceback.format_exc()
+		finally:
+			sys.stdout, sys.stderr = sys.__stdout__, sys.__stderr__
+		duration = time.perf_counter() - start
+		output = captured.getvalue()
+		if outcome in ('failed', 'error') and output:
+			message += '\n--- captured output ---\n' + output
+		emit({'id': test_id, 'outcome': outcome, 'duration': duration, 'message': message})
+	return 0
+
+
+if __name__ == '__main__':
+	sys.exit(main(sys.argv[1:]))
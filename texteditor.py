@@ -1,31 +1,89 @@
-from PySide6.QtWidgets import QPlainTextEdit, QWidget, QCompleter, QApplication
+from PySide6.QtWidgets import QPlainTextEdit, QWidget, QCompleter, QApplication, QPlainTextDocumentLayout, QToolTip, QTextEdit
 from PySide6.QtGui import (
 	QSyntaxHighlighter, QTextCharFormat, QColor, 
-	QFont, QPainter, QTextCursor
+	QFont, QPainter, QTextCursor, QTextDocument, QKeySequence, QPen, QIcon, QKeyEvent
 )
-from PySide6.QtCore import Qt, QSize, QRegularExpression, QStringListModel
+from PySide6.QtCore import Qt, QRect, QSize, QRegularExpression, QStringListModel, QEvent, QPointF, QPoint, QTimer
 
+import contextlib
 import json
 import os
 import re
+import time
+import zlib
+
+from theme_to_stylesheet import load_theme
+from file_io import read_text, diff_lines, map_line, LogFollower
+from undo_history import UndoHistory
+from checker import DocumentChecker
+from brackets import BlockData, scan_brackets, find_matching_bracket, block_data, measure_indent
+from folding import FoldState
+from minimap import Minimap
+from find_replace import utf16_offset
+from debugger import Breakpoints
+
+ICON_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icons')
 
 class CodeEditor(QPlainTextEdit):
-	def __init__(self, c):
+	def __init__(self, c, shared=None):
 		super().__init__()
 		self.setFont(QFont("Cascadia Code", 14))
 
-		self.Highlighter = Highlighter(c, self.document(), "python")
+		if shared is None:
+			self.Highlighter = Highlighter(c, self.document(), "python")
+		else:
+			# Second view onto an already open document: reuse its document,
+			# highlighter and symbol index instead of building new ones
+			self.setDocument(shared.document())
+			self.Highlighter = shared.Highlighter
+		self.Highlighter.views.append(self)
+		if shared is None:
+			self.undo_history = UndoHistory(self.document(), parent=self.Highlighter)
+		else:
+			self.undo_history = shared.undo_history
+		if shared is None:
+			self.checker = DocumentChecker(self.document(), parent=self.Highlighter)
+		else:
+			self.checker = shared.checker
+		self.checker.diagnosticsChanged.connect(self._on_diagnostics_changed)
+		if shared is None:
+			self.folds = FoldState(self.document(), parent=self.Highlighter)
+		else:
+			self.folds = shared.folds
+		self.folds.changed.connect(self._on_folds_changed)
+		if shared is None:
+			self.breakpoints = Breakpoints(self.document(), parent=self.Highlighter)
+		else:
+			self.breakpoints = shared.breakpoints
+		# Gutter markers for (unfolded, folded) regions and breakpoints
+		self._fold_icons = (QIcon(os.path.join(ICON_DIR, 'caret-down.svg')), QIcon(os.path.join(ICON_DIR, 'caret-right.svg')))
+		self._breakpoint_icon = QIcon(os.path.join(ICON_DIR, 'breakpoint.svg'))
 
-		with open(c) as f:
-			self.colors = json.load(f)
+		self.colors = load_theme(c)
 		
-		self.file_path = None
+		self.file_path = shared.file_path if shared is not None else None
+		# Size on disk at load; files at or above large_file_bytes drop optional views
+		self.file_size = shared.file_size if shared is not None else 0
+		self.large_file_bytes = 16 * 1024 * 1024
+		self.minimap_enabled = True
+		# On-disk format, kept from load so saving writes the file back the same way
+		self.encoding = shared.encoding if shared is not None else 'utf-8'
+		self.newline = shared.newline if shared is not None else os.linesep
 		
 		self.class_regex = re.compile(self.Highlighter.auto_regex['class'])
 		self.defs = re.compile(self.Highlighter.auto_regex['def']) 
 		self.dynamic_completions = self.Highlighter.completions
-
-		self.completer = QCompleter(sorted(self.dynamic_completions))
+		self._base_completions = self.Highlighter.base_completions
+		# Compact state kept while the tab is hibernated (see hibernate/restore)
+		self._hibernated = None
+		self.restore_error = None
+		# LogFollower while the tab is in tail mode (see start_tail/stop_tail)
+		self.tail = None
+		self.tail_max_lines = 0
+		# Keys typed while a save streams the document out (see set_save_locked)
+		self._queued_keys = None
+
+		self.completer = QCompleter(self.Highlighter.completion_model, self)
 		self.completer.setCaseSensitivity(Qt.CaseInsensitive)
 		self.completer.setWidget(self)
 		self.completer.activated.connect(self.insertCompletion)
@@ -35,20 +93,523 @@ class CodeEditor(QPlainTextEdit):
 
 		self.pairs = {'(': ')', '[': ']', '{': f'}}', '"': '"', "'": "'"} 
 
+		self.minimap = Minimap(self)
+		self.minimap.attach(self.document())
 		self._init_line_number_area()
+		self.breakpoints.changed.connect(self.line_number_area.update)
 		self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' '))
 
-		# Connect textChanged signal to update completions dynamically
-		self.textChanged.connect(self.updateDynamicCompletions)
+		# Connect textChanged signal to update completions dynamically (looked up
+		# per call, so a class-level wrapper such as telemetry's applies)
+		self.textChanged.connect(lambda: self.updateDynamicCompletions())
+
+		# Extra selections by owner (bracket match, search, ...), combined on update
+		self._extra_selections = {}
+		self.cursorPositionChanged.connect(self._update_bracket_match)
+
+		# Find highlights cover the visible blocks plus a margin and are
+		# recomputed (coalesced) after edits, scrolling or resizing
+		self._search_pattern = None
+		self._search_range = None  # (first, last) block numbers highlighted
+		self._search_timer = QTimer(self)
+		self._search_timer.setSingleShot(True)
+		self._search_timer.setInterval(0)
+		self._search_timer.timeout.connect(self._update_search_highlights)
+		self.textChanged.connect(self._invalidate_search_highlights)
+		self.verticalScrollBar().valueChanged.connect(self._on_search_scrolled)
+
+	def views(self):
+		# All editors currently showing this editor's document (including itself)
+		return list(self.Highlighter.views)
+
+	def detach_view(self):
+		# Called before the editor is closed. Hands the shared document over to a
+		# remaining view so closing one side of a split does not delete it.
+		views = self.Highlighter.views
+		if self in views:
+			views.remove(self)
+		if views:
+			self.document().setParent(views[0])
+
+	def apply_theme(self, theme_path, syntax=True):
+		# `syntax` is False when the new theme keeps the syntax colors: only
+		# the gutter and minimap, which use the other theme values, change
+		self.colors = load_theme(theme_path)
+		if syntax:
+			self.Highlighter.apply_theme(theme_path)
+		self.line_number_area.update()
+		self.minimap.apply_colors(self.colors)
+
+	def showEvent(self, event):
+		super().showEvent(event)
+		if self.Highlighter.stale and self.Highlighter.document() is not None:
+			self.Highlighter.stale = False
+			self.Highlighter.rehighlight()
 
 	def load_from_file(self, path, encoding='utf-8'):
-		with open(path, 'r', encoding=encoding, errors='replace') as f:
-			self.setPlainText(f.read())
+		text, self.encoding, self.newline = read_text(path, encoding)
+		self.file_size = len(text)
+		self._update_minimap()
+		self.setPlainText(text)
 		self.file_path = path
+		self.document().setModified(False)
+		self.undo_history.set_base_from_file(path)
+		self.checker.set_filename(path)
+
+	def apply_external_text(self, text):
+		# Brings the document to `text` (the file as changed on disk) with a
+		# minimal line diff that undoes as one step. Each region is its own
+		# (joined) edit block so Qt reports, and rehighlights, only the changed
+		# blocks rather than everything between the first and last change; as
+		# a bulk edit, that happens once at the end. Every view keeps its
+		# cursor line and scroll.
+		doc = self.document()
+		new_lines = text.split('\n')
+		opcodes = diff_lines(self.toPlainText().split('\n'), new_lines)
+		if not opcodes:
+			return False
+		states = []
+		for view in self.views():
+			cursor = view.textCursor()
+			states.append((view, cursor.blockNumber(), cursor.positionInBlock(),
+						   view.verticalScrollBar().value(), view.horizontalScrollBar().value()))
+		cursor = QTextCursor(doc)
+		with self.bulk_edit():
+			# Bottom-up, so the block numbers of regions still to do stay valid
+			for n, (_tag, i1, i2, j1, j2) in enumerate(reversed(opcodes)):
+				if n == 0:
+					cursor.beginEditBlock()
+				else:
+					cursor.joinPreviousEditBlock()
+				self._replace_lines(cursor, i1, i2, new_lines[j1:j2])
+				cursor.endEditBlock()
+		for view, line, column, scroll, hscroll in states:
+			block = doc.findBlockByNumber(map_line(line, opcodes))
+			view_cursor = view.textCursor()
+			view_cursor.setPosition(block.position() + min(column, block.length() - 1))
+			view.setTextCursor(view_cursor)
+			view.verticalScrollBar().setValue(scroll)
+			view.horizontalScrollBar().setValue(hscroll)
+		return True
+
+	def _replace_lines(self, cursor, first_line, end_line, lines):
+		# Blocks first_line..end_line-1 become `lines` (an empty range inserts)
+		doc = self.document()
+		replacement = '\n'.join(lines)
+		if first_line == end_line:
+			block = doc.findBlockByNumber(first_line)
+			if block.isValid():
+				cursor.setPosition(block.position())
+				cursor.insertText(replacement + '\n')
+			else:
+				cursor.movePosition(QTextCursor.End)
+				cursor.insertText('\n' + replacement)
+			return
+		first = doc.findBlockByNumber(first_line)
+		last = doc.findBlockByNumber(end_line - 1)
+		end = last.position() + last.length() - 1
+		if lines:
+			cursor.setPosition(first.position())
+			cursor.setPosition(end, QTextCursor.KeepAnchor)
+			cursor.insertText(replacement)
+		elif last.next().isValid():
+			# Removed lines take their line break with them
+			cursor.setPosition(first.position())
+			cursor.setPosition(last.next().position(), QTextCursor.KeepAnchor)
+			cursor.removeSelectedText()
+		else:
+			previous = first.previous()
+			cursor.setPosition(previous.position() + previous.length() - 1)
+			cursor.setPosition(end, QTextCursor.KeepAnchor)
+			cursor.removeSelectedText()
+
+	# ---------- Bulk edits ----------
+
+	# Pastes of at least this many lines run as a bulk edit
+	BULK_PASTE_LINES = 2000
+
+	@contextlib.contextmanager
+	def bulk_edit(self):
+		# Scope for large or many-part edits (big pastes, Replace All, reloads).
+		# Highlighting of the changed blocks, symbol indexing and gutter sizing
+		# wait until the outermost scope ends and then run once: highlighting
+		# for the visible blocks right away and for the rest in the background.
+		highlighter = self.Highlighter
+		highlighter.bulk_depth += 1
+		try:
+			yield
+		finally:
+			highlighter.bulk_depth -= 1
+			if not highlighter.bulk_depth:
+				highlighter.finish_bulk_edit()
+				for view in self.views():
+					view.update_line_number_area_width(0)
+				self.updateDynamicCompletions()
+
+	def insertFromMimeData(self, source):
+		if source.hasText() and source.text().count('\n') >= self.BULK_PASTE_LINES:
+			with self.bulk_edit():
+				super().insertFromMimeData(source)
+		else:
+			super().insertFromMimeData(source)
+
+	def setPlainText(self, text):
+		# A bulk load is not an edit: it resets the history instead of filling it
+		self.undo_history.replaying = True
+		try:
+			super().setPlainText(text)
+		finally:
+			self.undo_history.replaying = False
+		self.undo_history.attach(self.document())
+
+	# ---------- Extra selections / bracket matching ----------
+
+	def set_extra_selections(self, owner, selections):
+		self._extra_selections[owner] = selections
+		combined = []
+		for items in self._extra_selections.values():
+			combined.extend(items)
+		self.setExtraSelections(combined)
+
+	def _bracket_at_cursor(self):
+		# (block, column) of the bracket just after or just before the cursor
+		cursor = self.textCursor()
+		block = cursor.block()
+		col = cursor.positionInBlock()
+		brackets = block_data(block).brackets
+		for c, _ch in brackets:
+			if c == col:
+				return block, c
+		for c, _ch in brackets:
+			if c == col - 1:
+				return block, c
+		return None
+
+	def _bracket_selection(self, block, col, color):
+		sel = QTextEdit.ExtraSelection()
+		sel.format.setBackground(color)
+		cursor = QTextCursor(block)
+		cursor.setPosition(block.position() + col)
+		cursor.setPosition(block.position() + col + 1, QTextCursor.KeepAnchor)
+		sel.cursor = cursor
+		return sel
+
+	# ---------- Find highlights ----------
+
+	SEARCH_MARGIN = 50       # blocks highlighted above and below the viewport
+	SEARCH_MAX_MATCHES = 5000
+
+	def set_search_pattern(self, pattern):
+		self._search_pattern = pattern
+		self._invalidate_search_highlights()
+
+	def _invalidate_search_highlights(self):
+		self._search_range = None
+		if self._search_pattern is not None or self._extra_selections.get('search'):
+			self._search_timer.start()
+
+	def _on_search_scrolled(self, _value):
+		if self._search_pattern is None:
+			return
+		first, last = self._visible_block_range()
+		if self._search_range is None or first < self._search_range[0] or last > self._search_range[1]:
+			self._search_timer.start()
+
+	def _visible_block_range(self):
+		first = self.firstVisibleBlock().blockNumber()
+		last = self.cursorForPosition(self.viewport().rect().bottomLeft()).blockNumber()
+		return first, last
+
+	def _update_search_highlights(self):
+		pattern = self._search_pattern
+		selections = []
+		if pattern is not None:
+			first, last = self._visible_block_range()
+			first = max(first - self.SEARCH_MARGIN, 0)
+			last = last + self.SEARCH_MARGIN
+			self._search_range = (first, last)
+			color = QColor(self.colors.get('Accent', '#6897BB'))
+			color.setAlpha(110)
+			block = self.document().findBlockByNumber(first)
+			while block.isValid() and block.blockNumber() <= last and len(selections) < self.SEARCH_MAX_MATCHES:
+				text = block.text()
+				for m in pattern.finditer(text):
+					if m.end() == m.start():
+						continue
+					sel = QTextEdit.ExtraSelection()
+					sel.format.setBackground(color)
+					cursor = QTextCursor(block)
+					cursor.setPosition(block.position() + utf16_offset(text, m.start()))
+					cursor.setPosition(block.position() + utf16_offset(text, m.end()), QTextCursor.KeepAnchor)
+					sel.cursor = cursor
+					selections.append(sel)
+				block = block.next()
+		self.set_extra_selections('search', selections)
+
+	def _update_bracket_match(self):
+		found = self._bracket_at_cursor()
+		selections = []
+		if found is not None:
+			block, col = found
+			partner = find_matching_bracket(block, col)
+			if partner is None:
+				selections.append(self._bracket_selection(block, col, QColor(self.colors.get('Error', '#e45649'))))
+			else:
+				color = QColor(self.colors.get('SelectionBG', '#44475a'))
+				selections.append(self._bracket_selection(block, col, color))
+				selections.append(self._bracket_selection(partner[0], partner[1], color))
+		if selections or self._extra_selections.get('brackets'):
+			self.set_extra_selections('brackets', selections)
+
+	def jump_to_matching_bracket(self):
+		found = self._bracket_at_cursor()
+		if found is None:
+			return
+		partner = find_matching_bracket(*found)
+		if partner is None:
+			return
+		block, col = partner
+		cursor = self.textCursor()
+		cursor.setPosition(block.position() + col)
+		self.setTextCursor(cursor)
+
+	# ---------- Diagnostics ----------
+
+	def _on_diagnostics_changed(self):
+		self.viewport().update()
+		self.line_number_area.update()
+
+	def _diagnostic_color(self, severity):
+		return QColor(self.colors.get('Error' if severity == 'error' else 'Warning', '#e45649'))
+
+	def _paint_diagnostics(self, painter, block, diagnostics):
+		# Wavy underline under each diagnostic range of a visible block
+		length = len(block.text())
+		cursor = QTextCursor(block)
+		for col, end_col, severity, _message in diagnostics:
+			col = min(col, length)
+			end_col = max(min(end_col, length), col + 1)
+			cursor.setPosition(block.position() + col)
+			start_rect = self.cursorRect(cursor)
+			cursor.setPosition(block.position() + min(end_col, length))
+			end_rect = self.cursorRect(cursor)
+			x0 = start_rect.left()
+			x1 = end_rect.left() if end_rect.top() == start_rect.top() and end_col <= length else x0 + self.fontMetrics().horizontalAdvance(' ')
+			y = start_rect.bottom()
+			painter.setPen(QPen(self._diagnostic_color(severity), 1))
+			points = []
+			x = x0
+			up = True
+			while x <= max(x1, x0 + 4):
+				points.append(QPointF(x, y - (2 if up else 0)))
+				x += 2
+				up = not up
+			painter.drawPolyline(points)
+
+	def viewportEvent(self, event):
+		if event.type() == QEvent.ToolTip:
+			cursor = self.cursorForPosition(event.pos())
+			messages = [message for _c, _e, _s, message in self.checker.diagnostics.get(cursor.blockNumber(), [])]
+			if block_data(cursor.block()).long_line:
+				messages.append(f"Line longer than {self.Highlighter.long_line_chars:,} characters: only its start is "
+								"highlighted and completion skips it (View > Process Long Lines Fully)")
+			if messages:
+				QToolTip.showText(event.globalPos(), "\n".join(messages), self.viewport())
+			else:
+				QToolTip.hideText()
+			return True
+		return super().viewportEvent(event)
+
+	# ---------- Undo ----------
+
+	def set_undo_budget(self, budget_bytes):
+		self.undo_history.set_budget(budget_bytes)
+
+	def undo_memory_usage(self):
+		return self.undo_history.memory_usage()
+
+	def undo(self):
+		if self.document().isUndoAvailable():
+			self.undo_history.replaying = True
+			try:
+				super().undo()
+			finally:
+				self.undo_history.replaying = False
+			return
+		# Qt's stack is exhausted; step back to the previous compressed checkpoint
+		cursor = self.textCursor()
+		if self.undo_history.restore_previous(cursor):
+			self.setTextCursor(cursor)
+
+	def redo(self):
+		if self.document().isRedoAvailable():
+			self.undo_history.replaying = True
+			try:
+				super().redo()
+			finally:
+				self.undo_history.replaying = False
+			return
+		# Qt's stack is exhausted; step forward to the checkpoint undone last
+		cursor = self.textCursor()
+		if self.undo_history.restore_next(cursor):
+			self.setTextCursor(cursor)
+
+	# ---------- Saving ----------
+	def set_save_locked(self, locked):
+		# The document must not change while a save reads it in slices; keys
+		# typed meanwhile are held and replayed in order once it is written out
+		self.setReadOnly(locked)
+		if locked:
+			self._queued_keys = []
+			return
+		keys, self._queued_keys = self._queued_keys or [], None
+		for event in keys:
+			self.keyPressEvent(event)
+
+	# ---------- Hibernation ----------
+
+	def is_hibernated(self):
+		return self._hibernated is not None
+
+	def is_modified(self):
+		if self._hibernated is not None:
+			return self._hibernated['modified']
+		return self.document().isModified()
+
+	def memory_usage(self):
+		# Rough estimate in bytes: UTF-16 text, per-block layout/format data and undo history
+		if self.Highlighter.views and self.Highlighter.views[0] is not self:
+			return 0  # shared document is accounted to its first view
+		if self._hibernated is not None:
+			return len(self._hibernated.get('text') or b'') + 512
+		doc = self.document()
+		usage = doc.characterCount() * 2 + doc.blockCount() * 200
+		if self.Highlighter.document() is not None:
+			usage += doc.blockCount() * 64
+		usage += self.undo_history.memory_usage()
+		return usage
+
+	def hibernate(self):
+		# Drop document, layout, highlight and undo state, keeping only what is
+		# needed to rebuild the tab when it is focused again.
+		# Shared documents and read-only ones (e.g. being streamed to disk) stay loaded
+		if self._hibernated is not None or len(self.Highlighter.views) > 1 or self.isReadOnly():
+			return
+		doc = self.document()
+		state = {
+			'cursor': self.textCursor().position(),
+			'anchor': self.textCursor().anchor(),
+			'scroll': self.verticalScrollBar().value(),
+			'hscroll': self.horizontalScrollBar().value(),
+			'modified': doc.isModified(),
+			'text': None,
+		}
+		if doc.isModified() or self._file_stat() is None:
+			state['text'] = zlib.compress(self.toPlainText().encode('utf-8'), 1)
+		self._hibernated = state
+		self.undo_history.attach(None)
+		self.checker.attach(None)
+		state['folds'] = self.folds.headers()
+		self.folds.attach(None)
+		self.breakpoints.attach(None)
+		# The highlighter is parented to the document by default; keep it alive.
+		# Reparenting the document also stops setDocument from deleting it under us.
+		self.Highlighter.setParent(self)
+		doc.setParent(self)
+		self.blockSignals(True)
+		try:
+			self.Highlighter.setDocument(None)
+			empty = QTextDocument(self)
+			empty.setDocumentLayout(QPlainTextDocumentLayout(empty))
+			self.setDocument(empty)
+		finally:
+			self.blockSignals(False)
+		doc.deleteLater()
+		self.minimap.attach(empty)
+		self.dynamic_completions.clear()
+		self.dynamic_completions.update(self._base_completions)
+		self.Highlighter.completion_model.setStringList(sorted(self.dynamic_completions))
+		self.Highlighter.indexed_revision = None
+
+	def restore(self):
+		# Returns False, leaving the tab hibernated and read-only, when the file
+		# it is rebuilt from cannot be read back; restore_error says why
+		state = self._hibernated
+		if state is None:
+			return True
+		if state['text'] is not None:
+			text = zlib.decompress(state['text']).decode('utf-8')
+		else:
+			# Buffer matched the file when hibernated, so reading it back is lossless
+			try:
+				text, _encoding, _newline = read_text(self.file_path, self.encoding)
+			except OSError as e:
+				self.restore_error = str(e)
+				state['unreadable'] = True
+				self.setReadOnly(True)
+				return False
+		self._hibernated = None
+		self.restore_error = None
+		if state.get('unreadable'):
+			self.setReadOnly(False)
+		doc = QTextDocument(self)
+		doc.setDocumentLayout(QPlainTextDocumentLayout(doc))
+		doc.setDefaultFont(self.font())
+		doc.setPlainText(text)
+		doc.setModified(state['modified'])
+		old = self.document()
+		self.setDocument(doc)
+		old.deleteLater()
+		self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' '))
+		self.Highlighter.setDocument(doc)
+		self.Highlighter.stale = False
+		self.undo_history.attach(doc, base=state['text'])
+		self.checker.attach(doc)
+		self.folds.attach(doc)
+		self.breakpoints.attach(doc)
+		self.minimap.attach(doc)
+		for number in state['folds']:
+			block = doc.findBlockByNumber(number)
+			if block.isValid():
+				self.folds.fold(block)
+		if state['text'] is None:
+			self.undo_history.set_base_from_file(self.file_path)
+		self.update_line_number_area_width(0)
+		self.updateDynamicCompletions()
+		length = doc.characterCount() - 1
+		cursor = self.textCursor()
+		cursor.setPosition(min(state['anchor'], length))
+		cursor.setPosition(min(state['cursor'], length), QTextCursor.KeepAnchor)
+		self.setTextCursor(cursor)
+		self.verticalScrollBar().setValue(state['scroll'])
+		self.horizontalScrollBar().setValue(state['hscroll'])
+		return True
+
+	def _file_stat(self):
+		if not self.file_path:
+			return None
+		try:
+			st = os.stat(self.file_path)
+		except OSError:
+			return None
+		return (st.st_size, st.st_mtime_ns)
 
 	def updateDynamicCompletions(self):
+		# Symbols are indexed once per document; other views of it skip the work
+		highlighter = self.Highlighter
+		if self.tail is not None or highlighter.bulk_depth or highlighter.catching_up:
+			return  # a followed log is not code; bulk edits index once at the end
+		revision = self.document().revision()
+		if self.Highlighter.indexed_revision == revision:
+			return
+		self.Highlighter.indexed_revision = revision
+
 		# Get full document text
 		text = self.toPlainText()
+		limit = self.Highlighter.long_line_limit()
+		if limit is not None and self.Highlighter.long_line_seen:
+			# Lines past the long-line limit are data, not code: leave them out
+			text = '\n'.join(line for line in text.split('\n') if len(line) <= limit)
 
 		# Find all class names in the document
 		matches = set(self.class_regex.findall(text)+self.defs.findall(text))
@@ -57,9 +618,8 @@ class CodeEditor(QPlainTextEdit):
 		new_items = matches - self.dynamic_completions
 		if new_items:
 			self.dynamic_completions.update(new_items)
-			# Update completer model
-			model = QStringListModel(sorted(self.dynamic_completions))
-			self.completer.setModel(model)
+			# Update the completer model shared by all views of the document
+			self.Highlighter.completion_model.setStringList(sorted(self.dynamic_completions))
 
 	def wheelEvent(self, event):
 		if event.modifiers() & Qt.ControlModifier:
@@ -95,10 +655,22 @@ class CodeEditor(QPlainTextEdit):
 
 
 	def keyPressEvent(self, event):
+		if self._queued_keys is not None:
+			self._queued_keys.append(QKeyEvent(event.type(), event.key(), event.modifiers(), event.text(),
+											   event.isAutoRepeat(), event.count()))
+			event.accept()
+			return
 		cursor = self.textCursor()
 		char = event.text()
 		key = event.key()
 
+		if event.matches(QKeySequence.Undo):
+			self.undo()
+			return
+		if event.matches(QKeySequence.Redo):
+			self.redo()
+			return
+
 		if key == Qt.Key_Backspace and not cursor.hasSelection():
 			pos = cursor.position()
 			if pos > 0:
@@ -117,8 +689,11 @@ class CodeEditor(QPlainTextEdit):
 		# Handle auto-close
 		if char in self.pairs:
 			closing_char = self.pairs[char]
+			# One undo entry for the pair, not one per character
+			cursor.beginEditBlock()
 			super().keyPressEvent(event)
 			self.insertPlainText(closing_char)
+			cursor.endEditBlock()
 			cursor.movePosition(QTextCursor.Left)  # FIXED
 			self.setTextCursor(cursor)
 			return
@@ -177,8 +752,11 @@ class CodeEditor(QPlainTextEdit):
 					indent += ch
 				else:
 					break
+			# Newline and auto-indent undo together
+			cursor.beginEditBlock()
 			super().keyPressEvent(event)
 			self.insertPlainText(indent)
+			cursor.endEditBlock()
 			return
 
 		super().keyPressEvent(event)
@@ -234,10 +812,22 @@ class CodeEditor(QPlainTextEdit):
 
 	def line_number_area_width(self):
 		digits = len(str(max(1, self.blockCount())))
-		return self.fontMetrics().horizontalAdvance('9') * digits + 10
+		# Extra room on the left for breakpoint and diagnostic markers and on the right for fold markers
+		marker = max(4, self.fontMetrics().height() // 3)
+		return (self.fontMetrics().horizontalAdvance('9') * digits + 10 + marker
+				+ self._breakpoint_marker_width() + self._fold_marker_width())
+
+	def _fold_marker_width(self):
+		return self.fontMetrics().height()
+
+	def _breakpoint_marker_width(self):
+		return self.fontMetrics().height()
 
 	def update_line_number_area_width(self, _):
-		self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+		if self.Highlighter.bulk_depth:
+			return  # sized once when the bulk edit ends
+		right = self.minimap.WIDTH if self.minimap.isVisibleTo(self) else 0
+		self.setViewportMargins(self.line_number_area_width(), 0, right, 0)
 
 	def update_line_number_area(self, rect, dy):
 		if dy:
@@ -254,6 +844,127 @@ class CodeEditor(QPlainTextEdit):
 		self.line_number_area.setGeometry(cr.x(), cr.y(),
 										  self.line_number_area_width(), cr.height())
 		self.line_number_area.update()
+		self.minimap.setGeometry(cr.right() - self.minimap.WIDTH + 1, cr.y(), self.minimap.WIDTH, cr.height())
+		if self._search_pattern is not None:
+			self._search_timer.start()
+
+	# ---------- Long lines ----------
+
+	def set_long_line_limit(self, chars):
+		self.Highlighter.set_long_line_limit(chars)
+
+	def set_full_processing(self, enabled):
+		# Per document: lifts the long-line limit for every view of it
+		self.Highlighter.set_full_processing(enabled)
+		for view in self.views():
+			view.viewport().update()
+
+	def is_full_processing(self):
+		return self.Highlighter.full_processing
+
+	# ---------- Tail mode ----------
+
+	def is_tailing(self):
+		return self.tail is not None
+
+	def start_tail(self, max_lines):
+		# Turns the tab into a read-only live view of the end of its file: the
+		# last `max_lines` lines are loaded, appends are streamed in, and the
+		# oldest blocks are dropped once there are more than `max_lines`.
+		# Highlighting, linting, folding, undo and symbol indexing are detached
+		# meanwhile. Only single-view documents can be followed.
+		if self.tail is not None or not self.file_path or len(self.Highlighter.views) > 1 or self.is_hibernated():
+			return False
+		follower = LogFollower(self.file_path, self.encoding, parent=self)
+		try:
+			text = follower.start(max_lines)
+		except OSError:
+			return False
+		self.tail = follower
+		self.tail_max_lines = max_lines
+		doc = self.document()
+		self.Highlighter.setDocument(None)
+		self.undo_history.attach(None)
+		self.checker.attach(None)
+		self.folds.attach(None)
+		self.breakpoints.attach(None)
+		self.setReadOnly(True)
+		doc.setUndoRedoEnabled(False)
+		doc.setPlainText(text)
+		doc.setModified(False)
+		self._update_minimap()
+		follower.appended.connect(self._on_tail_appended)
+		follower.skipped.connect(self._on_tail_skipped)
+		self.moveCursor(QTextCursor.End)
+		bar = self.verticalScrollBar()
+		bar.setValue(bar.maximum())
+		return True
+
+	def stop_tail(self):
+		# Back to a normal editor on the whole file as it is now
+		follower, self.tail = self.tail, None
+		if follower is None:
+			return
+		follower.stop()
+		follower.deleteLater()
+		doc = self.document()
+		doc.setUndoRedoEnabled(True)
+		self.setReadOnly(False)
+		self.load_from_file(self.file_path, self.encoding)
+		self.Highlighter.setDocument(doc)
+		self.checker.attach(doc)
+		self.folds.attach(doc)
+		self.breakpoints.attach(doc)
+		self.updateDynamicCompletions()
+		self.moveCursor(QTextCursor.End)
+
+	def _on_tail_appended(self, text):
+		# One insert per batch at the end, then the oldest blocks past the limit
+		# go in one removal (QTextDocument.maximumBlockCount drops them one at a
+		# time, which costs several times the insert). The view follows the end
+		# unless the user scrolled away from it.
+		doc = self.document()
+		bar = self.verticalScrollBar()
+		following = bar.value() >= bar.maximum()
+		cursor = QTextCursor(doc)
+		cursor.movePosition(QTextCursor.End)
+		cursor.insertText(text)
+		excess = doc.blockCount() - self.tail_max_lines - 1
+		if excess > 0:
+			top = bar.value()
+			cursor.setPosition(0)
+			cursor.setPosition(doc.findBlockByNumber(excess).position(), QTextCursor.KeepAnchor)
+			cursor.removeSelectedText()
+			if not following:
+				bar.setValue(max(top - excess, 0))
+		doc.setModified(False)
+		if following:
+			bar.setValue(bar.maximum())
+
+	def _on_tail_skipped(self, size):
+		# The writer got further ahead than the kept lines reach back
+		self._on_tail_appended(f'[... {size / 1048576:.1f} MB skipped while catching up ...]\n')
+
+	# ---------- Minimap ----------
+
+	def is_large_file(self):
+		return self.file_size >= self.large_file_bytes
+
+	def set_minimap_enabled(self, enabled):
+		self.minimap_enabled = enabled
+		self._update_minimap()
+
+	def set_large_file_threshold(self, size_bytes):
+		self.large_file_bytes = size_bytes
+		self._update_minimap()
+
+	def _update_minimap(self):
+		show = self.minimap_enabled and not self.is_large_file() and self.tail is None
+		if show != self.minimap.isVisibleTo(self):
+			self.minimap.setVisible(show)
+			if not show:
+				self.minimap.invalidate()  # drop the cached tiles
+			self.update_line_number_area_width(0)
 
 	def paintEvent(self, event):
 		super().paintEvent(event)
@@ -266,26 +977,44 @@ class CodeEditor(QPlainTextEdit):
 		bottom = top + self.blockBoundingRect(block).height()
 
 		indent_width = self.fontMetrics().horizontalAdvance(' ') * 4  # assuming 4-space indent
+		diagnostics = self.checker.diagnostics
 
 		while block.isValid() and top <= event.rect().bottom():
-			text = block.text()
-			indent_level = 0
-			for ch in text:
-				if ch == '\t':
-					indent_level += 1
-				elif ch == ' ':
-					indent_level += 1 / 4  # 4 spaces = 1 indent
-				else:
-					break
+			# Indent width comes from the highlighter's per-block cache
+			data = block_data(block)
+			indent_level = data.indent // 4
 
-			for i in range(int(indent_level)):
+			for i in range(indent_level):
 				x = i * indent_width
 				painter.drawLine(int(x), int(top), int(x), int(bottom))
 
-			block = block.next()
+			if diagnostics and block.blockNumber() in diagnostics:
+				self._paint_diagnostics(painter, block, diagnostics[block.blockNumber()])
+				painter.setPen(QColor("#e0e0e0"))
+
+			if data.long_line:
+				self._paint_long_line_marker(painter, top)
+				painter.setPen(QColor("#e0e0e0"))
+
+			block = self._next_shown_block(block)
 			top = bottom
 			bottom = top + self.blockBoundingRect(block).height()
 
+	def _paint_long_line_marker(self, painter, top):
+		# Tag at the right end of a long line's first row (its tooltip explains it)
+		text = ' long line '
+		metrics = self.fontMetrics()
+		width = metrics.horizontalAdvance(text)
+		rect = QRect(max(self.viewport().width() - width - 4, 0), int(top), width, metrics.height())
+		painter.fillRect(rect, QColor(self.colors.get('Surface', '#3C3F41')))
+		painter.setPen(QColor(self.colors.get('Warning', '#d19a66')))
+		painter.drawText(rect, Qt.AlignCenter, text)
+
+	def _next_shown_block(self, block):
+		# Jumps over a folded region in one step instead of walking hidden blocks
+		end = self.folds.end_of(block)
+		return end.next() if end is not None else block.next()
+
 
 
 	def lineNumberAreaPaintEvent(self, event):
@@ -295,16 +1024,128 @@ class CodeEditor(QPlainTextEdit):
 		top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
 		bottom = top + self.blockBoundingRect(block).height()
 
+		diagnostics = self.checker.diagnostics
+		marker = max(4, self.fontMetrics().height() // 3)
+		fold_width = self._fold_marker_width()
+		fold_x = self.line_number_area.width() - fold_width
+		breakpoint_width = self._breakpoint_marker_width()
+		line_height = self.fontMetrics().height()
+		breakpoint_lines = set(self.breakpoints.lines())
+
 		while block.isValid() and top <= event.rect().bottom():
 			if block.isVisible() and bottom >= event.rect().top():
+				if block.blockNumber() + 1 in breakpoint_lines:
+					self._breakpoint_icon.paint(painter, 1, int(top), breakpoint_width - 2, line_height)
+				if self.folds.fold_at(block) is not None:
+					self._fold_icons[1].paint(painter, fold_x, int(top), fold_width, self.fontMetrics().height())
+				elif self.folds.is_foldable(block):
+					self._fold_icons[0].paint(painter, fold_x, int(top), fold_width, self.fontMetrics().height())
 				number = str(block.blockNumber() + 1)
+				found = diagnostics.get(block.blockNumber()) if diagnostics else None
+				if found:
+					# Gutter marker: errors win over warnings on the same line
+					severity = 'error' if any(d[2] == 'error' for d in found) else 'warning'
+					painter.setPen(Qt.NoPen)
+					painter.setBrush(self._diagnostic_color(severity))
+					painter.drawEllipse(breakpoint_width + 1, int(top) + (line_height - marker) // 2, marker, marker)
 				painter.setPen(QColor(self.colors['LineFG']))
-				painter.drawText(0, int(top), self.line_number_area.width() - 5,
+				painter.drawText(0, int(top), fold_x - 2,
 								 self.fontMetrics().height(), Qt.AlignRight, number)
-			block = block.next()
+			block = self._next_shown_block(block)
 			top = bottom
 			bottom = top + self.blockBoundingRect(block).height()
 
+	def lineNumberAreaMousePressEvent(self, event):
+		# Fold markers on the right, anywhere else toggles a breakpoint
+		if event.button() != Qt.LeftButton:
+			return
+		block = self.cursorForPosition(QPoint(0, int(event.position().y()))).block()
+		if event.position().x() >= self.line_number_area.width() - self._fold_marker_width():
+			self.folds.toggle(block)
+		else:
+			self.breakpoints.toggle(block)
+
+	# ---------- Debugging ----------
+
+	def toggle_breakpoint(self):
+		self.breakpoints.toggle(self.textCursor().block())
+
+	def set_execution_line(self, line):
+		# Highlights the 1-based line the debugger is paused on; None clears it
+		selections = []
+		if line is not None:
+			block = self.document().findBlockByNumber(line - 1)
+			if block.isValid():
+				sel = QTextEdit.ExtraSelection()
+				color = QColor(self.colors.get('Warning', '#d19a66'))
+				color.setAlpha(70)
+				sel.format.setBackground(color)
+				sel.format.setProperty(QTextCharFormat.FullWidthSelection, True)
+				sel.cursor = QTextCursor(block)
+				selections.append(sel)
+				self.go_to_line(line)
+		self.set_extra_selections('debug', selections)
+
+	def go_to_line(self, line):
+		# Moves the cursor to the start of a 1-based line, unfolding it if hidden
+		block = self.document().findBlockByNumber(max(line - 1, 0))
+		if not block.isValid():
+			return
+		header = self.folds.containing_fold(block)
+		if header is not None:
+			self.folds.unfold(header)
+		cursor = self.textCursor()
+		cursor.setPosition(block.position())
+		self.setTextCursor(cursor)
+		self.centerCursor()
+
+	# ---------- Folding ----------
+
+	def _on_folds_changed(self):
+		# Keep the cursor on a visible line
+		header = self.folds.containing_fold(self.textCursor().block())
+		if header is not None:
+			cursor = self.textCursor()
+			cursor.setPosition(header.position() + header.length() - 1)
+			self.setTextCursor(cursor)
+		self.viewport().update()
+		self.line_number_area.update()
+
+	def _fold_target(self):
+		# The cursor's line if it starts a region, else the innermost enclosing header
+		block = self.textCursor().block()
+		if self.folds.is_foldable(block):
+			return block
+		data = block_data(block)
+		indent = None if data.blank else data.indent
+		block = block.previous()
+		while block.isValid() and indent != 0:
+			data = block_data(block)
+			if not data.blank and (indent is None or data.indent < indent):
+				if self.folds.is_foldable(block):
+					return block
+				indent = data.indent
+			block = block.previous()
+		return None
+
+	def fold_current(self):
+		block = self._fold_target()
+		if block is not None:
+			self.folds.fold(block)
+
+	def unfold_current(self):
+		block = self.textCursor().block()
+		if not self.folds.unfold(block):
+			header = self.folds.containing_fold(block)
+			if header is not None:
+				self.folds.unfold(header)
+
+	def fold_all(self):
+		self.folds.fold_all()
+
+	def unfold_all(self):
+		self.folds.unfold_all()
+
 
 class LineNumberArea(QWidget):
 	def __init__(self, editor):
@@ -316,12 +1157,16 @@ class LineNumberArea(QWidget):
 
 	def paintEvent(self, event):
 		self.editor.lineNumberAreaPaintEvent(event)
+
+	def mousePressEvent(self, event):
+		self.editor.lineNumberAreaMousePressEvent(event)
 		
 class Highlighter(QSyntaxHighlighter):
 	def __init__(self, c, document, language):
 		super().__init__(document)
 		self.language = language
 		self.rules = []
+		self.rule_colors = []
 		self.multiline_rules = []
 
 		# Load JSON config
@@ -334,11 +1179,41 @@ class Highlighter(QSyntaxHighlighter):
 		lang_config = config[language]
 		self.auto_regex = lang_config['autocomplete_regexes']
 		self.completions = set(lang_config['auto_keyword'])
-		with open(c) as f:
-			self.colors = json.load(f)['colors']
-
+		self.base_completions = frozenset(self.completions)
+		# The highlighter is the per-document object shared by split views, so
+		# it also carries the symbol index and the editors showing the document
+		self.completion_model = QStringListModel(sorted(self.completions), self)
+		self.indexed_revision = None
+		self.outline = None  # last outline that parsed (see outline.py)
+		self.views = []
+		self.lang_config = lang_config
+		self.theme_path = c
+		# Blocks longer than this (minified or generated lines) are only
+		# processed up to the limit unless full processing is forced
+		self.long_line_chars = 10000
+		self.full_processing = False
+		self.long_line_seen = False
+		# Set when the colors changed while no view was visible; the next
+		# view to be shown rehighlights instead of every document at once
+		self.stale = False
+		# Inside a bulk edit (CodeEditor.bulk_edit) changed blocks get no
+		# colors; [first, last] cursor spans note them until caught up on
+		self.bulk_depth = 0
+		self.deferred = None
+		self.catching_up = False
+		self._last_highlighted = None
+		self._catch_up_timer = QTimer(self)
+		self._catch_up_timer.setSingleShot(True)
+		self._catch_up_timer.setInterval(0)
+		self._catch_up_timer.timeout.connect(self._catch_up)
+		self.set_colors(load_theme(c)['colors'])
+
+	def set_colors(self, colors):
+		self.colors = colors
+		self.rules = []
+		self.rule_colors = []
 		# For each scope (e.g. keywords, comments, strings), add rules
-		for scope, details in lang_config.items():
+		for scope, details in self.lang_config.items():
 			if isinstance(details, list): continue
 			format = QTextCharFormat()
 
@@ -357,15 +1232,159 @@ class Highlighter(QSyntaxHighlighter):
 			for regex_str in details.get("regexes", []):
 				regex = QRegularExpression(regex_str)
 				self.rules.append((regex, format))
+				self.rule_colors.append(QColor(color).rgba())
+
+	def apply_theme(self, theme_path):
+		if os.path.abspath(theme_path) == os.path.abspath(self.theme_path):
+			return
+		self.theme_path = theme_path
+		colors = load_theme(theme_path)['colors']
+		if colors == self.colors:
+			return
+		self.set_colors(colors)
+		if self.document() is None:
+			return  # hibernated; highlighting is rebuilt on restore
+		if any(view.isVisible() for view in self.views):
+			self.rehighlight()
+		else:
+			self.stale = True
+
+	def long_line_limit(self):
+		# None when every block is processed in full
+		if self.full_processing or self.long_line_chars <= 0:
+			return None
+		return self.long_line_chars
+
+	def set_long_line_limit(self, chars):
+		if chars == self.long_line_chars:
+			return
+		limits = [limit for limit in (self.long_line_limit(), chars) if limit and limit > 0]
+		self.long_line_chars = chars
+		if limits and not self.full_processing:
+			self._rehighlight_longer_than(min(limits))
+
+	def set_full_processing(self, enabled):
+		if enabled == self.full_processing:
+			return
+		self.full_processing = enabled
+		if self.long_line_chars > 0:
+			self._rehighlight_longer_than(self.long_line_chars)
+
+	def _rehighlight_longer_than(self, chars):
+		# Only blocks on either side of a changed limit need highlighting again
+		document = self.document()
+		if document is None:
+			return  # hibernated; highlighting is rebuilt on restore
+		block = document.firstBlock()
+		while block.isValid():
+			if block.length() - 1 > chars:
+				self.rehighlightBlock(block)
+			block = block.next()
+
+	def _defer(self, block):
+		# Qt reports the blocks of one change in order, so they usually extend
+		# the latest range; separate changes get ranges of their own
+		position = block.position()
+		if self.deferred:
+			first, last = self.deferred[-1]
+			if first.position() <= position <= last.position():
+				return
+			if position == last.block().position() + last.block().length():
+				last.setPosition(position)
+				return
+			if position + block.length() == first.position():
+				first.setPosition(position)
+				return
+		else:
+			self.deferred = []
+		self.deferred.append([QTextCursor(block), QTextCursor(block)])
+
+	def finish_bulk_edit(self):
+		# Deferred blocks on screen are highlighted now, the rest from the top
+		# down in short slices on later event-loop turns
+		if self.deferred is None:
+			return
+		self.deferred.sort(key=lambda span: span[0].position())
+		for view in self.views:
+			if not view.isVisible():
+				continue
+			top, bottom = view._visible_block_range()
+			for first, last in self.deferred:
+				block = self.document().findBlockByNumber(max(top, first.blockNumber()))
+				end = min(bottom, last.blockNumber())
+				while block.isValid() and block.blockNumber() <= end:
+					self.rehighlightBlock(block)
+					block = block.next()
+		self._catch_up_timer.start()
+
+	def _catch_up(self, slice_ms=16):
+		if self.deferred is None or self.bulk_depth:
+			return
+		if self.deferred and self.deferred[0][0].document() is not self.document():
+			self.deferred = None  # hibernated; highlighting is rebuilt on restore
+			return
+		# rehighlightBlock reports a contents change; it is not an edit, so
+		# neither the undo budget nor the symbol index should see it
+		history = self.views[0].undo_history if self.views else None
+		if history is not None:
+			history.replaying = True
+		self.catching_up = True
+		try:
+			deadline = time.monotonic() + slice_ms / 1000
+			while self.deferred:
+				first, last = self.deferred[0]
+				block = first.block()
+				end = last.blockNumber()
+				while block.isValid() and block.blockNumber() <= end and time.monotonic() < deadline:
+					# Qt carries on past the block (at least one more, further
+					# while the state changes); continue after the last one it did
+					self.rehighlightBlock(block)
+					block = self._last_highlighted.next()
+				if block.isValid() and block.blockNumber() <= end:
+					first.setPosition(block.position())
+					self._catch_up_timer.start()
+					return
+				self.deferred.pop(0)
+			self.deferred = None
+		finally:
+			self.catching_up = False
+			if history is not None:
+				history.replaying = False
 
 	def highlightBlock(self, text):
-		for regex, fmt in self.rules:
+		limit = self.long_line_limit()
+		if limit is not None and len(text) > limit:
+			# Only the head of a long line is colored. Its brackets and string
+			# state are not tracked, so the carried state passes through unchanged
+			self.long_line_seen = True
+			text = text[:limit]
+			data = BlockData([], *measure_indent(text))
+			data.long_line = True
+			state = max(self.previousBlockState(), 0)
+		else:
+			# Bracket cache for this block; Qt re-runs the next block only when the
+			# carried string state changes, so edits stay local
+			brackets, state = scan_brackets(text, max(self.previousBlockState(), 0))
+			data = BlockData(brackets, *measure_indent(text))
+		self.setCurrentBlockUserData(data)
+		self.setCurrentBlockState(state)
+		if self.bulk_depth:
+			# Brackets and string state now, so later blocks start right and the
+			# catch-up pass only has colors left to do
+			self._defer(self.currentBlock())
+			return
+		if self.catching_up:
+			self._last_highlighted = self.currentBlock()
+
+		spans = data.spans
+		for (regex, fmt), rgba in zip(self.rules, self.rule_colors):
 			it = regex.globalMatch(text)
 			while it.hasNext():
 				match = it.next()
 				start = match.capturedStart()
 				length = match.capturedLength()
 				self.setFormat(start, length, fmt)
+				spans.append((start, length, rgba))
 
 
 if __name__ == '__main__':
@@ -1,20 +1,140 @@
 import json,os, re
 l = os.path.join
-def resolve_variable(match, variables):
-	key = match.group(1)
-	return variables.get(key, match.group(0))
+TOKEN_RE = re.compile(r"\$([A-Za-z0-9_]+)\$")
+ICON_URL_RE = re.compile(r"url\((?:\./)?icons/([^)]+)\)")
 
-def get_stylesheet(theme_path):
-	base_dir = os.path.dirname(__file__)
-	with open(l(base_dir,"constant_theme.css"), encoding="utf-8") as f:
+# css path -> (mtime_ns, CompiledTemplate)
+_templates = {}
+# (theme path, theme mtime_ns, css path, css mtime_ns) -> stylesheet
+_stylesheets = {}
+# theme path -> (mtime_ns, variables)
+_themes = {}
+
+class CompiledTemplate:
+	# The theme CSS parsed once into literal text plus $Token$ positions, and
+	# split into top-level rule sections so theme switches can tell which
+	# sections actually change.
+	def __init__(self, content):
+		self.content = content
+		# (start, end, name) for every $Token$, in order
+		self.tokens = [(m.start(), m.end(), m.group(1)) for m in TOKEN_RE.finditer(content)]
+		# (start, end, selector, token names) for every top-level rule
+		self.sections = []
+		for start, end in self._section_spans(content):
+			names = frozenset(name for s, e, name in self.tokens if start <= s < end)
+			selector = content[start:end].split('{', 1)[0]
+			selector = re.sub(r"/\*.*?\*/", "", selector, flags=re.S).strip()
+			self.sections.append((start, end, selector, names))
+
+	@staticmethod
+	def _section_spans(content):
+		spans = []
+		depth = 0
+		start = 0
+		i = 0
+		n = len(content)
+		while i < n:
+			if content.startswith('/*', i):
+				close = content.find('*/', i + 2)
+				i = n if close < 0 else close + 2
+				continue
+			ch = content[i]
+			if ch == '{':
+				depth += 1
+			elif ch == '}' and depth:
+				depth -= 1
+				if depth == 0:
+					spans.append((start, i + 1))
+					start = i + 1
+			i += 1
+		return spans
+
+	def render(self, variables, start=0, end=None):
+		end = len(self.content) if end is None else end
+		out = []
+		pos = start
+		for s, e, name in self.tokens:
+			if s < start or e > end:
+				continue
+			out.append(self.content[pos:s])
+			out.append(str(variables.get(name, self.content[s:e])))
+			pos = e
+		out.append(self.content[pos:end])
+		return ''.join(out)
+
+	def changed_sections(self, old_variables, new_variables):
+		# Indices of sections whose tokens resolve differently between two themes
+		changed = []
+		for index, (_s, _e, _selector, names) in enumerate(self.sections):
+			if any(old_variables.get(name) != new_variables.get(name) for name in names):
+				changed.append(index)
+		return changed
+
+def _mtime(path):
+	try:
+		return os.stat(path).st_mtime_ns
+	except OSError:
+		return None
+
+def _css_path():
+	return l(os.path.dirname(__file__), "constant_theme.css")
+
+def get_template(css_path=None):
+	css_path = os.path.abspath(css_path or _css_path())
+	mtime = _mtime(css_path)
+	cached = _templates.get(css_path)
+	if cached and cached[0] == mtime:
+		return cached[1]
+	with open(css_path, encoding="utf-8") as f:
 		content = f.read()
+	# Make icon URLs absolute so Qt can load them reliably
+	icons_dir = l(os.path.dirname(__file__), "icons").replace('\\', '/')
+	content = ICON_URL_RE.sub(lambda m: f"url({icons_dir}/" + m.group(1) + ")", content)
+	template = CompiledTemplate(content)
+	_templates[css_path] = (mtime, template)
+	return template
+
+def load_theme(theme_path):
+	theme_path = os.path.abspath(theme_path)
+	mtime = _mtime(theme_path)
+	cached = _themes.get(theme_path)
+	if cached and cached[0] == mtime:
+		return cached[1]
 	with open(theme_path, encoding="utf-8") as f:
 		variables = json.load(f)
-	# Replace $Token$ with values from the theme using a non-greedy, safe key pattern
-	# Keys are expected to be alphanumeric/underscore identifiers
-	pattern = re.compile(r"\$([A-Za-z0-9_]+)\$")
-	styled = pattern.sub(lambda m: resolve_variable(m, variables), content)
-	# Make icon URLs absolute so Qt can load them reliably
-	icons_dir = l(base_dir, "icons").replace('\\', '/')
-	styled = re.sub(r"url\((?:\./)?icons/([^)]+)\)", lambda m: f"url({icons_dir}/" + m.group(1) + ")", styled)
+	_themes[theme_path] = (mtime, variables)
+	return variables
+
+def list_themes():
+	# Theme files are the JSON files next to this module that define editor colors
+	base_dir = os.path.dirname(__file__)
+	themes = []
+	for name in sorted(os.listdir(base_dir)):
+		if not name.endswith('.json'):
+			continue
+		try:
+			variables = load_theme(l(base_dir, name))
+		except (OSError, ValueError):
+			continue
+		if isinstance(variables, dict) and 'EditorBG' in variables and 'colors' in variables:
+			themes.append(l(base_dir, name))
+	return themes
+
+def get_stylesheet(theme_path):
+	theme_path = os.path.abspath(theme_path)
+	css_path = os.path.abspath(_css_path())
+	key = (theme_path, _mtime(theme_path), css_path, _mtime(css_path))
+	styled = _stylesheets.get(key)
+	if styled is None:
+		# Replace $Token$ with values from the theme; unknown tokens are left as-is
+		styled = get_template(css_path).render(load_theme(theme_path))
+		_stylesheets[key] = styled
 	return styled
+
+def theme_diff(old_theme_path, new_theme_path):
+	# Sections of the stylesheet that change between two themes, plus whether
+	# the syntax colors differ (those are applied by the highlighters, not QSS)
+	old = load_theme(old_theme_path)
+	new = load_theme(new_theme_path)
+	sections = get_template().changed_sections(old, new)
+	return sections, old.get('colors') != new.get('colors')
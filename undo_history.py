@@ -0,0 +1,162 @@
+import os
+import zlib
+
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtGui import QTextCursor
+
+from file_io import read_text
+
+
+class UndoHistory(QObject):
+	# Keeps a document's undo history under a byte budget. Recent edits live
+	# in Qt's own undo stack; once that grows past its share of the budget the
+	# stack is folded into a compressed whole-document checkpoint and cleared.
+	# Undoing past the start of Qt's stack steps back one checkpoint at a time;
+	# the states stepped over are kept so redo can walk forward again.
+	# Shared by every view of the document, like its Highlighter.
+	ENTRY_OVERHEAD = 48  # rough per-change bookkeeping inside QTextDocument
+
+	def __init__(self, document, budget_bytes=16 * 1024 * 1024, parent=None):
+		super().__init__(parent)
+		self.budget_bytes = budget_bytes
+		self.document = None
+		self.replaying = False  # set while Qt's stack is undoing/redoing
+		self._stack_bytes = 0
+		self._snapshots = []    # compressed texts, oldest first
+		self._redo = []         # compressed texts undone past, next redo last
+		self._base = None       # state at the bottom of Qt's stack (see _resolve_base)
+		self._checkpoint_pending = False
+		self.attach(document)
+
+	def attach(self, document, base=None):
+		# base: compressed text, ('disk', path, stat) or None when unknown
+		if self.document is not None:
+			try:
+				self.document.contentsChange.disconnect(self._on_contents_change)
+			except (RuntimeError, TypeError):
+				pass
+		self.document = document
+		self._stack_bytes = 0
+		self._snapshots = []
+		self._redo = []
+		self._base = base
+		if document is not None:
+			document.contentsChange.connect(self._on_contents_change)
+
+	def set_base_from_file(self, path):
+		try:
+			st = os.stat(path)
+		except OSError:
+			self._base = None
+			return
+		# Read back lazily, only if a checkpoint needs it and the file is unchanged
+		self._base = ('disk', path, (st.st_size, st.st_mtime_ns))
+
+	def set_budget(self, budget_bytes):
+		self.budget_bytes = budget_bytes
+		self._trim()
+
+	def memory_usage(self):
+		snapshots = sum(len(s) for s in self._snapshots) + sum(len(s) for s in self._redo)
+		base = len(self._base) if isinstance(self._base, bytes) else 0
+		return self._stack_bytes + snapshots + base
+
+	def can_undo(self):
+		return self.document.isUndoAvailable() or bool(self._snapshots)
+
+	def can_redo(self):
+		return self.document.isRedoAvailable() or bool(self._redo)
+
+	def _on_contents_change(self, position, removed, added):
+		if self.replaying:
+			return
+		self._redo = []  # a new edit ends the way forward, as in Qt's stack
+		self._stack_bytes += (removed + added) * 2 + self.ENTRY_OVERHEAD
+		if self.budget_bytes and self._stack_bytes > self.budget_bytes // 2 and not self._checkpoint_pending:
+			# Never touch the undo stack from inside a change notification
+			self._checkpoint_pending = True
+			QTimer.singleShot(0, self.checkpoint)
+
+	def _resolve_base(self):
+		base = self._base
+		if isinstance(base, tuple):
+			_kind, path, stat = base
+			try:
+				st = os.stat(path)
+				if (st.st_size, st.st_mtime_ns) != stat:
+					return None
+				text, _encoding, _newline = read_text(path)
+			except OSError:
+				return None
+			return zlib.compress(text.encode('utf-8'), 1)
+		return base
+
+	def checkpoint(self):
+		# Fold Qt's undo stack into the compressed state it started from
+		self._checkpoint_pending = False
+		if self.document is None or self._stack_bytes <= self.budget_bytes // 2:
+			return  # reattached or reset since this was scheduled
+		base = self._resolve_base()
+		if base is not None:
+			self._snapshots.append(base)
+		self._base = self._compress()
+		self.document.clearUndoRedoStacks()
+		self._stack_bytes = 0
+		self._trim()
+
+	def _trim(self):
+		# Oldest checkpoints go first once the whole history is over budget
+		while self._snapshots and self.budget_bytes and self.memory_usage() > self.budget_bytes:
+			self._snapshots.pop(0)
+
+	def restore_previous(self, cursor=None):
+		# Undo past the start of Qt's stack: go back to the previous checkpoint.
+		# Returns False when there is nothing older to go back to.
+		if not self._snapshots:
+			return False
+		# Replacing the text drops Qt's redo stack, so keep where it led and
+		# the checkpoint itself for restore_next
+		self.replaying = True
+		try:
+			if self.document.isRedoAvailable():
+				while self.document.isRedoAvailable():
+					self.document.redo()
+				self._redo.append(self._compress())
+				while self.document.isUndoAvailable():
+					self.document.undo()
+		finally:
+			self.replaying = False
+		self._redo.append(self._compress())
+		self._replace(self._snapshots.pop(), cursor)
+		return True
+
+	def restore_next(self, cursor=None):
+		# Redo past the end of Qt's stack: go forward to the state undone last.
+		# Returns False when there is nothing newer to go forward to.
+		if not self._redo:
+			return False
+		self._snapshots.append(self._compress())
+		self._replace(self._redo.pop(), cursor)
+		self._trim()
+		return True
+
+	def _compress(self):
+		return zlib.compress(self.document.toPlainText().encode('utf-8'), 1)
+
+	def _replace(self, data, cursor):
+		text = zlib.decompress(data).decode('utf-8')
+		position = cursor.position() if cursor is not None else 0
+		self.replaying = True
+		self.document.setUndoRedoEnabled(False)
+		try:
+			tc = QTextCursor(self.document)
+			tc.select(QTextCursor.Document)
+			tc.insertText(text)
+		finally:
+			self.document.setUndoRedoEnabled(True)
+			self.replaying = False
+		self._base = data
+		self._stack_bytes = 0
+		self.document.setModified(True)
+		if cursor is not None:
+			cursor.setPosition(min(position, self.document.characterCount() - 1))
@@ -0,0 +1,208 @@
+import codecs
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+
+from PySide6.QtCore import QObject, QProcess, QTimer, Signal
+from PySide6.QtNetwork import QLocalSocket
+
+SERVER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'run_server.py')
+EXIT_MARKER = b'\x1eSNYEXIT '
+
+
+def available():
+	return hasattr(os, 'fork')
+
+
+class WarmRunner(QObject):
+	# Keeps run_server.py alive with the preload modules imported and runs
+	# scripts as forks of it. One run at a time; its output streams through
+	# `output` and `finished` reports the exit code (None if unknown).
+	# `run` returns False whenever the caller should fall back to a normal run;
+	# the handshake then finishes in the background with `started`, or with
+	# `declined` if the server cannot take the run after all.
+	output = Signal(str)
+	started = Signal()
+	declined = Signal(str)             # path, to be run the normal way
+	finished = Signal(object, float)   # exit code, seconds
+
+	def __init__(self, parent=None):
+		super().__init__(parent)
+		self.server = None
+		self.ready = False
+		self.socket_path = os.path.join(tempfile.gettempdir(), f'snyide-run-{os.getpid()}.sock')
+		self.socket = None
+		self.pid = None
+		self._config = None
+		self._started = 0.0
+		self._decoder = None
+		self._tail = b''
+		self._exit_code = None
+		self._request = None
+		self._handshake_timer = QTimer(self)
+		self._handshake_timer.setSingleShot(True)
+		self._handshake_timer.setInterval(2000)
+		self._handshake_timer.timeout.connect(self._decline)
+
+	def configure(self, root, preload):
+		# (Re)starts the server when the project or preload list changes
+		config = (os.path.abspath(root), tuple(preload))
+		if config == self._config and self.server is not None:
+			return
+		self.shutdown()
+		self._config = config
+		if not available():
+			return
+		self.server = QProcess(self)
+		self.server.setWorkingDirectory(config[0])
+		self.server.setProcessChannelMode(QProcess.ForwardedErrorChannel)
+		self.server.readyReadStandardOutput.connect(self._on_server_output)
+		self.server.finished.connect(self._on_server_finished)
+		self.server.start(shutil.which('python') or sys.executable,
+						  ['-u', SERVER_PATH, '--socket', self.socket_path, '--root', config[0],
+						   '--preload', ','.join(preload)])
+
+	def shutdown(self):
+		self.stop()
+		self._config = None
+		self.ready = False
+		if self.server is not None:
+			server, self.server = self.server, None
+			server.finished.disconnect(self._on_server_finished)
+			# Closing stdin lets the server clean up its socket; it needs no wait
+			server.finished.connect(server.deleteLater)
+			server.closeWriteChannel()
+
+	def is_running(self):
+		return self.socket is not None
+
+	def run(self, path, cwd, args=()):
+		# Nothing here waits on the server: connecting and the handshake
+		# happen in the slots below
+		if not self.ready or self.socket is not None:
+			return False
+		self._request = {'path': os.path.abspath(path), 'cwd': cwd, 'args': list(args)}
+		self.socket = QLocalSocket(self)
+		self.socket.connected.connect(self._on_connected)
+		self.socket.readyRead.connect(self._on_ready_read)
+		self.socket.disconnected.connect(self._on_disconnected)
+		self.socket.errorOccurred.connect(self._on_socket_error)
+		self._handshake_timer.start()
+		self.socket.connectToServer(self.socket_path)
+		return True
+
+	def _on_connected(self):
+		self.socket.write((json.dumps(self._request) + '\n').encode('utf-8'))
+
+	def _on_handshake(self):
+		# The first line is the child's pid, or a stale notice if a preloaded
+		# project module changed (the server restarts itself in that case)
+		try:
+			reply = json.loads(bytes(self.socket.readLine()))
+		except ValueError:
+			reply = {}
+		if 'pid' not in reply:
+			if reply.get('stale'):
+				self.ready = False
+			self._decline()
+			return False
+		self._handshake_timer.stop()
+		self.pid = reply['pid']
+		self._started = time.perf_counter()
+		self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+		self._tail = b''
+		self._exit_code = None
+		self.started.emit()
+		return True
+
+	def _on_socket_error(self, _error):
+		if self.pid is None:
+			self._decline()
+
+	def _decline(self):
+		# Still handshaking: the run goes back to the caller
+		if self.socket is None or self.pid is not None:
+			return
+		self._close_socket()
+		self.declined.emit(self._request['path'])
+
+	def _close_socket(self):
+		self._handshake_timer.stop()
+		socket, self.socket = self.socket, None
+		socket.blockSignals(True)
+		socket.abort()
+		socket.deleteLater()
+
+	def write_input(self, text):
+		if self.socket is not None:
+			self.socket.write(text.encode('utf-8'))
+
+	def stop(self):
+		# Kills the run's whole process group; the server reports the exit
+		if self.pid is None and self.socket is not None:
+			self._close_socket()  # not started yet
+		if self.pid is not None:
+			try:
+				os.killpg(self.pid, signal.SIGKILL)
+			except OSError:
+				pass
+
+	def _on_ready_read(self):
+		if self.socket is None:
+			return
+		if self.pid is None:
+			if not self.socket.canReadLine() or not self._on_handshake():
+				return
+		data = self._tail + bytes(self.socket.readAll())
+		self._tail = b''
+		index = data.find(EXIT_MARKER)
+		if index >= 0:
+			try:
+				self._exit_code = int(data[index + len(EXIT_MARKER):].split(b'\n', 1)[0])
+			except ValueError:
+				pass
+			data = data[:index]
+		else:
+			# Hold back a partial marker split across reads
+			cut = data.rfind(b'\x1e')
+			if cut >= 0 and EXIT_MARKER.startswith(data[cut:]):
+				data, self._tail = data[:cut], data[cut:]
+		text = self._decoder.decode(data)
+		if text:
+			self.output.emit(text)
+		if index >= 0:
+			self._finish()
+
+	def _on_disconnected(self):
+		if self.socket is not None:
+			self._on_ready_read()
+		if self.socket is not None and self.pid is None:
+			self._decline()
+		elif self.socket is not None:
+			self._finish()
+
+	def _finish(self):
+		self._close_socket()
+		self.pid = None
+		text = self._decoder.decode(b'', final=True)
+		if text:
+			self.output.emit(text)
+		self.finished.emit(self._exit_code, time.perf_counter() - self._started)
+
+	def _on_server_output(self):
+		while self.server is not None and self.server.canReadLine():
+			line = bytes(self.server.readLine()).decode('utf-8', errors='replace').rstrip('\n')
+			if line == 'ready':
+				self.ready = True
+			elif line:
+				self.output.emit(f'[warm run] {line}\n')
+
+	def _on_server_finished(self, *_):
+		self.ready = False
+		self.server.deleteLater()
+		self.server = None
+		self._config = None